@@ -50,7 +50,7 @@ st.header('🏠 Welcome to Experiment Management System!')
 st.caption('By The Anh Tran')
 
 # Fetch data from server
-response = sender.experiment_list()
+response = sender.experiment_list(limit=1)
 
 # Display result
 if not response['success']:
@@ -58,7 +58,7 @@ if not response['success']:
     st.info('Error message: {}'.format(response['message']), icon='ℹ️')
 else:
     st.success('Fetched data from server successfully!', icon="✅")
-    exp_list = response['data']
+    counts = response['data']['counts']
     
     st.subheader('📈 Here are some statistics.')
     st.markdown('---')
@@ -67,72 +67,71 @@ else:
     cols = st.columns(4)
 
     # Display statistics
-    classified_exps = experiment_classify(exp_list)
-    cols[0].metric(label="Total", value=len(exp_list), delta='Experiments')
-    cols[1].metric(label="Created", value=len(classified_exps['created']), delta='Experiments')
-    cols[2].metric(label="Running", value=len(classified_exps['running']), delta='Experiments')
-    cols[3].metric(label="Done", value=len(classified_exps['done']), delta='Experiments')
+    cols[0].metric(label="Total", value=counts['total'], delta='Experiments')
+    cols[1].metric(label="Created", value=counts['created'], delta='Experiments')
+    cols[2].metric(label="Running", value=counts['running'], delta='Experiments')
+    cols[3].metric(label="Done", value=counts['done'], delta='Experiments')
     
     cols[0].markdown('---')
     cols[1].markdown('---')
     cols[2].markdown('---')
     cols[3].markdown('---')
     
-    exp_sorted_by_accuracy = experiment_sort(
-        classified_exps, 
+    best_accuracy = experiment_best(
+        sender, 
         criterion='accuracy', 
         reverse=True, 
         train=False
     )
     cols[0].metric(
         label="Best Accuracy", 
-        value='--' if len(exp_sorted_by_accuracy) == 0 \
+        value='--' if best_accuracy is None \
             else "{:.2f}%".format(
-                exp_sorted_by_accuracy[0]['result']['train']['accuracy'] * 100
+                best_accuracy['result']['valid']['accuracy'] * 100
             ), 
-        delta='--' if len(exp_sorted_by_accuracy) == 0 else exp_sorted_by_accuracy[0]['id']
+        delta='--' if best_accuracy is None else best_accuracy['id']
     )
     
-    exp_sorted_by_precision = experiment_sort(
-        classified_exps, 
+    best_precision = experiment_best(
+        sender, 
         criterion='precision', 
         reverse=True, 
         train=False
     )
     cols[1].metric(
         label="Best Precision", 
-        value='--' if len(exp_sorted_by_precision) == 0 \
+        value='--' if best_precision is None \
             else "{:.2f}%".format(
-                exp_sorted_by_precision[0]['result']['train']['precision']['macro'] * 100
+                best_precision['result']['valid']['precision']['macro'] * 100
             ), 
-        delta='--' if len(exp_sorted_by_precision) == 0 else exp_sorted_by_precision[0]['id']
+        delta='--' if best_precision is None else best_precision['id']
     )
     
-    exp_sorted_by_recall = experiment_sort(
-        classified_exps, 
+    best_recall = experiment_best(
+        sender, 
         criterion='recall', 
         reverse=True, 
         train=False
     )
     cols[2].metric(
         label="Best Recall", 
-        value='--' if len(exp_sorted_by_recall) == 0 \
+        value='--' if best_recall is None \
             else "{:.2f}%".format(
-                exp_sorted_by_recall[0]['result']['train']['recall']['macro'] * 100
+                best_recall['result']['valid']['recall']['macro'] * 100
             ), 
-        delta='--' if len(exp_sorted_by_recall) == 0 else exp_sorted_by_recall[0]['id']
+        delta='--' if best_recall is None else best_recall['id']
     )
     
-    exp_sorted_by_duration = experiment_sort(
-        classified_exps, 
+    fastest = experiment_best(
+        sender, 
         criterion='duration', 
         reverse=False
     )
     cols[3].metric(
         label="Fastest", 
-        value='--' if len(exp_sorted_by_duration) == 0 \
+        value='--' if fastest is None \
             else "{:.2f}s".format(
-                exp_sorted_by_duration[0]['run']['dur']
+                fastest['run']['dur']
             ), 
-        delta='--' if len(exp_sorted_by_duration) == 0 else exp_sorted_by_duration[0]['id']
+        delta='--' if fastest is None else fastest['id']
     )
\ No newline at end of file
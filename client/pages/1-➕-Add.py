@@ -160,6 +160,21 @@ else:
                 
             else:
                 pass
+    
+    # Shapes of every layer, checked on the server as the structure is edited
+    if all('name' in layer for layer in st.session_state['layers']):
+        response = sender.experiment_validate({'layers': st.session_state['layers']})
+        report = response['data']
+        
+        for layer in report['layers']:
+            cols[0].caption('[{}] {}: {} → {} ({:,} params)'.format(
+                layer['index'], layer['name'], layer['in_shape'], layer['out_shape'], layer['params']
+            ))
+        
+        if response['success']:
+            cols[0].success('Output shape {}, {:,} parameters.'.format(report['output_shape'], report['params']), icon='✅')
+        else:
+            cols[0].error(response['message'], icon='🚨')
 
 _cols = cols[0].columns(2)
 add_button = _cols[0].button(label='Add new layer')
@@ -244,7 +259,7 @@ if 'transforms' not in st.session_state:
     
 transforms = cols[1].multiselect(
     'Choose data augmentation methods', 
-    ['to_tensor'],
+    ['to_tensor', 'normalize'],
     ['to_tensor'],
     key='transform_list'
 )
@@ -304,7 +319,9 @@ if start_button:
         response = sender.experiment_start(st.session_state['exp_id'])
     
         if response['success']:
-            annouce.success("Experiment {} is running...".format(st.session_state['exp_id']), icon="✅")
+            annouce.success("Experiment {} is queued at position {}...".format(
+                st.session_state['exp_id'], response['data']['position']
+            ), icon="✅")
         else:
             annouce.error('Create failed: {}'.format(response['message']), icon='🚨')
             
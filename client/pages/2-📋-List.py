@@ -7,6 +7,7 @@ from utils import *
 # Load configs
 host = os.environ.get('HOST')
 sender = RequestSender(host)
+page_size = 20
 
 # Configure wide screen mode
 st.set_page_config(layout="wide")
@@ -23,63 +24,87 @@ st.markdown('''
 st.header('📋 Your experiments are listed here.')
 st.info('In this page, you can sort experiments by pre-defined metrics.', icon='ℹ️')
 
-# Fetch data from server
-response = sender.experiment_list()
+# Sort header
+st.subheader('🔬 Experiment list')
+cols = st.columns(5)
+
+cols[0].markdown('**Sort options**')
+cols[0].caption('Sort options for experiments below.')
+
+status = cols[1].selectbox(
+    'Status', 
+    [
+        'all',
+        'done',
+        'stopped',
+        'failed',
+        'running',
+        'created'
+    ],
+    index=0
+)
+
+criterion = cols[2].selectbox(
+    'Sort by', 
+    [
+        'accuracy',
+        'precision',
+        'recall',
+        'duration'
+    ],
+    index=0
+)
+
+order = cols[3].selectbox(
+    'Sort order', 
+    [
+        'ascending',
+        'descending'
+    ],
+    index=1
+)
+
+dataset = 'train'
+if criterion != 'duration':
+    dataset = cols[4].selectbox(
+    'On dataset', 
+    [
+        'train',
+        'valid'
+    ],
+    index=0
+)
+
+st.markdown('---')
+
+# Reset paging when the query changes
+query = {
+    'sort_by': criterion,
+    'dataset': dataset,
+    'order': 'desc' if order == 'descending' else 'asc',
+    'limit': page_size
+}
+if status != 'all':
+    query['status'] = status
+
+if st.session_state.get('list_query') != query:
+    st.session_state['list_query'] = query
+    st.session_state['list_cursors'] = [None]
+
+# Fetch one page from server
+cursors = st.session_state['list_cursors']
+params = dict(query)
+if cursors[-1] is not None:
+    params['cursor'] = cursors[-1]
+response = sender.experiment_list(**params)
 
 # Display result
 if not response['success']:
     st.error('Failed to fetch data from server!', icon='🚨')
     st.info('Error message: {}'.format(response['message']), icon='ℹ️')
 else:
-    exp_list = response['data']
-    classified_exps = experiment_classify(exp_list)
-    
-    # Sort header
-    st.subheader('🔬 Experiment list')
-    cols = st.columns(4)
-    
-    cols[0].markdown('**Sort options**')
-    cols[0].caption('Sort options for experiments below.')
-    
-    criterion = cols[1].selectbox(
-        'Sort by', 
-        [
-            'accuracy',
-            'precision',
-            'recall',
-            'duration'
-        ],
-        index=0
-    )
-    
-    order = cols[2].selectbox(
-        'Sort order', 
-        [
-            'ascending',
-            'descending'
-        ],
-        index=1
-    )
-    
-    if criterion != 'duration':
-        dataset = cols[3].selectbox(
-        'On dataset', 
-        [
-            'train',
-            'valid'
-        ],
-        index=0
-    )
-    
-    st.markdown('---')
-    
-    sorted_exps = experiment_sort(
-        classified_exps,
-        criterion=criterion,
-        train=dataset if 'dataset' in locals() else True,
-        reverse=(order == 'descending')
-    )
-    all_exps = sorted_exps + classified_exps['running'] + classified_exps['created']
+    all_exps = response['data']['items']
+    offset = (len(cursors) - 1) * page_size
     
     if len(all_exps) > 0:
         for i, exp in enumerate(all_exps):
@@ -88,7 +113,7 @@ else:
             
             # Column 0
             exp_cols[0].markdown('**Experiment**')
-            exp_cols[0].markdown('- Index: **{}**'.format(i))
+            exp_cols[0].markdown('- Index: **{}**'.format(offset + i))
             exp_cols[0].markdown('- Exp ID: **{}**'.format(exp['id']))
             exp_cols[0].markdown('- Status: **{}**'.format(exp['run']['status']))
             
@@ -147,6 +172,30 @@ else:
                 exp_cols[3].markdown('--')
             
             st.markdown('---')
+        
+        # Compare loss curves of this page
+        st.subheader('📈 Training loss')
+        metrics = sender.experiment_metrics_compare(
+            [exp['id'] for exp in all_exps][:10], 
+            fields='loss'
+        )
+        if metrics['success']:
+            frame = metrics_frame([item for item in metrics['data']['items'] if item['total'] > 0], field='loss')
+            if len(frame) > 0:
+                st.line_chart(frame, height=300)
+            else:
+                st.info('No training curve yet.', icon='ℹ️')
+        st.markdown('---')
     else:
         st.info('Experiment list is empty!', icon='ℹ️')
+    
+    # Paging
+    page_cols = st.columns([1, 4, 1])
+    if len(cursors) > 1 and page_cols[0].button('Previous page'):
+        cursors.pop()
+        st.rerun()
+    
+    if response['data']['next'] is not None and page_cols[2].button('Next page'):
+        cursors.append(response['data']['next'])
+        st.rerun()
     
\ No newline at end of file
@@ -1,5 +1,6 @@
 import os
 import time
+import requests
 import streamlit as st
 
 from utils import *
@@ -69,10 +70,11 @@ if response['success']:
     curr_epoch = data['status']['run']['curr_epoch'] if 'curr_epoch' in data['status']['run'] else None
     total_epoch = data['config']['train']['num_epochs']
     
-    curr_progress, curr_text = get_current_progress(curr_epoch, total_epoch, curr_status)
+    curr_progress, curr_text = get_current_progress(curr_epoch, total_epoch, curr_status, data.get('queue'))
     status_cols = st.columns([5, 1])
     status_cols[0].progress(curr_progress, curr_text)
-    if curr_status == 'create':
+    loss_display = status_cols[0].empty()
+    if curr_status in ['create', 'failed', 'stopped']:
         start_button = status_cols[1].button('Start this')
         
         if start_button:
@@ -80,6 +82,20 @@ if response['success']:
             
             if response['success']:
                 st.rerun()
+    
+    if curr_status == 'failed' and data.get('resumable'):
+        resume_button = status_cols[1].button('Resume this')
+        
+        if resume_button:
+            response = sender.experiment_resume(exp_id)
+            
+            if response['success']:
+                st.rerun()
+    
+    # Display training curve
+    metrics = sender.experiment_metrics(exp_id, fields='loss')
+    if metrics['success'] and metrics['data']['total'] > 0:
+        status_cols[0].line_chart(metrics_frame([metrics['data']], field='loss'), height=200)
     st.markdown('---')
     
     st.subheader('🌍 Experiment info')
@@ -132,12 +148,24 @@ if response['success']:
     info_cols[1].markdown('- Duration: **{}**'.format(
         '{:.2f}s'.format(data['status']['run']['dur']) if 'dur' in data['status']['run'] else '--'
     ))
+    if data['status']['run'].get('compile'):
+        compile_info = data['status']['run']['compile']
+        info_cols[1].markdown('- Compile ({}): **{}**'.format(
+            compile_info['mode'],
+            '{:.2f}s, {:.2f}x speedup'.format(compile_info['compile_time'], compile_info['speedup']) \
+                if compile_info['compiled'] else 'failed, ran eager'
+        ))
     
     info_cols[1].markdown('---')
     info_cols[1].markdown('**Evaluating result**')
     info_cols[1].info('Result of evaluating best checkpoint.', icon='ℹ️')
     
-    if 'result' not in data['status']:
+    if curr_status == 'stopped':
+        info_cols[1].warning('Stopped early after epoch {}.'.format(data['status']['run'].get('stopped_at')), icon='✋')
+    
+    if curr_status == 'failed':
+        info_cols[1].error('Experiment failed: {}'.format(data['status']['run'].get('error')), icon='🚨')
+    elif 'result' not in data['status']:
         info_cols[1].info('Results are not available.', icon='ℹ️')
     else:
         result_cols = info_cols[1].columns(2)
@@ -146,16 +174,52 @@ if response['success']:
         result_cols[0].markdown('- Accuracy: **{:.2f}%**'.format(data['status']['result']['train']['accuracy'] * 100))
         result_cols[0].markdown('- Precision: **{:.2f}%**'.format(data['status']['result']['train']['precision']['macro'] * 100))
         result_cols[0].markdown('- Recall: **{:.2f}%**'.format(data['status']['result']['train']['recall']['macro'] * 100))
+        if 'f1' in data['status']['result']['train']:
+            result_cols[0].markdown('- F1: **{:.2f}%**'.format(data['status']['result']['train']['f1']['macro'] * 100))
         
         result_cols[1].success("On valid set", icon="✅")
         result_cols[1].markdown('- Accuracy: **{:.2f}%**'.format(data['status']['result']['valid']['accuracy'] * 100))
         result_cols[1].markdown('- Precision: **{:.2f}%**'.format(data['status']['result']['valid']['precision']['macro'] * 100))
         result_cols[1].markdown('- Recall: **{:.2f}%**'.format(data['status']['result']['valid']['recall']['macro'] * 100))
+        if 'f1' in data['status']['result']['valid']:
+            result_cols[1].markdown('- F1: **{:.2f}%**'.format(data['status']['result']['valid']['f1']['macro'] * 100))
+        
+        # Int8 model next to the fp32 one
+        quantized = data['status']['result'].get('quantized')
+        if quantized and 'error' in quantized:
+            info_cols[1].warning('Quantization failed: {}'.format(quantized['error']), icon='⚠️')
+        elif quantized:
+            result = data['status']['result']
+            info_cols[1].markdown('**Int8 dynamic quantization**')
+            info_cols[1].markdown('\n'.join([
+                '| | fp32 | int8 |',
+                '|---|---|---|',
+                '| Train accuracy | {:.2f}% | {:.2f}% |'.format(result['train']['accuracy'] * 100, quantized['train']['accuracy'] * 100),
+                '| Valid accuracy | {:.2f}% | {:.2f}% |'.format(result['valid']['accuracy'] * 100, quantized['valid']['accuracy'] * 100),
+                '| File size | {:.1f} KB | {:.1f} KB |'.format(quantized['fp32_size'] / 1024, quantized['size'] / 1024),
+                '| Batch time | {:.2f} ms | {:.2f} ms |'.format(quantized['fp32_batch_time'] * 1e3, quantized['batch_time'] * 1e3)
+            ]))
     
 else:
     fetch_announce.error('Fetch data failed: {}'.format(response['message']), icon='🚨')
     
     
-while True:
+# Wait for server pushed events instead of polling
+if response['success']:
+    try:
+        for event, event_data in sender.experiment_events(exp_id):
+            if event == 'loss':
+                loss_display.caption('Epoch {} - Step [{}/{}] - Loss: {:.4f}'.format(
+                    event_data['epoch'], 
+                    event_data['step'], 
+                    event_data['total_step'], 
+                    event_data['loss']
+                ))
+            elif event != 'snapshot':
+                break
+    except requests.exceptions.RequestException:
+        time.sleep(5)
+else:
     time.sleep(5)
-    st.rerun()
\ No newline at end of file
+    
+st.rerun()
\ No newline at end of file
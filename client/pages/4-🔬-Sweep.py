@@ -0,0 +1,86 @@
+import os
+import streamlit as st
+
+from utils import *
+
+
+# Load configs
+host = os.environ.get('HOST')
+sender = RequestSender(host)
+
+# Configure wide screen mode
+st.set_page_config(layout="wide")
+
+# Main page
+st.header('🔬 Hyperparameter sweeps')
+st.info('Sweeps are created with the /sweep/create API. Here are their progress and leaderboards.', icon='ℹ️')
+
+# Select sweep
+response = sender.sweep_list()
+if not response['success']:
+    st.error('Failed to fetch data from server!', icon='🚨')
+    st.stop()
+
+sweeps = response['data']['items']
+if len(sweeps) == 0:
+    st.info('Sweep list is empty!', icon='ℹ️')
+    st.stop()
+
+cols = st.columns([3, 1, 1, 1])
+sweep_id = cols[0].selectbox(
+    'Sweep',
+    [sweep['id'] for sweep in sweeps],
+    format_func=lambda sweep_id: '{} ({})'.format(
+        sweep_id, 
+        [sweep['created'][:-7] for sweep in sweeps if sweep['id'] == sweep_id][0]
+    )
+)
+criterion = cols[1].selectbox('Sort by', ['accuracy', 'precision', 'recall', 'duration'], index=0)
+dataset = cols[2].selectbox('On dataset', ['valid', 'train'], index=0)
+order = cols[3].selectbox('Sort order', ['descending', 'ascending'], index=0 if criterion != 'duration' else 1)
+
+st.markdown('---')
+
+# Sweep status
+response = sender.sweep_info(sweep_id)
+if not response['success']:
+    st.error('Fetch sweep failed: {}'.format(response['message']), icon='🚨')
+    st.stop()
+
+counts = response['data']['counts']
+count_cols = st.columns(6)
+count_cols[0].metric(label='Total', value=counts['total'])
+count_cols[1].metric(label='Created', value=counts['created'])
+count_cols[2].metric(label='Running', value=counts['running'])
+count_cols[3].metric(label='Done', value=counts['done'])
+count_cols[4].metric(label='Stopped', value=counts['stopped'])
+count_cols[5].metric(label='Failed', value=counts['failed'])
+
+st.markdown('**Search space** ({})'.format(response['data']['spec']['method']))
+st.json(response['data']['spec']['space'], expanded=False)
+
+# Leaderboard
+response = sender.sweep_leaderboard(
+    sweep_id, 
+    sort_by=criterion, 
+    dataset=dataset, 
+    order='desc' if order == 'descending' else 'asc', 
+    limit=100
+)
+if not response['success']:
+    st.error('Fetch leaderboard failed: {}'.format(response['message']), icon='🚨')
+    st.stop()
+
+st.subheader('🏆 Leaderboard')
+rows = []
+for trial in response['data']['items']:
+    row = {'trial': trial['trial'], 'id': trial['id'], 'status': trial['run']['status']}
+    row.update(trial['params'])
+    if 'result' in trial:
+        row['accuracy'] = trial['result'][dataset]['accuracy']
+        row['precision'] = trial['result'][dataset]['precision']['macro']
+        row['recall'] = trial['result'][dataset]['recall']['macro']
+    row['duration'] = trial['run'].get('dur')
+    rows.append(row)
+
+st.dataframe(rows, use_container_width=True, hide_index=True)
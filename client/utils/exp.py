@@ -1,54 +1,35 @@
+import pandas as pd
 
 
-# Classify experiments by their status
-def experiment_classify(exps):
+
+
+# Get the best done experiment by their metrics: accuracy/precision/recall/duration
+def experiment_best(sender, criterion='accuracy', train=True, reverse=True):
+    
+    response = sender.experiment_list(
+        status='done',
+        sort_by=criterion,
+        dataset='train' if train else 'valid',
+        order='desc' if reverse else 'asc',
+        limit=1
+    )
     
-    classified_exps = {
-        'created': [],
-        'running': [],
-        'done': []
-    }
+    if not response['success'] or len(response['data']['items']) == 0:
+        return None
     
-    for exp in exps.values():
-        if exp['run']['status'] == 'create':
-            classified_exps['created'].append(exp)
-        elif exp['run']['status'] in ['train', 'eval']:
-             classified_exps['running'].append(exp)
-        elif exp['run']['status'] == 'done':
-            classified_exps['done'].append(exp)
-        else:
-            pass
-        
-    return classified_exps
+    return response['data']['items'][0]
 
 
-# Sort their experiment by their metrics: accuracy/precision/recall/duration
-def experiment_sort(classified_exps, criterion='accuracy', train=True, reverse=True):
-    
-    # Get done experiments only
-    done_exps = classified_exps['done']
+
+# One column per experiment of a downsampled metrics series, indexed by step
+def metrics_frame(items, field='loss'):
     
-    if len(done_exps) == 0:
-        return done_exps
+    columns = []
+    for item in items:
+        series = item['series'][field]
+        columns.append(pd.Series(series['value'], index=series['step'], name=item['id'], dtype=float))
     
-    if criterion == 'duration':
-            return sorted(done_exps, key=lambda item: item['run']['dur'], reverse=reverse)
+    if not columns:
+        return pd.DataFrame()
     
-    if train:
-        if criterion == 'accuracy':
-            return sorted(done_exps, key=lambda item: item['result']['train']['accuracy'], reverse=reverse)
-        elif criterion == 'precision':
-            return sorted(done_exps, key=lambda item: item['result']['train']['precision']['macro'], reverse=reverse)
-        elif criterion == 'recall':
-            return sorted(done_exps, key=lambda item: item['result']['train']['recall']['macro'], reverse=reverse)
-        else:
-            return done_exps
-    else:
-        if criterion == 'accuracy':
-            return sorted(done_exps, key=lambda item: item['result']['valid']['accuracy'], reverse=reverse)
-        elif criterion == 'precision':
-            return sorted(done_exps, key=lambda item: item['result']['valid']['precision']['macro'], reverse=reverse)
-        elif criterion == 'recall':
-            return sorted(done_exps, key=lambda item: item['result']['valid']['recall']['macro'], reverse=reverse)
-        else:
-            return done_exps
\ No newline at end of file
+    return pd.concat(columns, axis=1).sort_index()
@@ -3,7 +3,8 @@
 def get_current_progress(
     curr_epoch, 
     total_epoch, 
-    status
+    status,
+    position=None
 ):
     if status == 'create':
         progress = 0.0
@@ -11,6 +12,12 @@ def get_current_progress(
         
         return progress, text
     
+    elif status == 'queued':
+        progress = 0.0
+        text = '[0%] Queued at position {}...'.format(position) if position else '[0%] Queued...'
+        
+        return progress, text
+    
     elif status == 'train':
         progress = curr_epoch / total_epoch * 0.8
         text = '[{:.0f}%] [{}/{}] Training...'.format(progress * 100, curr_epoch, total_epoch)
@@ -23,6 +30,12 @@ def get_current_progress(
     elif status == 'done':
         return 1.0, '[100%] Done!'
     
+    elif status == 'stopped':
+        return 1.0, '[100%] Stopped early!'
+    
+    elif status == 'failed':
+        return 0.0, '[0%] Failed!'
+    
     else:
         return None, None
     
\ No newline at end of file
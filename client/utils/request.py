@@ -1,9 +1,15 @@
 import json
 import requests
+from collections import OrderedDict
 
 
 # Operate request to backend
 class RequestSender:
+    
+    # Responses cached by url, revalidated with ETag (shared by all reruns)
+    cache = OrderedDict()
+    cache_size = 256
+    
     def __init__(self, host):
         self.host = host
     
@@ -33,15 +39,42 @@ class RequestSender:
         return data
     
     
-    # List
-    def experiment_list(self):
+    # Shapes and parameter counts of a model, checked on the server without building it
+    def experiment_validate(self, model_configs):
+        url = self.get_url('/exp/validate')
+        headers = { "Content-Type": "application/json" }
+        
+        response = requests.post(
+            url=url, 
+            data=json.dumps({'model': model_configs}), 
+            headers=headers
+        )
+        
+        data = json.loads(response.text)
+        return data
+    
+
+    # List (status, sort_by, dataset, order, limit, cursor)
+    def experiment_list(self, **params):
         # Prepare url and header
         url = self.get_url('/exp/list')
         
-        # Send request
-        response = requests.get(url=url)
+        # Send request, reuse cached data when server says nothing changed
+        key = requests.Request('GET', url, params=params).prepare().url
+        cached = self.cache.get(key)
+        headers = { "If-None-Match": cached[0] } if cached else {}
+        
+        response = requests.get(url=url, params=params, headers=headers)
+        if response.status_code == 304 and cached:
+            self.cache.move_to_end(key)
+            return cached[1]
         
         data = json.loads(response.text)
+        if 'ETag' in response.headers and data['success']:
+            self.cache[key] = (response.headers['ETag'], data)
+            self.cache.move_to_end(key)
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
         return data
     
     
@@ -67,6 +100,28 @@ class RequestSender:
         return data
     
 
+    # Resume a failed experiment from its last checkpoint
+    def experiment_resume(self, exp_id):
+        # Prepare url and header
+        url = self.get_url('/exp/resume')
+        headers = { "Content-Type": "application/json" }
+        
+        # Prepare data
+        json_data = json.dumps({
+            'id': exp_id
+        })
+        
+        # Send request
+        response = requests.post(
+            url=url, 
+            data=json_data, 
+            headers=headers
+        )
+        
+        data = json.loads(response.text)
+        return data
+    
+
     # Info
     def experiment_info(self, exp_id):
         # Prepare url and header
@@ -89,6 +144,104 @@ class RequestSender:
         return data
     
     
+    # Events (server-sent), yields (event, data) until the stream closes
+    def experiment_events(self, exp_id, timeout=60):
+        # Prepare url
+        url = self.get_url('/exp/{}/events'.format(exp_id))
+        
+        # Open stream
+        with requests.get(url=url, stream=True, timeout=timeout) as response:
+            if response.status_code != 200:
+                return
+            
+            event, data = None, []
+            for line in response.iter_lines(decode_unicode=True):
+                if line is None or line.startswith(':'):
+                    continue
+                
+                # Blank line terminates an event
+                if line == '':
+                    if event is not None:
+                        yield event, json.loads('\n'.join(data))
+                    event, data = None, []
+                    
+                elif line.startswith('event:'):
+                    event = line[len('event:'):].strip()
+                elif line.startswith('data:'):
+                    data.append(line[len('data:'):].strip())
+    
+    
+    # Training curves downsampled by the server
+    def experiment_metrics(self, exp_id, fields='loss', points=300, method='lttb'):
+        # Prepare url and params
+        url = self.get_url('/exp/{}/metrics'.format(exp_id))
+        params = {
+            'fields': fields,
+            'points': points,
+            'method': method
+        }
+        
+        # Send request
+        response = requests.get(url=url, params=params)
+        
+        data = json.loads(response.text)
+        return data
+    
+    
+    # Training curves of several experiments at once
+    def experiment_metrics_compare(self, exp_ids, fields='loss', points=300, method='lttb'):
+        # Prepare url and params
+        url = self.get_url('/exp/metrics')
+        params = {
+            'ids': ','.join(exp_ids),
+            'fields': fields,
+            'points': points,
+            'method': method
+        }
+        
+        # Send request
+        response = requests.get(url=url, params=params)
+        
+        data = json.loads(response.text)
+        return data
+    
+    
+    # Sweeps, newest first
+    def sweep_list(self):
+        # Prepare url
+        url = self.get_url('/sweep/list')
+        
+        # Send request
+        response = requests.get(url=url)
+        
+        data = json.loads(response.text)
+        return data
+    
+    
+    # Sweep spec, trial counts and best trial
+    def sweep_info(self, sweep_id):
+        # Prepare url
+        url = self.get_url('/sweep/{}'.format(sweep_id))
+        
+        # Send request
+        response = requests.get(url=url)
+        
+        data = json.loads(response.text)
+        return data
+    
+    
+    # Trials of a sweep ranked by a metric
+    def sweep_leaderboard(self, sweep_id, **params):
+        # Prepare url
+        url = self.get_url('/sweep/{}/leaderboard'.format(sweep_id))
+        
+        # Send request
+        response = requests.get(url=url, params=params)
+        
+        data = json.loads(response.text)
+        return data
+    
+    
     # Delete
     def experiment_delete(self, exp_id):
         # Prepare url and header
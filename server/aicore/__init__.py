@@ -4,6 +4,18 @@ import torch
 
 from .experiment import *
 from .manage import *
+from .index import *
+from .shape import *
+from .store import *
+from .events import *
+from .dataset import *
+from .metrics import *
+from .checkpoint import *
+from .cohort import *
+from .executor import *
+from .scheduler import *
+from .sweep import *
+from .early_stop import *
 
 def seed(random_seed):
     # Fix the random seed for the random module
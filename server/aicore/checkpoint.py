@@ -0,0 +1,177 @@
+import os
+import copy
+import pickle
+import random
+import inspect
+import threading
+import numpy as np
+from loguru import logger
+
+import torch
+
+
+# Checkpoint files of an experiment directory
+BEST_CHECKPOINT = 'best.pth'  # Model weights with the lowest epoch loss
+LAST_CHECKPOINT = 'last.pth'  # Full training state of the last completed epoch
+QUANTIZED_CHECKPOINT = 'best.int8.pt' # TorchScript int8 copy of the best model
+
+
+# Copy of a (nested) state detached from live parameters and optimizer buffers
+def snapshot_state(state):
+    if isinstance(state, torch.Tensor):
+        return state.detach().clone()
+    if isinstance(state, dict):
+        return {key: snapshot_state(value) for key, value in state.items()}
+    if isinstance(state, (list, tuple)):
+        return type(state)(snapshot_state(value) for value in state)
+    return copy.deepcopy(state)
+
+
+# Keep the best state in memory and persist it from a background thread
+class CheckpointWriter:
+    def __init__(self, path, retain=True):
+        self.path = path
+        self.retain = retain
+        self.best_state = None
+
+        self.condition = threading.Condition()
+        self.pending = None   # Latest snapshot not written yet
+        self.writing = False
+        self.closed = False
+        self.error = None
+        self.thread = None
+
+
+    # Retain a snapshot and queue it for writing, older pending snapshots are skipped
+    def save(self, state_dict):
+        state = snapshot_state(state_dict)
+
+        with self.condition:
+            if self.error is not None:
+                raise self.error
+
+            if self.retain:
+                self.best_state = state
+            self.pending = state
+
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.work, name='checkpoint-writer', daemon=True)
+                self.thread.start()
+            self.condition.notify()
+
+
+    # Block until every queued snapshot is on disk
+    def wait(self):
+        with self.condition:
+            while self.pending is not None or self.writing:
+                self.condition.wait()
+
+            if self.error is not None:
+                raise self.error
+
+
+    # Finish queued writes and stop the thread, errors are reported by wait()
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+
+    def work(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closed:
+                    self.condition.wait()
+
+                if self.pending is None:
+                    return
+
+                state, self.pending = self.pending, None
+                self.writing = True
+
+            try:
+                write_atomic(state, self.path)
+            except Exception as e:
+                logger.exception('[Checkpoint] Failed to write {}'.format(self.path))
+                with self.condition:
+                    self.error = e
+
+            with self.condition:
+                self.writing = False
+                self.condition.notify_all()
+
+
+# Write under a temporary name then rename, readers never see a partial file
+def write_atomic(state, path):
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    torch.save(state, tmp_path)
+    os.replace(tmp_path, path)
+
+
+# Random generator states, kept to tensors and plain types so torch.load stays weights-only safe
+def rng_state():
+    version, keys, gauss = random.getstate()
+    name, np_keys, pos, has_gauss, cached_gaussian = np.random.get_state()
+
+    return {
+        'python': [version, list(keys), gauss],
+        'numpy': [name, torch.from_numpy(np_keys.astype(np.int64)), pos, has_gauss, cached_gaussian],
+        'torch': torch.get_rng_state()
+    }
+
+
+def set_rng_state(state):
+    version, keys, gauss = state['python']
+    random.setstate((version, tuple(keys), gauss))
+
+    name, np_keys, pos, has_gauss, cached_gaussian = state['numpy']
+    np.random.set_state((name, np_keys.numpy().astype(np.uint32), pos, has_gauss, cached_gaussian))
+
+    torch.set_rng_state(state['torch'])
+
+
+# Globals a checkpoint may reference: state dict containers and the functions rebuilding tensors
+SAFE_GLOBALS = [
+    ('collections', 'OrderedDict'),
+    ('torch._utils', '_rebuild_tensor_v2'),
+    ('torch._utils', '_rebuild_parameter')
+]
+
+
+# Unpickler refusing any other global, a checkpoint cannot run code when loaded
+class SafeUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        if (module, name) in SAFE_GLOBALS or (module == 'torch' and name.endswith('Storage')):
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError('Checkpoint references {}.{}, which is not allowed'.format(module, name))
+
+
+# pickle_module of torch.load for torch versions without weights_only
+class safe_pickle:
+    Unpickler = SafeUnpickler
+
+    @staticmethod
+    def load(f, **kwargs):
+        return SafeUnpickler(f, **kwargs).load()
+
+
+# Checkpoints may come from remote workers, only tensors and plain containers are loaded
+def load_state(path):
+    if 'weights_only' in inspect.signature(torch.load).parameters:
+        return torch.load(path, weights_only=True)
+    return torch.load(path, pickle_module=safe_pickle)
+
+
+def has_checkpoint(exp_dir):
+    return os.path.exists(os.path.join(exp_dir, LAST_CHECKPOINT))
+
+
+# Full training state of the last completed epoch, None if there is none
+def load_last(exp_dir):
+    if not has_checkpoint(exp_dir):
+        return None
+    return load_state(os.path.join(exp_dir, LAST_CHECKPOINT))
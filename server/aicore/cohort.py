@@ -0,0 +1,195 @@
+import os
+import time
+from loguru import logger
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from .experiment import Experiment
+from .manage import StatusManager
+from .index import hash_configs
+
+
+# Experiments with the same key can be trained on one stream of batches. Compiled models
+# train alone, a cohort runs every member through the eager stacked forward
+def cohort_key(configs):
+    if configs['model'].get('compile', 'eager') != 'eager':
+        return None
+
+    return hash_configs({
+        'data': configs['data'],
+        'batch_size': configs['train']['batch_size']
+    })
+
+
+# Models with identical layer configs, only their weights differ
+def stack_key(configs):
+    return hash_configs(configs['model']['layers'])
+
+
+# Forward of several models with identical layers in one pass, outputs are stacked on a new first dim
+class StackedModels:
+    def __init__(self, models):
+        self.models = models
+
+
+    def __call__(self, images):
+        n_models = len(self.models)
+        x, shared = images, True # Input is the same for every model until the first linear layer
+
+        for index, layer in enumerate(self.models[0].model):
+
+            if isinstance(layer, nn.Linear):
+                linears = [model.model[index] for model in self.models]
+                lead = x.shape[:-1] if shared else x.shape[1:-1]
+
+                # Shared input: one GEMM against the weights of every model side by side
+                if shared:
+                    weight = torch.cat([linear.weight for linear in linears]).t()
+                    bias = torch.cat([linear.bias for linear in linears])
+                    x = torch.addmm(bias, x.reshape(-1, x.shape[-1]), weight)
+                    x = x.view(-1, n_models, layer.out_features).transpose(0, 1)
+                    shared = False
+
+                # Per-model input: one batched GEMM
+                else:
+                    weight = torch.stack([linear.weight for linear in linears]).transpose(1, 2)
+                    bias = torch.stack([linear.bias for linear in linears]).unsqueeze(1)
+                    x = torch.baddbmm(bias, x.reshape(n_models, -1, x.shape[-1]), weight)
+
+                x = x.reshape(n_models, *lead, layer.out_features)
+
+            elif isinstance(layer, nn.Flatten) and not shared:
+                end_dim = layer.end_dim if layer.end_dim < 0 else layer.end_dim + 1
+                x = x.flatten(layer.start_dim + 1, end_dim)
+
+            # Every model draws its own mask
+            elif isinstance(layer, nn.Dropout):
+                if shared:
+                    x = x.unsqueeze(0).expand(n_models, *x.shape)
+                    shared = False
+                x = F.dropout(x, p=layer.p, training=layer.training)
+
+            # Elementwise or last-dim layers, same hyperparameters in every model
+            else:
+                x = layer(x)
+
+        if shared:
+            x = x.unsqueeze(0).expand(n_models, *x.shape)
+        return x
+
+
+# Members trained together, grouped by identical layer configs
+def stack_groups(members):
+    groups = {}
+    for exp in members:
+        groups.setdefault(stack_key(exp.configs), []).append(exp)
+    return list(groups.values())
+
+
+def group_forward(group, images):
+    if len(group) == 1:
+        return [group[0].model(images)]
+    return StackedModels([exp.model for exp in group])(images).unbind(0)
+
+
+# Experiments sharing data config and batch size, trained on the same batches in one slot.
+# Every member keeps its own optimizer, checkpoints, metrics and status.
+class Cohort:
+    def __init__(self, exp_dirs, store=None, events=None):
+        self.exp_ids = [os.path.basename(exp_dir) for exp_dir in exp_dirs]
+        self.members = []
+
+        # A member that cannot be built fails alone
+        for exp_dir in exp_dirs:
+            try:
+                self.members.append(Experiment(exp_dir, store=store, events=events))
+            except Exception as e:
+                logger.exception('[Cohort] Experiment {} could not be built'.format(os.path.basename(exp_dir)))
+                StatusManager(exp_dir, store=store, events=events).fail(repr(e))
+
+
+    def start(self, budget=None):
+        logger.info('[Cohort] Start {} experiments: {}'.format(len(self.members), [exp.exp_id for exp in self.members]))
+
+        try:
+            self.run(budget=budget)
+        finally:
+            for exp in self.members:
+                exp.close()
+
+
+    def run(self, budget=None):
+        if not self.members:
+            return
+
+        logger.info('Start training...')
+        start = time.time()
+        try:
+            for exp in self.members:
+                exp.status.train(budget=budget, cohort=self.exp_ids)
+                exp.trainer.begin()
+
+            self.train()
+        finally:
+            for exp in self.members:
+                if exp.trainer.recorder is not None:
+                    exp.trainer.recorder.close()
+        logger.success('Done after {:.2f}s!'.format(time.time() - start))
+
+        # Evaluation errors, such as a diverged member without a best checkpoint, fail that member only
+        for exp in self.members:
+            try:
+                exp.finish()
+            except Exception as e:
+                logger.exception('[Cohort] Experiment {} failed'.format(exp.exp_id))
+                exp.status.fail(repr(e))
+
+
+    # Shared batches, one backward pass over the sum of the members' independent losses
+    def train(self):
+        leader = self.members[0].trainer
+        active = [exp for exp in self.members if exp.trainer.train_configs['num_epochs'] > 0]
+
+        epoch = 0
+        while active:
+            groups = stack_groups(active)
+            for exp in active:
+                exp.trainer.begin_epoch(epoch)
+
+            for i, (images, labels) in enumerate(leader.train_loader):
+                images = leader.batch_transform(images)
+
+                losses = []
+                for group in groups:
+                    for exp, outputs in zip(group, group_forward(group, images)):
+                        losses.append(exp.trainer.compute_loss(outputs, labels))
+
+                members = [exp for group in groups for exp in group]
+                for exp in members:
+                    exp.trainer.optim.zero_grad()
+                torch.stack(losses).sum().backward()
+                for exp in members:
+                    exp.trainer.optim.step()
+
+                # Members stopped during the epoch leave the cohort
+                loss_values = torch.stack([loss.detach() for loss in losses]).tolist()
+                stopped = [
+                    exp for exp, loss_value in zip(members, loss_values)
+                    if exp.trainer.end_step(epoch, i, loss_value, images.shape[0])
+                ]
+                if stopped:
+                    for exp in stopped:
+                        exp.trainer.end_epoch(epoch)
+                        active.remove(exp)
+                    if not active:
+                        break
+                    groups = stack_groups(active)
+
+            # Members stopped early or at their last epoch leave the cohort
+            for exp in list(active):
+                if exp.trainer.end_epoch(epoch) or epoch + 1 >= exp.trainer.train_configs['num_epochs']:
+                    active.remove(exp)
+
+            epoch += 1
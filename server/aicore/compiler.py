@@ -0,0 +1,115 @@
+import time
+from loguru import logger
+
+import torch
+
+
+# Execution modes of model.compile in experiment configs
+COMPILE_MODES = ['eager', 'script', 'compile']
+
+# Untimed and timed steps of each model when measuring the speedup, TorchScript
+# optimizes a graph only after profiling its first runs
+WARMUP_STEPS = 3
+BENCH_STEPS = 5
+
+
+# Compiled copy of a module sharing its parameters, for training or for inference
+def compile_module(module, mode, train=True):
+    if mode == 'script':
+        scripted = torch.jit.script(module)
+        if train:
+            return scripted
+        # Weights become constants, so elementwise ops and linear layers can be folded and fused
+        return torch.jit.optimize_for_inference(torch.jit.freeze(scripted.eval()))
+
+    elif mode == 'compile':
+        if not hasattr(torch, 'compile'):
+            raise RuntimeError('torch.compile needs torch 2.0, found {}'.format(torch.__version__))
+        return torch.compile(module)
+
+    else:
+        raise ValueError('Compile mode must be one of {}'.format(COMPILE_MODES))
+
+
+# Average seconds of a training step (forward and backward) of a callable
+def time_step(forward, parameters, images, labels, loss_fn, warmup=WARMUP_STEPS, steps=BENCH_STEPS):
+    def step():
+        loss = loss_fn(forward(images), labels)
+        loss.backward()
+        for parameter in parameters:
+            parameter.grad = None
+
+    for _ in range(warmup):
+        step()
+    start = time.perf_counter()
+    for _ in range(steps):
+        step()
+    return (time.perf_counter() - start) / steps
+
+
+# Forward used for training, eager when compilation fails. Returns (forward, info for the status)
+def compile_for_training(model, mode, images, labels, loss_fn):
+    info = {
+        'mode': mode,
+        'compiled': False,
+        'compile_time': None,
+        'eager_step': None,
+        'compiled_step': None,
+        'speedup': None,
+        'error': None
+    }
+    if mode == 'eager':
+        return model, info
+
+    parameters = list(model.parameters())
+    try:
+        # Compilers are lazy, the first step pays for compilation and shows failures
+        start = time.perf_counter()
+        compiled = compile_module(model.model, mode, train=True)
+        loss = loss_fn(compiled(images), labels)
+        loss.backward()
+        for parameter in parameters:
+            parameter.grad = None
+        info['compile_time'] = time.perf_counter() - start
+
+        info['eager_step'] = time_step(model, parameters, images, labels, loss_fn)
+        info['compiled_step'] = time_step(compiled, parameters, images, labels, loss_fn)
+        info['speedup'] = info['eager_step'] / max(info['compiled_step'], 1e-9)
+        info['compiled'] = True
+
+    except Exception as e:
+        logger.warning('Compiling model with {} failed, training runs eager: {}'.format(mode, repr(e)))
+        info['error'] = repr(e)
+        return model, info
+
+    logger.info('Model compiled with {} in {:.2f}s, step {:.2f}ms -> {:.2f}ms ({:.2f}x)'.format(
+        mode, info['compile_time'], info['eager_step'] * 1e3, info['compiled_step'] * 1e3, info['speedup']
+    ))
+    return compiled, info
+
+
+# Forward used for evaluation of the loaded weights, eager when compilation fails
+def compile_for_eval(model, mode, images):
+    info = {
+        'mode': mode,
+        'compiled': False,
+        'compile_time': None,
+        'error': None
+    }
+    if mode == 'eager':
+        return model, info
+
+    try:
+        start = time.perf_counter()
+        compiled = compile_module(model.model, mode, train=False)
+        with torch.inference_mode():
+            compiled(images)
+        info['compile_time'] = time.perf_counter() - start
+        info['compiled'] = True
+
+    except Exception as e:
+        logger.warning('Compiling model with {} failed, evaluation runs eager: {}'.format(mode, repr(e)))
+        info['error'] = repr(e)
+        return model, info
+
+    return compiled, info
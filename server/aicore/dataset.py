@@ -0,0 +1,207 @@
+import os
+import json
+import pathlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from loguru import logger
+
+import torch
+import torch.utils.data as data
+from torchvision import datasets
+
+
+# Default MNIST statistics for the normalize transform
+MNIST_MEAN = 0.1307
+MNIST_STD = 0.3081
+
+
+# Read-only view of a cached dataset handed out to trainers
+class SharedDataset(data.Dataset):
+    def __init__(self, key, dataset):
+        self.key = key
+        self.dataset = dataset
+
+    def __len__(self):
+        return len(self.dataset)
+
+    def __getitem__(self, index):
+        return self.dataset[index]
+
+    # Whole split as (images, labels) tensors, built once for all views
+    def tensors(self):
+        return materialize(self.dataset)
+
+
+# MNIST split stored as contiguous uint8 arrays, opened with np.memmap
+class MemmapDataset(data.Dataset):
+    def __init__(self, root, train=True, download=True):
+        split = 'train' if train else 'test'
+        self.images_path, self.labels_path, meta = prepare_memmap(root, split, download=download)
+
+        # Read-only mappings, pages are shared by every process opening the files
+        self.images = np.memmap(self.images_path, dtype=np.uint8, mode='r', shape=tuple(meta['shape']))
+        self.labels = np.memmap(self.labels_path, dtype=np.uint8, mode='r', shape=(meta['shape'][0],))
+
+    def __len__(self):
+        return self.images.shape[0]
+
+    # Raw uint8 sample (1, H, W), converted per batch by BatchTransform
+    def __getitem__(self, index):
+        return torch.from_numpy(np.array(self.images[index])), int(self.labels[index])
+
+    # Whole split in memory, images stay uint8
+    def tensors(self):
+        return torch.from_numpy(np.array(self.images)), torch.from_numpy(self.labels.astype(np.int64))
+
+
+# Load a dataset into (images, labels) tensors once and cache them on the dataset
+materialize_lock = threading.Lock()
+
+def materialize(dataset):
+    with materialize_lock:
+        if getattr(dataset, 'cached_tensors', None) is None:
+            if hasattr(dataset, 'tensors'):
+                dataset.cached_tensors = dataset.tensors()
+            else:
+                images, labels = zip(*[dataset[i] for i in range(len(dataset))])
+                dataset.cached_tensors = torch.stack(images), torch.tensor(labels, dtype=torch.int64)
+        return dataset.cached_tensors
+
+
+# Batches by slicing in-memory tensors with a shuffled permutation
+class TensorBatchLoader:
+    def __init__(self, dataset, batch_size, shuffle=True):
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.images, self.labels = dataset.tensors()
+
+    def __len__(self):
+        return (len(self.labels) + self.batch_size - 1) // self.batch_size
+
+    def __iter__(self):
+        n_samples = len(self.labels)
+
+        if self.shuffle:
+            order = torch.randperm(n_samples)
+            for start in range(0, n_samples, self.batch_size):
+                index = order[start:start + self.batch_size]
+                yield self.images.index_select(0, index), self.labels.index_select(0, index)
+
+        else:
+            for start in range(0, n_samples, self.batch_size):
+                yield self.images[start:start + self.batch_size], self.labels[start:start + self.batch_size]
+
+
+# Convert the torchvision MNIST split into the memmap format once
+def prepare_memmap(root, split, download=True):
+    memmap_dir = os.path.join(root, 'memmap')
+    images_path = os.path.join(memmap_dir, '{}-images.u8'.format(split))
+    labels_path = os.path.join(memmap_dir, '{}-labels.u8'.format(split))
+    meta_path = os.path.join(memmap_dir, '{}.json'.format(split))
+
+    if not os.path.exists(meta_path):
+        logger.info('[Dataset] Converting MNIST {} split to {}'.format(split, memmap_dir))
+        pathlib.Path(memmap_dir).mkdir(parents=True, exist_ok=True)
+
+        source = datasets.MNIST(root=root, train=(split == 'train'), download=download)
+        images = source.data.numpy().astype(np.uint8)[:, None, :, :] # (N, 1, H, W)
+        labels = source.targets.numpy().astype(np.uint8)
+
+        # Write under unique names then rename, so concurrent converters never see partial files
+        suffix = '.{}.tmp'.format(os.getpid())
+        images.tofile(images_path + suffix)
+        labels.tofile(labels_path + suffix)
+        with open(meta_path + suffix, 'w') as f:
+            json.dump({'shape': list(images.shape)}, f)
+
+        os.replace(images_path + suffix, images_path)
+        os.replace(labels_path + suffix, labels_path)
+        os.replace(meta_path + suffix, meta_path)
+
+    with open(meta_path, 'r') as f:
+        meta = json.load(f)
+    return images_path, labels_path, meta
+
+
+# Vectorized per-batch version of the transform stack for uint8 batches
+class BatchTransform:
+    def __init__(self, transform_configs):
+        self.steps = []
+
+        for transform in transform_configs:
+            if transform['name'] == 'to_tensor':
+                self.steps.append(lambda x: x.float().div_(255.0))
+
+            elif transform['name'] == 'normalize':
+                mean = transform.get('mean', MNIST_MEAN)
+                std = transform.get('std', MNIST_STD)
+                self.steps.append(lambda x, mean=mean, std=std: x.float().sub_(mean).div_(std))
+
+            else:
+                logger.error('Transform "{}" is under development.'.format(transform['name']))
+                raise Exception('Transform "{}" is under development.'.format(transform['name']))
+
+    def __call__(self, images):
+        for step in self.steps:
+            images = step(images)
+        return images
+
+
+# Process-wide dataset cache with reference counting and LRU eviction
+class DatasetRegistry:
+    def __init__(self, capacity=4):
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.entries = OrderedDict() # key -> [dataset, refcount]
+
+
+    # Get a view of the dataset, loading it only if no trainer did before
+    def acquire(self, key, load):
+        with self.lock:
+            if key not in self.entries:
+                logger.info('[Dataset] Loading {}'.format(key))
+                self.entries[key] = [load(), 0]
+
+            entry = self.entries[key]
+            entry[1] += 1
+            self.entries.move_to_end(key)
+            self.evict()
+
+            return SharedDataset(key, entry[0])
+
+
+    def release(self, view):
+        with self.lock:
+            entry = self.entries.get(view.key)
+            if entry is not None:
+                entry[1] = max(entry[1] - 1, 0)
+            self.evict()
+
+
+    # Drop least recently used datasets nobody holds anymore
+    def evict(self):
+        for key in list(self.entries):
+            if len(self.entries) <= self.capacity:
+                break
+
+            if self.entries[key][1] == 0:
+                logger.info('[Dataset] Evicting {}'.format(key))
+                del self.entries[key]
+
+
+# Cache key of a transform stack
+def transforms_key(transform_configs):
+    return json.dumps(transform_configs, sort_keys=True)
+
+
+# Registry shared by every trainer of this process
+registry = DatasetRegistry()
+
+def configure_registry(capacity):
+    registry.capacity = capacity
+    return registry
+
+def get_registry():
+    return registry
@@ -0,0 +1,110 @@
+import os
+import math
+from loguru import logger
+
+from .events import bus
+
+
+EARLY_STOP_METHODS = ['asha']
+
+# Token asking the trainer of an experiment directory to stop after the current epoch
+STOP_FILE = 'stop'
+
+
+def request_stop(exp_dir, epoch=None):
+    with open(os.path.join(exp_dir, STOP_FILE), 'w') as f:
+        f.write(str(epoch or ''))
+
+
+def stop_requested(exp_dir):
+    return os.path.exists(os.path.join(exp_dir, STOP_FILE))
+
+
+def clear_stop(exp_dir):
+    if stop_requested(exp_dir):
+        os.remove(os.path.join(exp_dir, STOP_FILE))
+
+
+# Early stopping spec of a sweep with defaults filled in, raises ValueError when invalid
+def early_stop_policy(spec):
+    if not spec:
+        return None
+    if not isinstance(spec, dict):
+        raise ValueError('Early stopping must be an object')
+
+    policy = {
+        'method': spec.get('method', 'asha'),
+        'min_epoch': spec.get('min_epoch', 1),
+        'eta': spec.get('eta', 3)
+    }
+    if policy['method'] not in EARLY_STOP_METHODS:
+        raise ValueError('Early stopping method must be one of {}'.format(EARLY_STOP_METHODS))
+    if not isinstance(policy['min_epoch'], int) or policy['min_epoch'] < 1:
+        raise ValueError('Early stopping min_epoch must be a positive integer')
+    if not isinstance(policy['eta'], int) or policy['eta'] < 2:
+        raise ValueError('Early stopping eta must be an integer of at least 2')
+    return policy
+
+
+# Epochs trials are compared at: min_epoch * eta^k, the last epoch always runs to the end
+def rung_epochs(min_epoch, eta, num_epochs):
+    rungs = []
+    epoch = min_epoch
+    while epoch < num_epochs:
+        rungs.append(epoch)
+        epoch *= eta
+    return rungs
+
+
+# Asynchronous successive halving: a trial reaching a rung continues only if its loss
+# is in the top 1/eta of the losses recorded at that rung so far
+def asha_stop(value, values, eta):
+    if len(values) < eta:
+        return False
+
+    rank = sum(1 for other in values if other < value)
+    return rank >= max(1, len(values) // eta)
+
+
+# Compare epoch losses of sweep trials at rung epochs and stop the worst ones
+class EarlyStopController:
+    def __init__(self, exp_root, store):
+        self.exp_root = exp_root
+        self.store = store
+
+
+    # Event bus listener, reports arrive from local slots, process slots and remote workers alike
+    def on_event(self, exp_id, event, data):
+        if event != 'report':
+            return
+
+        # A trial of several sweeps is ranked in each of them, and stops when any of them says so
+        stop = False
+        epoch = data['epoch']
+        for sweep_id, spec in self.store.sweeps_of(exp_id):
+            policy = early_stop_policy(spec.get('early_stop'))
+            if policy is None:
+                continue
+            if epoch not in rung_epochs(policy['min_epoch'], policy['eta'], data['num_epochs']):
+                continue
+
+            # Diverged trials rank last
+            loss = data['loss'] if math.isfinite(data['loss']) else math.inf
+            values = self.store.record_rung(sweep_id, epoch, exp_id, loss)
+            if asha_stop(loss, values, policy['eta']):
+                logger.info('[EarlyStop] Stop {} of sweep {} at epoch {}, loss {:.4f} not in top 1/{} of {}'.format(
+                    exp_id, sweep_id, epoch, loss, policy['eta'], len(values)
+                ))
+                stop = True
+
+        if stop:
+            request_stop(os.path.join(self.exp_root, exp_id), epoch)
+
+# Controller shared by the whole server
+controller = None
+
+def configure_early_stop(exp_root, store, events=bus):
+    global controller
+    controller = EarlyStopController(exp_root, store)
+    events.listen(controller.on_event)
+    return controller
@@ -0,0 +1,62 @@
+import queue
+import threading
+from loguru import logger
+from collections import defaultdict
+
+
+# In-process publish/subscribe of experiment events
+class EventBus:
+    def __init__(self, max_queue=1000):
+        self.max_queue = max_queue
+        self.lock = threading.Lock()
+        self.subscribers = defaultdict(set)
+        self.listeners = [] # Callbacks receiving (exp_id, event, data) of every experiment
+
+
+    # Register a listener, returns the queue it will receive (event, data) on
+    def subscribe(self, exp_id):
+        subscription = queue.Queue(maxsize=self.max_queue)
+        with self.lock:
+            self.subscribers[exp_id].add(subscription)
+        return subscription
+
+
+    def unsubscribe(self, exp_id, subscription):
+        with self.lock:
+            self.subscribers[exp_id].discard(subscription)
+            if not self.subscribers[exp_id]:
+                del self.subscribers[exp_id]
+
+
+    # Call back on every event of every experiment, in the publishing thread
+    def listen(self, callback):
+        with self.lock:
+            self.listeners.append(callback)
+
+
+    # Deliver to every listener, drop the oldest event of slow listeners
+    def publish(self, exp_id, event, data):
+        with self.lock:
+            subscriptions = list(self.subscribers.get(exp_id, ()))
+            listeners = list(self.listeners)
+
+        for listener in listeners:
+            try:
+                listener(exp_id, event, data)
+            except Exception:
+                logger.exception('[Events] Listener failed on {} of {}'.format(event, exp_id))
+
+        for subscription in subscriptions:
+            while True:
+                try:
+                    subscription.put_nowait((event, data))
+                    break
+                except queue.Full:
+                    try:
+                        subscription.get_nowait()
+                    except queue.Empty:
+                        pass
+
+
+# Event bus shared by the whole server
+bus = EventBus()
@@ -0,0 +1,272 @@
+import os
+import queue
+import multiprocessing as mp
+from loguru import logger
+
+import torch
+
+from .experiment import Experiment
+from .cohort import Cohort
+from .manage import get_store
+from .events import bus
+
+try:
+    import resource # Unix only
+except ImportError:
+    resource = None
+
+
+# Run experiments inside the calling slot thread
+class ThreadExecutor:
+    def __init__(self, exp_root):
+        self.exp_root = exp_root
+
+
+    # Thread counts and affinity are process-wide here, so slots cannot be pinned apart
+    def run(self, exp_id, resume=False, budget=None):
+        if budget is not None:
+            budget = apply_budget(dict(budget, cores=None))
+
+        exp = Experiment(os.path.join(self.exp_root, exp_id))
+        exp.start(resume=resume, budget=budget)
+
+
+    def run_cohort(self, exp_ids, budget=None):
+        if budget is not None:
+            budget = apply_budget(dict(budget, cores=None))
+
+        cohort = Cohort([os.path.join(self.exp_root, exp_id) for exp_id in exp_ids])
+        cohort.start(budget=budget)
+
+
+# Run every experiment in its own worker process
+class ProcessExecutor:
+    def __init__(self, exp_root, memory_limit=None, cpu_time_limit=None, seed=None, store=None, events=None):
+        self.exp_root = exp_root
+        self.seed = seed # Worker processes start with fresh generators
+        self.limits = {
+            'memory': memory_limit,
+            'cpu_time': cpu_time_limit
+        }
+        self.store = store if store is not None else get_store()
+        self.events = events if events is not None else bus
+
+        # Fork is unsafe in a multi-threaded server
+        self.context = mp.get_context('spawn')
+
+
+    def run(self, exp_id, resume=False, budget=None):
+        self.supervise(
+            run_in_process,
+            (os.path.join(self.exp_root, exp_id), resume, budget),
+            name=exp_id
+        )
+
+
+    def run_cohort(self, exp_ids, budget=None):
+        self.supervise(
+            run_cohort_in_process,
+            ([os.path.join(self.exp_root, exp_id) for exp_id in exp_ids], budget),
+            name='+'.join(exp_ids)
+        )
+
+
+    # Start the worker process and relay its status and events until it exits
+    def supervise(self, target, args, name):
+        channel = self.context.Queue()
+        process = self.context.Process(
+            target=target,
+            args=(channel, self.limits, self.seed) + args,
+            name='exp-{}'.format(name),
+            daemon=True
+        )
+        process.start()
+        logger.info('[Executor] Experiment {} runs in process {}'.format(name, process.pid))
+
+        error = None
+        finished = False
+        while not finished:
+            try:
+                message = channel.get(timeout=1.0)
+            except queue.Empty:
+                if not process.is_alive():
+                    break
+                continue
+
+            finished, error = self.handle(message, error)
+
+        # Messages still in flight after exit
+        while not finished:
+            try:
+                message = channel.get_nowait()
+            except queue.Empty:
+                break
+            finished, error = self.handle(message, error)
+
+        process.join()
+        if error is not None:
+            raise RuntimeError(error)
+        if process.exitcode != 0:
+            raise RuntimeError('Worker process exited with code {}'.format(process.exitcode))
+
+
+    # Apply one message from the worker, returns (finished, error)
+    def handle(self, message, error):
+        kind = message[0]
+
+        if kind in ['store', 'event']:
+            relay(message, self.store, self.events)
+        elif kind == 'error':
+            return True, message[1]
+        elif kind == 'exit':
+            return True, error
+
+        return False, error
+
+
+# Store methods a worker may call through its channel
+RELAY_METHODS = ['insert', 'update', 'put']
+
+# Remote workers only report progress of their leased experiment
+REMOTE_RELAY_METHODS = ['update']
+
+
+# Apply a store write or event forwarded by a worker
+def relay(message, store, events, methods=RELAY_METHODS):
+    kind = message[0]
+
+    if kind == 'store':
+        _, method, args, kwargs = message
+        if method not in methods:
+            raise ValueError('Store method "{}" cannot be relayed'.format(method))
+        getattr(store, method)(*args, **kwargs)
+
+    elif kind == 'event':
+        _, exp_id, event, data = message
+        events.publish(exp_id, event, data)
+
+    else:
+        raise ValueError('Message "{}" cannot be relayed'.format(kind))
+
+
+# Store writes forwarded from a worker process to the server
+class ChannelStore:
+    def __init__(self, channel):
+        self.channel = channel
+
+    def send(self, method, *args, **kwargs):
+        self.channel.put(('store', method, args, kwargs))
+
+    def insert(self, *args, **kwargs):
+        self.send('insert', *args, **kwargs)
+
+    def update(self, *args, **kwargs):
+        self.send('update', *args, **kwargs)
+
+    def put(self, *args, **kwargs):
+        self.send('put', *args, **kwargs)
+
+
+# Events forwarded from a worker process to the server bus
+class ChannelEvents:
+    def __init__(self, channel):
+        self.channel = channel
+
+    def publish(self, exp_id, event, data):
+        self.channel.put(('event', exp_id, event, data))
+
+
+# Resource limits of a worker process
+def apply_limits(limits):
+    if resource is None:
+        return
+
+    if limits.get('memory'):
+        size = int(limits['memory']) * 1024 * 1024 # MB
+        resource.setrlimit(resource.RLIMIT_AS, (size, size))
+
+    if limits.get('cpu_time'):
+        seconds = int(limits['cpu_time'])
+        resource.setrlimit(resource.RLIMIT_CPU, (seconds, seconds))
+
+
+# Same seed as the server process, before any weight is initialized
+def apply_seed(seed):
+    if seed is None:
+        return
+
+    import aicore # Package init imports this module
+    aicore.seed(seed)
+
+
+# Intra-op threads and core set of the calling process, returns what was applied
+def apply_budget(budget):
+    torch.set_num_threads(budget['threads'])
+
+    cores = budget.get('cores')
+    if cores and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+    else:
+        cores = None
+
+    return {
+        'threads': torch.get_num_threads(),
+        'cores': cores
+    }
+
+
+# Worker process entry point
+def run_in_process(channel, limits, seed, exp_dir, resume=False, budget=None):
+    try:
+        apply_limits(limits)
+        apply_seed(seed)
+        if budget is not None:
+            budget = apply_budget(budget)
+
+        exp = Experiment(exp_dir, store=ChannelStore(channel), events=ChannelEvents(channel))
+        exp.start(resume=resume, budget=budget)
+        channel.put(('exit',))
+
+    except BaseException as e:
+        channel.put(('error', repr(e)))
+
+    finally:
+        channel.close()
+        channel.join_thread()
+
+
+def run_cohort_in_process(channel, limits, seed, exp_dirs, budget=None):
+    try:
+        apply_limits(limits)
+        apply_seed(seed)
+        if budget is not None:
+            budget = apply_budget(budget)
+
+        cohort = Cohort(exp_dirs, store=ChannelStore(channel), events=ChannelEvents(channel))
+        cohort.start(budget=budget)
+        channel.put(('exit',))
+
+    except BaseException as e:
+        channel.put(('error', repr(e)))
+
+    finally:
+        channel.close()
+        channel.join_thread()
+
+
+def make_executor(exp_root, executor_configs, seed=None):
+    mode = executor_configs['mode']
+
+    if mode == 'thread':
+        return ThreadExecutor(exp_root)
+
+    elif mode == 'process':
+        return ProcessExecutor(
+            exp_root,
+            memory_limit=executor_configs.get('memory_limit'),
+            cpu_time_limit=executor_configs.get('cpu_time_limit'),
+            seed=seed
+        )
+
+    else:
+        raise Exception('Executor "{}" is unsupported.'.format(mode))
@@ -6,32 +6,35 @@ import pathlib
 from loguru import logger
 
 from .model import ConfiguredModel
+from .shape import validate_layers, shape_error_message
 from .trainer import Trainer
 from .manage import StatusManager
 
 
 class Experiment:
-    def __init__(self, exp_dir):
+    def __init__(self, exp_dir, store=None, events=None):
         
         self.exp_dir = exp_dir
         self.exp_id = os.path.basename(self.exp_dir)
         pathlib.Path(self.exp_dir).mkdir(parents=True, exist_ok=True)
-        self.status = StatusManager(self.exp_dir)
+        self.status = StatusManager(self.exp_dir, store=store, events=events)
         
         # Configs
         self.exp_config_path = os.path.join(self.exp_dir, 'configs.yaml')
         self.load_configs()
         logger.info('Experiment configs: \n{}'.format(pprint.pformat(self.configs)))
         
+        # Check shapes before any weight is allocated
+        self.shapes = validate_layers(self.configs['model']['layers'])
+        if not self.shapes['valid']:
+            raise Exception('Invalid model structure. {}'.format(shape_error_message(self.shapes)))
+        
         # Build model
         logger.info('Building model...')
         start = time.time()
         self.model = ConfiguredModel(self.configs['model'])
         with open(os.path.join(self.exp_dir, 'model.log'), 'w') as f:
             f.write(str(self.model))
-        
-        if not self.model.is_valid():
-            raise Exception('Invalid model structure')
         logger.success('Done after {:.2f}s!'.format(time.time() - start))
         
         # Build trainer
@@ -48,30 +51,67 @@ class Experiment:
     
         
     # Start experiments
-    def start(self):
-        logger.info('Start experiment...')
+    def start(self, resume=False, budget=None):
+        logger.info('Resume experiment...' if resume else 'Start experiment...')
         
+        try:
+            self.run(resume=resume, budget=budget)
+        finally:
+            self.close()
+    
+    
+    # Finish checkpoint writes and give shared datasets back
+    def close(self):
+        self.trainer.checkpoint.close()
+        self.trainer.last_checkpoint.close()
+        self.trainer.release_data()
+    
+    
+    # Train then evaluate, resume continues from the last full-state checkpoint
+    def run(self, resume=False, budget=None):
         # Train model
         logger.info('Start training...')
         start = time.time()
-        self.status.train()
-        self.trainer.train()
+        self.status.train(budget=budget)
+        self.trainer.train(resume=resume)
         logger.success('Done after {:.2f}s!'.format(time.time() - start))
+        
+        self.finish()
+    
     
-        # Evaluate model
+    # Evaluate the best checkpoint and record the final status
+    def finish(self):
         self.status.eval()
         
-        logger.info('Start evaluating on train set')
+        logger.info('Start evaluating on train and valid set')
         start = time.time()
-        train_result = self.trainer.eval(train=True)
+        train_result, valid_result = self.trainer.evaluate()
         logger.success('Done after {:.2f}s!'.format(time.time() - start))
         
-        logger.info('Start evaluating on valid set')
+        # Best checkpoint must be on disk before the experiment is done
+        self.trainer.checkpoint.wait()
+        
+        quantized = self.quantize() if self.configs['train'].get('quantize', False) else None
+        if self.trainer.stopped_at is not None:
+            self.status.stop(self.trainer.stopped_at, train_result, valid_result, quantized=quantized)
+        else:
+            self.status.done(train_result, valid_result, quantized=quantized)
+    
+    
+    # Int8 model is optional, a failure is reported in the result instead of failing the experiment
+    def quantize(self):
+        logger.info('Start quantizing best model')
         start = time.time()
-        valid_result = self.trainer.eval(train=False)
-        logger.success('Done after {:.2f}s!'.format(time.time() - start))
+        try:
+            quantized = self.trainer.quantize()
+        except Exception as e:
+            logger.exception('Quantization failed')
+            return {'error': repr(e)}
         
-        self.status.done(train_result, valid_result)
+        logger.success('Done after {:.2f}s! Valid accuracy {:.2f}% (int8)'.format(
+            time.time() - start, quantized['valid']['accuracy'] * 100
+        ))
+        return quantized
         
     
     # Try the whole training process
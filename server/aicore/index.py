@@ -0,0 +1,27 @@
+import json
+import hashlib
+
+
+# Normalize configs so equal experiments always serialize the same way
+def normalize_configs(configs):
+    if isinstance(configs, dict):
+        return {str(k): normalize_configs(v) for k, v in configs.items()}
+
+    elif isinstance(configs, (list, tuple)):
+        return [normalize_configs(v) for v in configs]
+
+    elif isinstance(configs, float) and configs.is_integer():
+        return int(configs)
+
+    else:
+        return configs
+
+
+# Canonical hash of an experiment configs
+def hash_configs(configs):
+    canonical = json.dumps(
+        normalize_configs(configs),
+        sort_keys=True,
+        separators=(',', ':')
+    )
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
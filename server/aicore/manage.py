@@ -3,87 +3,188 @@ import yaml
 import pathlib
 
 from utils.common import *
+from .store import MetadataStore
+from .events import bus
+
+
+# Metadata store shared by every StatusManager
+store = None
+
+def configure_store(db_path):
+    global store
+    store = MetadataStore(db_path)
+    return store
+
+def get_store():
+    return store
 
 
 class StatusManager:
-    def __init__(self, exp_dir):
+    def __init__(self, exp_dir, store=None, events=None):
         self.exp_dir = exp_dir
         self.exp_id = os.path.basename(self.exp_dir)
-        self.status_path = os.path.join(self.exp_dir, 'status.yaml')
-        
+        self.store = store if store is not None else get_store()
+        self.events = events if events is not None else bus
+        self.started = None
+        self.elapsed = 0.0 # Seconds trained by earlier runs a resumed run continues
+
         pathlib.Path(self.exp_dir).mkdir(parents=True, exist_ok=True)
-    
-    
+
+
     def __call__(self):
-        data = self.read()
-        return data['run']['status']
-    
-    
+        return self.store.get_status(self.exp_id)
+
+
     def read(self):
-        with open(self.status_path, 'r') as f:
-            data = yaml.full_load(f)
-        return data
-    
-    
+        return self.store.get(self.exp_id)
+
+
     def write(self, data):
-        with open(self.status_path, 'w') as f:
-            yaml.dump(data, f)        
-    
-     
+        self.store.put(self.exp_id, data)
+
+
+    # Notify listeners of this experiment
+    def publish(self, event, data):
+        self.events.publish(self.exp_id, event, data)
+
+
+    # Persist changes then notify listeners
+    def patch(self, event, run=None, result=None):
+        self.store.update(self.exp_id, run=run, result=result)
+        self.publish(event, {'run': run, 'result': result})
+
+
     def create(self):
-        
-        data = {}
-        data['id'] = self.exp_id
-        data['run'] = {}
-        data['run']['status'] = 'create'
-        data['run']['create'] = get_current_timestring()
-        
-        self.write(data)
-    
-        
-    def train(self):
-        
-        data = self.read()
-        
-        data['run']['status'] = 'train'
-        data['run']['start'] = get_current_timestring()
-        
-        self.write(data)
-    
-        
+
+        with open(os.path.join(self.exp_dir, 'configs.yaml'), 'r') as f:
+            configs = yaml.full_load(f)
+
+        run = {}
+        run['status'] = 'create'
+        run['create'] = get_current_timestring()
+
+        self.store.insert(self.exp_id, configs, run)
+        self.publish('status', {'run': run, 'result': None})
+
+
+    def queue(self):
+
+        run = {}
+        run['status'] = 'queued'
+        run['queue'] = get_current_timestring()
+
+        self.patch('status', run=run)
+
+
+    def train(self, budget=None, cohort=None):
+
+        self.started = get_current_timestring()
+
+        run = {}
+        run['status'] = 'train'
+        run['start'] = self.started
+        run['budget'] = budget # Threads and cores the run was given
+        run['cohort'] = cohort # Experiments trained on the same batches
+        run['error'] = None # Clear error of a previous failed run
+        run['resumed_from'] = None
+        run['stopped_at'] = None
+        run['compile'] = None
+        run['compile_eval'] = None
+
+        self.patch('status', run=run)
+
+
+    # Training continues after the given number of completed epochs
+    def resume(self, epoch, elapsed=0.0):
+
+        self.elapsed = elapsed
+
+        run = {}
+        run['resumed_from'] = epoch
+
+        self.patch('status', run=run)
+
+
+    # Compile time and speedup of the model, for training or for evaluation
+    def compiled(self, info, eval=False):
+
+        run = {}
+        run['compile_eval' if eval else 'compile'] = info
+
+        self.patch('status', run=run)
+
+
     def update(self, epoch, loss):
-        
-        data = self.read()
-        
-        data['run']['curr_epoch'] = epoch
-        data['run']['best_lost'] = loss
-        
-        self.write(data)
-        
-    
+
+        run = {}
+        run['curr_epoch'] = epoch
+        run['best_lost'] = loss
+
+        self.patch('epoch', run=run)
+
+
+    # Loss of a completed epoch, compared between trials by early stopping
+    def report(self, epoch, num_epochs, loss):
+        self.publish('report', {
+            'epoch': epoch,
+            'num_epochs': num_epochs,
+            'loss': loss
+        })
+
+
+    # Seconds of training up to the given time, summed over every run of a resumed experiment
+    def training_time(self, now=None):
+        if self.started is None:
+            return self.elapsed
+        return self.elapsed + calculate_duration(self.started, now or get_current_timestring()).total_seconds()
+
+
     def eval(self):
-        
-        data = self.read()
-        
-        data['run']['status'] = 'eval'
-        data['run']['end'] = get_current_timestring()
-        data['run']['dur'] = calculate_duration(
-            data['run']['start'],
-            data['run']['end']
-        ).total_seconds()
-        
-        self.write(data)
-    
-     
-    def done(self, train_result, valid_result):
-        
-        data = self.read()
-        
-        data['run']['status'] = 'done'
-
-        data['result'] = {}
-        data['result']['train'] = train_result
-        data['result']['valid'] = valid_result
-        
-        self.write(data)
-        
\ No newline at end of file
+
+        if self.started is None:
+            self.started = self.read()['run']['start']
+
+        run = {}
+        run['status'] = 'eval'
+        run['end'] = get_current_timestring()
+        run['dur'] = self.training_time(run['end'])
+
+        self.patch('status', run=run)
+
+
+    def done(self, train_result, valid_result, quantized=None):
+
+        run = {}
+        run['status'] = 'done'
+
+        result = {}
+        result['train'] = train_result
+        result['valid'] = valid_result
+        result['quantized'] = quantized # Results of the int8 model, when requested
+
+        self.patch('status', run=run, result=result)
+
+
+    # Terminated early, results are those of the best checkpoint so far
+    def stop(self, epoch, train_result, valid_result, quantized=None):
+
+        run = {}
+        run['status'] = 'stopped'
+        run['stopped_at'] = epoch
+
+        result = {}
+        result['train'] = train_result
+        result['valid'] = valid_result
+        result['quantized'] = quantized
+
+        self.patch('status', run=run, result=result)
+
+
+    def fail(self, message):
+
+        run = {}
+        run['status'] = 'failed'
+        run['error'] = message
+        run['end'] = get_current_timestring()
+
+        self.patch('status', run=run)
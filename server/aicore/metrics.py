@@ -0,0 +1,240 @@
+import os
+import time
+import numpy as np
+import torch
+
+
+# Classification metrics accumulated batch by batch in a confusion matrix
+class ConfusionMatrix:
+    def __init__(self, n_classes=10):
+        self.n_classes = n_classes
+        self.matrix = torch.zeros(n_classes, n_classes, dtype=torch.int64) # [true, predicted]
+
+
+    # Count one batch of labels and predictions
+    def update(self, labels, predicted):
+        index = labels.view(-1).long() * self.n_classes + predicted.view(-1).long()
+        self.matrix += torch.bincount(index.cpu(), minlength=self.n_classes ** 2).view(self.n_classes, self.n_classes)
+
+
+    # Add counts of another accumulator of the same classes
+    def merge(self, other):
+        self.matrix += other.matrix
+        return self
+
+
+    def total(self):
+        return int(self.matrix.sum())
+
+
+    # Accuracy, micro/macro precision, recall and F1 and per-class stats
+    def compute(self):
+        matrix = self.matrix.double()
+        true_positive = matrix.diag()
+        support = matrix.sum(dim=1)   # Samples of each true class
+        predicted = matrix.sum(dim=0) # Samples predicted as each class
+        total = matrix.sum()
+
+        precision = safe_divide(true_positive, predicted)
+        recall = safe_divide(true_positive, support)
+        f1 = safe_divide(2 * precision * recall, precision + recall)
+
+        # Macro averages only cover classes seen in labels or predictions
+        present = (support + predicted) > 0
+        n_present = max(int(present.sum()), 1)
+
+        # Single-label classification: micro precision, recall and F1 equal accuracy
+        accuracy = float(true_positive.sum() / total) if total > 0 else 0.0
+
+        return {
+            'accuracy': accuracy,
+            'precision': {
+                'micro': accuracy,
+                'macro': float(precision[present].sum()) / n_present
+            },
+            'recall': {
+                'micro': accuracy,
+                'macro': float(recall[present].sum()) / n_present
+            },
+            'f1': {
+                'micro': accuracy,
+                'macro': float(f1[present].sum()) / n_present
+            },
+            'per_class': [
+                {
+                    'precision': float(precision[c]),
+                    'recall': float(recall[c]),
+                    'f1': float(f1[c]),
+                    'support': int(support[c])
+                }
+                for c in range(self.n_classes)
+            ]
+        }
+
+
+# Element-wise division with 0 where the denominator is 0
+def safe_divide(numerator, denominator):
+    return torch.where(denominator > 0, numerator / denominator.clamp(min=1e-12), torch.zeros_like(numerator))
+
+
+# One training step in the per-experiment metrics file (little-endian, fixed size)
+STEP_DTYPE = np.dtype([
+    ('step', '<i8'),            # Global step, 1-based
+    ('epoch', '<i4'),           # 1-based
+    ('loss', '<f4'),
+    ('lr', '<f4'),
+    ('samples_per_sec', '<f4'),
+    ('wall_time', '<f8')        # Unix time of the end of the step
+])
+
+METRICS_FILE = 'metrics.bin'
+
+
+# Per-step training metrics kept in a preallocated ring buffer, appended to disk in chunks
+class MetricsRecorder:
+    def __init__(self, exp_dir, capacity=1024, flush_every=5.0, start_step=0):
+        self.path = os.path.join(exp_dir, METRICS_FILE)
+        self.capacity = capacity
+        self.flush_every = flush_every # Seconds
+
+        self.buffer = np.zeros(capacity, dtype=STEP_DTYPE)
+        self.head = 0     # Next slot to write
+        self.pending = 0  # Rows not yet on disk
+        self.last_flush = time.time()
+
+        # A new run starts a new file, a resumed one drops steps recorded after its checkpoint
+        if os.path.exists(self.path):
+            if start_step == 0:
+                os.remove(self.path)
+            else:
+                n_rows = int(np.count_nonzero(read_metrics(exp_dir)['step'] <= start_step))
+                os.truncate(self.path, n_rows * STEP_DTYPE.itemsize)
+
+
+    def record(self, step, epoch, loss, lr, samples_per_sec):
+        self.buffer[self.head] = (step, epoch, loss, lr, samples_per_sec, time.time())
+        self.head = (self.head + 1) % self.capacity
+        self.pending += 1
+
+        if self.pending == self.capacity or time.time() - self.last_flush >= self.flush_every:
+            self.flush()
+
+
+    # Rows still in the buffer, oldest first
+    def recent(self, n=None):
+        n = self.capacity if n is None else min(n, self.capacity)
+        index = np.arange(self.head - n, self.head) % self.capacity
+        rows = self.buffer[index]
+        return rows[rows['step'] > 0]
+
+
+    # Append pending rows to the metrics file
+    def flush(self):
+        if self.pending > 0:
+            index = np.arange(self.head - self.pending, self.head) % self.capacity
+            with open(self.path, 'ab') as f:
+                f.write(self.buffer[index].tobytes())
+            self.pending = 0
+        self.last_flush = time.time()
+
+
+    def close(self):
+        self.flush()
+
+
+# Recorded steps of an experiment as a numpy structured array
+def read_metrics(exp_dir):
+    path = os.path.join(exp_dir, METRICS_FILE)
+    if not os.path.exists(path):
+        return np.zeros(0, dtype=STEP_DTYPE)
+
+    # Ignore a partially written last row
+    n_rows = os.path.getsize(path) // STEP_DTYPE.itemsize
+    return np.fromfile(path, dtype=STEP_DTYPE, count=n_rows)
+
+
+# Series that can be requested from the metrics file, plotted against step
+METRIC_FIELDS = ['epoch', 'loss', 'lr', 'samples_per_sec', 'wall_time']
+DOWNSAMPLE_METHODS = ['lttb', 'minmax']
+
+
+# Indices of at most n_points samples keeping the visual shape of y(x)
+def downsample(x, y, n_points, method='lttb'):
+    n_samples = len(x)
+    if n_samples <= n_points:
+        return np.arange(n_samples)
+
+    if method == 'lttb':
+        return lttb(x, y, n_points)
+    elif method == 'minmax':
+        return minmax(y, n_points)
+    else:
+        raise ValueError('Downsample method "{}" is unsupported'.format(method))
+
+
+# Largest-Triangle-Three-Buckets: first, last and the most significant point of each bucket
+def lttb(x, y, n_points):
+    n_samples = len(x)
+    if n_points < 3:
+        return np.array([0, n_samples - 1])[:n_points]
+
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    bucket = (n_samples - 2) / (n_points - 2)
+
+    index = np.zeros(n_points, dtype=np.int64)
+    index[-1] = n_samples - 1
+    selected = 0
+
+    for i in range(n_points - 2):
+        start = int(i * bucket) + 1
+        end = int((i + 1) * bucket) + 1
+
+        # Average of the next bucket (the last point for the final bucket)
+        next_start = end
+        next_end = min(int((i + 2) * bucket) + 1, n_samples)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Point forming the largest triangle with the previous selection and that average
+        area = np.abs(
+            (x[selected] - avg_x) * (y[start:end] - y[selected]) -
+            (x[selected] - x[start:end]) * (avg_y - y[selected])
+        )
+        selected = start + int(np.argmax(area))
+        index[i + 1] = selected
+
+    return index
+
+
+# First, last, and the minimum and maximum of each bucket in between, keeps spikes that averaging would hide
+def minmax(y, n_points):
+    n_samples = len(y)
+    index = [0, n_samples - 1]
+
+    n_buckets = (n_points - 2) // 2
+    if n_buckets > 0:
+        for bucket in np.array_split(np.arange(1, n_samples - 1), n_buckets):
+            values = y[bucket]
+            index.append(bucket[np.argmin(values)])
+            index.append(bucket[np.argmax(values)])
+
+    return np.unique(index)
+
+
+# Downsampled training series of an experiment, as JSON-ready lists
+def metrics_series(exp_dir, fields, n_points, method='lttb'):
+    rows = read_metrics(exp_dir)
+    series = {}
+
+    for field in fields:
+        index = downsample(rows['step'], rows[field], n_points, method=method)
+        series[field] = {
+            'step': rows['step'][index].tolist(),
+            'value': [value if np.isfinite(value) else None for value in rows[field][index].tolist()]
+        }
+
+    return {
+        'total': len(rows),
+        'series': series
+    }
@@ -6,6 +6,8 @@ import torch.nn as nn
 import torch.optim as optim
 from torchvision import datasets, transforms
 
+from .shape import validate_layers, shape_error_message
+
 
 # Define the model based on configuration
 class ConfiguredModel(nn.Module):
@@ -32,8 +34,8 @@ class ConfiguredModel(nn.Module):
             if layer['name'] == 'linear':
                 layer_list.append(
                     nn.Linear(
-                        layer['in_shape'], 
-                        layer['out_shape']
+                        int(layer['in_shape']), 
+                        int(layer['out_shape'])
                     )
                 )
                 
@@ -87,38 +89,22 @@ class ConfiguredModel(nn.Module):
             
             else:
                 logger.error("Layer type {} unsupported.".format(layer['name']))
-                # raise Exception("Layer type {} unsupported.".format(layer['name']))
-                pass
+                raise Exception("Layer type {} unsupported.".format(layer['name']))
             
         return layer_list
     
     def forward(self, x):
         return self.model(x)
     
-    # Validate whether the model structure is valid or not
+    # Validate whether the model structure is valid or not, from the layer configs alone
     def is_valid(self):
         
-        batch_size  = 32
-        image_shape = (1, 28, 28) # (channel, height, width)
-        n_classes   = 10
-        
-        # Create fake batch of image
-        test_batch = torch.rand(batch_size, *image_shape)
-        
-        # Try forward
-        try:
-            with torch.no_grad():
-                output = self.forward(test_batch)
-                if output.shape == torch.Size([batch_size, n_classes]):
-                    logger.success('Valid model structure.')
-                    return True
-                else:
-                    logger.error('Invalid model structure. Invalid output shape {}.'.format(output.shape))
-                    return False
-                
-        except:
-            logger.error('Invalid model structure. Forward exception.')
-            return False
+        report = validate_layers(self.model_configs['layers'])
+        if report['valid']:
+            logger.success('Valid model structure.')
+        else:
+            logger.error('Invalid model structure. {}'.format(shape_error_message(report)))
+        return report['valid']
         
 
 if __name__ == '__main__':
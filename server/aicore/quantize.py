@@ -0,0 +1,37 @@
+import os
+import copy
+import time
+
+import torch
+import torch.nn as nn
+
+
+# Timed forward passes when comparing fp32 and int8 latency
+BENCH_STEPS = 5
+
+
+# Int8 copy of a module, weights of linear layers quantized ahead of time, activations on the fly
+def quantize_linear(module):
+    module = copy.deepcopy(module).eval()
+    return torch.ao.quantization.quantize_dynamic(module, {nn.Linear}, dtype=torch.qint8)
+
+
+# Standalone TorchScript artifact, loadable with torch.jit.load without this code base
+def save_quantized(module, path):
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    torch.jit.save(torch.jit.script(module), tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_quantized(path):
+    return torch.jit.load(path)
+
+
+# Average seconds of a forward pass on the given batch
+def time_forward(module, images, steps=BENCH_STEPS):
+    with torch.inference_mode():
+        module(images) # Warm up
+        start = time.perf_counter()
+        for _ in range(steps):
+            module(images)
+    return (time.perf_counter() - start) / steps
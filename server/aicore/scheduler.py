@@ -0,0 +1,222 @@
+import os
+import time
+import threading
+from loguru import logger
+
+from utils.common import get_current_timestring
+from .manage import StatusManager, get_store
+from .store import STATUS_GROUPS
+from .executor import ThreadExecutor
+from .early_stop import clear_stop
+from .cohort import cohort_key
+
+
+# FIFO job queue drained by a fixed number of training slots
+class Scheduler:
+    def __init__(self, exp_root, slots, executor=None, store=None, threads=None, pin_cores=False, lease_timeout=30,
+                 cohort_size=1):
+        self.exp_root = exp_root
+        self.slots = slots
+        self.executor = executor if executor is not None else ThreadExecutor(exp_root)
+        self.store = store if store is not None else get_store()
+
+        self.condition = threading.Condition()
+        self.running = {} # exp_id -> slot index
+        self.workers = []
+        self.budgets = thread_budgets(slots, threads=threads, pin_cores=pin_cores)
+        self.lease_timeout = lease_timeout # Seconds without heartbeat before a remote job is re-queued
+        self.cohort_size = cohort_size # Fresh experiments sharing data and batch size trained together in a slot
+
+
+    # Spawn slot workers, they pick up jobs persisted by a previous run first
+    def start(self):
+        logger.info('[Scheduler] Starting {} training slots, {} threads each'.format(
+            self.slots, self.budgets[0]['threads'] if self.budgets else 0
+        ))
+        for slot in range(self.slots):
+            worker = threading.Thread(target=self.work, args=(slot,), daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+        reaper = threading.Thread(target=self.reap_loop, daemon=True)
+        reaper.start()
+        self.workers.append(reaper)
+        return self
+
+
+    # Queue an experiment, returns its 1-based position
+    def submit(self, exp_id, resume=False):
+        clear_stop(os.path.join(self.exp_root, exp_id)) # A stop of an earlier run does not carry over
+        StatusManager(os.path.join(self.exp_root, exp_id), store=self.store).queue()
+
+        with self.condition:
+            cohort = cohort_key(self.store.get_configs(exp_id)) if self.cohort_size > 1 and not resume else None
+            self.store.enqueue(exp_id, get_current_timestring(), resume=resume, cohort=cohort)
+            self.condition.notify()
+
+        position = self.store.queue_position(exp_id)
+        logger.info('[Scheduler] Experiment {} queued at position {}'.format(exp_id, position))
+        return position
+
+
+    # Re-queue experiments left queued or running by a previous server process, call before start()
+    def recover(self):
+        queued = set(self.store.queued(limit=self.store.queue_depth()))
+        leased = self.store.leases() # Remote workers keep running, expired leases are reaped
+
+        for exp_id in self.store.ids_by_status(STATUS_GROUPS['running']):
+            if exp_id in queued or exp_id in leased:
+                continue
+
+            logger.info('[Scheduler] Recovering experiment {}'.format(exp_id))
+            self.submit(exp_id, resume=True)
+
+
+    def position(self, exp_id):
+        return self.store.queue_position(exp_id)
+
+
+    def depth(self):
+        return self.store.queue_depth()
+
+
+    # Current queue and running slots
+    def snapshot(self, limit=50):
+        with self.condition:
+            running = dict(self.running)
+
+        return {
+            'slots': self.slots,
+            'budgets': self.budgets,
+            'running': running,
+            'leased': self.store.leases(),
+            'depth': self.depth(),
+            'queued': self.store.queued(limit=limit)
+        }
+
+
+    # Hand the oldest queued job to a remote worker, returns (exp_id, resume) or None
+    def lease(self, worker):
+        with self.condition:
+            job = self.store.lease(worker, get_current_timestring(), time.time())
+
+        if job is not None:
+            logger.info('[Scheduler] Worker {} leased experiment {}'.format(worker, job[0]))
+        return job
+
+
+    def heartbeat(self, exp_id, worker):
+        return self.store.renew(exp_id, worker, time.time())
+
+
+    # Remote job ended, returns False when the worker had lost its lease
+    def finish(self, exp_id, worker, error=None):
+        if not self.store.release(exp_id, worker):
+            return False
+
+        if error is not None:
+            logger.error('[Scheduler] Experiment {} failed on worker {}'.format(exp_id, worker))
+            StatusManager(os.path.join(self.exp_root, exp_id), store=self.store).fail(error)
+        else:
+            logger.success('[Scheduler] Experiment {} finished on worker {}'.format(exp_id, worker))
+        return True
+
+
+    # Re-queue jobs of workers that stopped sending heartbeats
+    def reap(self):
+        for exp_id, worker in self.store.expired_leases(time.time() - self.lease_timeout):
+            if self.store.release(exp_id, worker):
+                logger.warning('[Scheduler] Worker {} lost, re-queue experiment {}'.format(worker, exp_id))
+                self.submit(exp_id, resume=True)
+
+
+    def reap_loop(self):
+        while True:
+            time.sleep(max(self.lease_timeout / 3, 1))
+            try:
+                self.reap()
+            except Exception:
+                logger.exception('[Scheduler] Failed to reap leases')
+
+
+    # Slot loop: wait for a job, run it, repeat
+    def work(self, slot):
+        while True:
+            with self.condition:
+                job = self.store.dequeue(self.cohort_size)
+                while job is None:
+                    self.condition.wait()
+                    job = self.store.dequeue(self.cohort_size)
+                exp_ids, resume = job
+                for exp_id in exp_ids:
+                    self.running[exp_id] = slot
+
+            logger.info('[Scheduler] Slot {} {} experiment {}'.format(slot, 'resumes' if resume else 'runs', ', '.join(exp_ids)))
+            try:
+                if len(exp_ids) > 1:
+                    self.run_cohort(exp_ids, budget=self.budgets[slot])
+                else:
+                    self.run(exp_ids[0], resume=resume, budget=self.budgets[slot])
+                logger.success('[Scheduler] Experiment {} finished'.format(', '.join(exp_ids)))
+
+            except Exception as e:
+                logger.exception('[Scheduler] Experiment {} failed'.format(', '.join(exp_ids)))
+
+                # Cohort members that already finished keep their status
+                for exp_id in exp_ids:
+                    if len(exp_ids) == 1 or self.store.get_status(exp_id) in STATUS_GROUPS['running']:
+                        StatusManager(os.path.join(self.exp_root, exp_id), store=self.store).fail(repr(e))
+
+            finally:
+                with self.condition:
+                    for exp_id in exp_ids:
+                        self.running.pop(exp_id, None)
+
+
+    def run(self, exp_id, resume=False, budget=None):
+        self.executor.run(exp_id, resume=resume, budget=budget)
+
+
+    def run_cohort(self, exp_ids, budget=None):
+        self.executor.run_cohort(exp_ids, budget=budget)
+
+
+# CPUs this process may run on
+def available_cores():
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+# Intra-op threads and optional core set of every slot, cores are split evenly by default
+def thread_budgets(slots, threads=None, pin_cores=False):
+    cores = available_cores()
+    threads = threads or max(len(cores) // max(slots, 1), 1)
+
+    budgets = []
+    for slot in range(slots):
+        budget = {'threads': threads, 'cores': None}
+
+        # Disjoint core sets while there are enough cores, wrap around otherwise
+        if pin_cores:
+            budget['cores'] = [cores[(slot * threads + i) % len(cores)] for i in range(threads)]
+
+        budgets.append(budget)
+    return budgets
+
+
+# Scheduler shared by the whole server
+scheduler = None
+
+def configure_scheduler(exp_root, slots, executor=None, threads=None, pin_cores=False, lease_timeout=30,
+                        cohort_size=1):
+    global scheduler
+    scheduler = Scheduler(
+        exp_root, slots, executor=executor, 
+        threads=threads, pin_cores=pin_cores, lease_timeout=lease_timeout,
+        cohort_size=cohort_size
+    )
+    return scheduler
+
+def get_scheduler():
+    return scheduler
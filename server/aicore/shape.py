@@ -0,0 +1,166 @@
+import copy
+import math
+import threading
+from collections import OrderedDict
+
+from .index import hash_configs
+
+
+# Shape of one MNIST sample (channel, height, width) and number of classes
+INPUT_SHAPE = [1, 28, 28]
+N_CLASSES = 10
+
+# Layers that keep the shape of their input
+SHAPE_PRESERVING = ['relu', 'leaky_relu', 'elu', 'sigmoid', 'log_sigmoid', 'tanh', 'softmax', 'log_softmax']
+
+
+# Invalid layer config, index is the position of the layer in the config
+class ShapeError(Exception):
+    def __init__(self, message, index=None):
+        super().__init__(message)
+        self.message = message
+        self.index = index
+
+
+def positive_int(layer, key):
+    value = layer.get(key)
+    if isinstance(value, float) and value.is_integer():
+        value = int(value) # JSON clients may send 784.0
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ShapeError('"{}" must be a positive integer, got {}'.format(key, value))
+    return value
+
+
+def finite_number(layer, key, default):
+    value = layer.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ShapeError('"{}" must be a number, got {}'.format(key, value))
+    return value
+
+
+# Output shape (without batch dimension) and parameter count of one layer, same rules as ConfiguredModel
+def layer_shape(layer, shape):
+    name = layer.get('name')
+
+    if name == 'linear':
+        in_features = positive_int(layer, 'in_shape')
+        out_features = positive_int(layer, 'out_shape')
+        if not shape or shape[-1] != in_features:
+            raise ShapeError('Linear expects last dimension {}, got input shape {}'.format(in_features, shape))
+        return shape[:-1] + [out_features], in_features * out_features + out_features
+
+    elif name == 'flatten':
+        return [math.prod(shape)], 0
+
+    elif name == 'dropout':
+        prob = layer.get('prob', 0.5)
+        if isinstance(prob, bool) or not isinstance(prob, (int, float)) or not 0 <= prob <= 1:
+            raise ShapeError('Dropout probability must be between 0 and 1, got {}'.format(prob))
+        return shape, 0
+
+    elif name in SHAPE_PRESERVING:
+        if name == 'leaky_relu':
+            finite_number(layer, 'slope', 0.01)
+        elif name == 'elu':
+            finite_number(layer, 'alpha', 1.0)
+        if name in ['softmax', 'log_softmax'] and not shape:
+            raise ShapeError('{} needs at least one dimension'.format(name))
+        return shape, 0
+
+    elif name is None:
+        raise ShapeError('Layer has no name')
+
+    else:
+        raise ShapeError('Layer type {} unsupported.'.format(name))
+
+
+# Every intermediate shape and parameter count of a layers config, without building the network
+def infer_shapes(layers, input_shape=INPUT_SHAPE, n_classes=N_CLASSES):
+    report = {
+        'valid': False,
+        'input_shape': list(input_shape),
+        'output_shape': None,
+        'params': 0,
+        'layers': [],
+        'error': None
+    }
+
+    shape = list(input_shape)
+    try:
+        if not isinstance(layers, list) or not layers:
+            raise ShapeError('Model has no layer')
+
+        for index, layer in enumerate(layers):
+            try:
+                if not isinstance(layer, dict):
+                    raise ShapeError('Layer must be a mapping, got {}'.format(layer))
+                out_shape, params = layer_shape(layer, shape)
+            except ShapeError as e:
+                e.index = index
+                raise
+
+            report['layers'].append({
+                'index': index,
+                'name': layer['name'],
+                'in_shape': shape,
+                'out_shape': out_shape,
+                'params': params
+            })
+            report['params'] += params
+            shape = out_shape
+
+        report['output_shape'] = shape
+        if shape != [n_classes]:
+            raise ShapeError('Output shape must be [{}], got {}'.format(n_classes, shape), index=len(layers) - 1)
+
+    except ShapeError as e:
+        report['error'] = {
+            'index': e.index,
+            'name': layers[e.index].get('name') if e.index is not None and isinstance(layers[e.index], dict) else None,
+            'message': e.message
+        }
+        return report
+
+    report['valid'] = True
+    return report
+
+
+# Error message of a report, with the position of the failing layer
+def shape_error_message(report):
+    error = report['error']
+    if error is None:
+        return None
+    if error['index'] is None:
+        return error['message']
+    return 'Layer {} ({}): {}'.format(error['index'], error['name'], error['message'])
+
+
+# Reports memoized by config hash, shared by every request and experiment
+class ShapeCache:
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.reports = OrderedDict()
+
+
+    def get(self, layers):
+        key = hash_configs(layers)
+
+        with self.lock:
+            if key in self.reports:
+                self.reports.move_to_end(key)
+                return copy.deepcopy(self.reports[key])
+
+        report = infer_shapes(layers)
+
+        with self.lock:
+            self.reports[key] = report
+            while len(self.reports) > self.max_size:
+                self.reports.popitem(last=False)
+        return copy.deepcopy(report)
+
+
+shape_cache = ShapeCache()
+
+def validate_layers(layers):
+    return shape_cache.get(layers)
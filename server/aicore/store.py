@@ -0,0 +1,685 @@
+import os
+import json
+import base64
+import yaml
+import sqlite3
+import pathlib
+import threading
+import contextlib
+from loguru import logger
+
+from .index import hash_configs
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS experiments (
+    id              TEXT PRIMARY KEY,
+    status          TEXT NOT NULL,
+    created         TEXT,
+    dur             REAL,
+    config          TEXT,
+    config_hash     TEXT,
+    run             TEXT NOT NULL DEFAULT '{}',
+    result          TEXT,
+    train_accuracy  REAL,
+    train_precision REAL,
+    train_recall    REAL,
+    valid_accuracy  REAL,
+    valid_precision REAL,
+    valid_recall    REAL,
+    seq             INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_experiments_status ON experiments(status);
+CREATE INDEX IF NOT EXISTS idx_experiments_config_hash ON experiments(config_hash);
+CREATE INDEX IF NOT EXISTS idx_experiments_created ON experiments(created);
+CREATE INDEX IF NOT EXISTS idx_experiments_dur ON experiments(dur);
+CREATE INDEX IF NOT EXISTS idx_experiments_train_accuracy ON experiments(train_accuracy);
+CREATE INDEX IF NOT EXISTS idx_experiments_train_precision ON experiments(train_precision);
+CREATE INDEX IF NOT EXISTS idx_experiments_train_recall ON experiments(train_recall);
+CREATE INDEX IF NOT EXISTS idx_experiments_valid_accuracy ON experiments(valid_accuracy);
+CREATE INDEX IF NOT EXISTS idx_experiments_valid_precision ON experiments(valid_precision);
+CREATE INDEX IF NOT EXISTS idx_experiments_valid_recall ON experiments(valid_recall);
+CREATE INDEX IF NOT EXISTS idx_experiments_seq ON experiments(seq);
+
+CREATE TABLE IF NOT EXISTS tombstones (
+    id  TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tombstones_seq ON tombstones(seq);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    exp_id   TEXT NOT NULL UNIQUE,
+    enqueued TEXT,
+    resume   INTEGER NOT NULL DEFAULT 0,
+    cohort   TEXT
+);
+
+CREATE TABLE IF NOT EXISTS leases (
+    exp_id    TEXT PRIMARY KEY,
+    worker    TEXT NOT NULL,
+    resume    INTEGER NOT NULL DEFAULT 0,
+    leased    TEXT,
+    heartbeat REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sweeps (
+    id      TEXT PRIMARY KEY,
+    created TEXT,
+    spec    TEXT
+);
+
+CREATE TABLE IF NOT EXISTS sweep_trials (
+    sweep_id TEXT NOT NULL,
+    exp_id   TEXT NOT NULL,
+    trial    INTEGER NOT NULL,
+    params   TEXT,
+    PRIMARY KEY (sweep_id, exp_id)
+);
+CREATE INDEX IF NOT EXISTS idx_sweep_trials_exp_id ON sweep_trials(exp_id);
+
+CREATE TABLE IF NOT EXISTS rungs (
+    sweep_id TEXT NOT NULL,
+    rung     INTEGER NOT NULL,
+    exp_id   TEXT NOT NULL,
+    value    REAL NOT NULL,
+    PRIMARY KEY (sweep_id, rung, exp_id)
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('seq', '0');
+'''
+
+# Columns added after the first release of the schema
+UPGRADES = {
+    'experiments': {
+        'seq': 'ALTER TABLE experiments ADD COLUMN seq INTEGER NOT NULL DEFAULT 0'
+    },
+    'jobs': {
+        'resume': 'ALTER TABLE jobs ADD COLUMN resume INTEGER NOT NULL DEFAULT 0',
+        'cohort': 'ALTER TABLE jobs ADD COLUMN cohort TEXT'
+    }
+}
+
+
+# Metric columns denormalized out of the result document
+def result_columns(result):
+    columns = {}
+    for split in ['train', 'valid']:
+        split_result = (result or {}).get(split) or {}
+        columns['{}_accuracy'.format(split)] = split_result.get('accuracy')
+        columns['{}_precision'.format(split)] = (split_result.get('precision') or {}).get('macro')
+        columns['{}_recall'.format(split)] = (split_result.get('recall') or {}).get('macro')
+    return columns
+
+
+# Statuses belonging to each group shown by the client
+STATUS_GROUPS = {
+    'created': ['create'],
+    'running': ['queued', 'train', 'eval'],
+    'done': ['done'],
+    'failed': ['failed'],
+    'stopped': ['stopped']
+}
+
+# Sortable columns
+SORT_COLUMNS = {
+    'created': 'created',
+    'duration': 'dur',
+    'accuracy': '{}_accuracy',
+    'precision': '{}_precision',
+    'recall': '{}_recall'
+}
+
+
+def sort_column(sort_by, dataset='train'):
+    if sort_by not in SORT_COLUMNS:
+        raise ValueError('Unsupported sort criterion "{}"'.format(sort_by))
+    if dataset not in ['train', 'valid']:
+        raise ValueError('Unsupported dataset "{}"'.format(dataset))
+    return SORT_COLUMNS[sort_by].format(dataset)
+
+
+# Expand status groups (created/running/done) into raw statuses
+def expand_statuses(names):
+    statuses = []
+    for name in names:
+        statuses.extend(STATUS_GROUPS.get(name, [name]))
+    return statuses
+
+
+# Opaque pagination cursor
+def encode_cursor(value, exp_id):
+    return base64.urlsafe_b64encode(json.dumps([value, exp_id]).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    try:
+        value, exp_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError('Invalid cursor "{}"'.format(cursor))
+    return value, exp_id
+
+
+# SQLite (WAL) metadata store for experiments
+class MetadataStore:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.local = threading.local()
+        pathlib.Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        conn = self.connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        self.upgrade(conn)
+        conn.executescript(SCHEMA)
+
+
+    # Add missing columns to a database created by an older version
+    def upgrade(self, conn):
+        for table, statements in UPGRADES.items():
+            columns = [row['name'] for row in conn.execute('PRAGMA table_info({})'.format(table))]
+            if not columns:
+                continue
+
+            for column, statement in statements.items():
+                if column not in columns:
+                    logger.info('[Store] Adding column {}.{}'.format(table, column))
+                    conn.execute(statement)
+
+
+    # One connection per thread
+    def connect(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self.local.conn = conn
+        return conn
+
+
+    # Write transaction, lock is taken immediately to avoid upgrade deadlocks
+    @contextlib.contextmanager
+    def transaction(self):
+        conn = self.connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+            conn.execute('COMMIT')
+        except:
+            conn.execute('ROLLBACK')
+            raise
+
+
+    # Bump the change sequence, must be called inside a transaction
+    def next_seq(self, conn):
+        conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'seq'")
+        return int(conn.execute("SELECT value FROM meta WHERE key = 'seq'").fetchone()['value'])
+
+
+    # Latest change sequence
+    def current_seq(self):
+        row = self.connect().execute("SELECT value FROM meta WHERE key = 'seq'").fetchone()
+        return int(row['value'])
+
+
+    # Build a status document (same shape as the legacy status.yaml)
+    def to_status(self, row):
+        data = {}
+        data['id'] = row['id']
+        data['run'] = json.loads(row['run'])
+        if row['result'] is not None:
+            data['result'] = json.loads(row['result'])
+        return data
+
+
+    def insert(self, exp_id, configs, run, result=None):
+        with self.transaction() as conn:
+            self.insert_row(conn, exp_id, configs, run, result)
+
+
+    def insert_row(self, conn, exp_id, configs, run, result=None):
+        columns = result_columns(result)
+        conn.execute(
+            '''INSERT OR REPLACE INTO experiments
+               (id, status, created, dur, config, config_hash, run, result,
+                train_accuracy, train_precision, train_recall,
+                valid_accuracy, valid_precision, valid_recall, seq)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+            (
+                exp_id, run['status'], run.get('create'), run.get('dur'),
+                json.dumps(configs) if configs is not None else None,
+                hash_configs(configs) if configs is not None else None,
+                json.dumps(run),
+                json.dumps(result) if result is not None else None,
+                columns['train_accuracy'], columns['train_precision'], columns['train_recall'],
+                columns['valid_accuracy'], columns['valid_precision'], columns['valid_recall'],
+                self.next_seq(conn)
+            )
+        )
+        conn.execute('DELETE FROM tombstones WHERE id = ?', (exp_id,))
+
+
+    # Merge run fields and/or replace result of an experiment
+    def update(self, exp_id, run=None, result=None):
+        with self.transaction() as conn:
+            conn.execute('UPDATE experiments SET seq = ? WHERE id = ?', (self.next_seq(conn), exp_id))
+            
+            if run:
+                conn.execute(
+                    '''UPDATE experiments
+                       SET run = json_patch(run, ?),
+                           status = coalesce(?, status),
+                           dur = coalesce(?, dur)
+                       WHERE id = ?''',
+                    (json.dumps(run), run.get('status'), run.get('dur'), exp_id)
+                )
+
+            if result is not None:
+                columns = result_columns(result)
+                conn.execute(
+                    '''UPDATE experiments
+                       SET result = ?,
+                           train_accuracy = ?, train_precision = ?, train_recall = ?,
+                           valid_accuracy = ?, valid_precision = ?, valid_recall = ?
+                       WHERE id = ?''',
+                    (
+                        json.dumps(result),
+                        columns['train_accuracy'], columns['train_precision'], columns['train_recall'],
+                        columns['valid_accuracy'], columns['valid_precision'], columns['valid_recall'],
+                        exp_id
+                    )
+                )
+
+
+    # Replace the whole status document
+    def put(self, exp_id, data):
+        with self.transaction() as conn:
+            row = conn.execute('SELECT config FROM experiments WHERE id = ?', (exp_id,)).fetchone()
+            configs = json.loads(row['config']) if row and row['config'] else None
+            self.insert_row(conn, exp_id, configs, data['run'], data.get('result'))
+
+
+    def get(self, exp_id):
+        row = self.connect().execute(
+            'SELECT id, run, result FROM experiments WHERE id = ?', (exp_id,)
+        ).fetchone()
+        return self.to_status(row) if row else None
+
+
+    def get_status(self, exp_id):
+        row = self.connect().execute(
+            'SELECT status FROM experiments WHERE id = ?', (exp_id,)
+        ).fetchone()
+        return row['status'] if row else None
+
+
+    def get_configs(self, exp_id):
+        row = self.connect().execute(
+            'SELECT config FROM experiments WHERE id = ?', (exp_id,)
+        ).fetchone()
+        return json.loads(row['config']) if row and row['config'] else None
+
+
+    def exists(self, exp_id):
+        return self.get_status(exp_id) is not None
+
+
+    def ids_by_status(self, statuses):
+        rows = self.connect().execute(
+            'SELECT id FROM experiments WHERE status IN ({}) ORDER BY created, id'.format(
+                ', '.join('?' * len(statuses))
+            ),
+            statuses
+        ).fetchall()
+        return [row['id'] for row in rows]
+
+
+    # Experiment id owning the given configs
+    def find_by_configs(self, configs):
+        row = self.connect().execute(
+            'SELECT id FROM experiments WHERE config_hash = ? LIMIT 1', (hash_configs(configs),)
+        ).fetchone()
+        return row['id'] if row else None
+
+
+    def delete(self, exp_id):
+        with self.transaction() as conn:
+            conn.execute('DELETE FROM experiments WHERE id = ?', (exp_id,))
+            conn.execute('DELETE FROM rungs WHERE exp_id = ?', (exp_id,))
+            conn.execute(
+                'INSERT OR REPLACE INTO tombstones (id, seq) VALUES (?, ?)', (exp_id, self.next_seq(conn))
+            )
+
+
+    # One page of status documents, keyset paginated on (sort column, id)
+    def query(self, statuses=None, sort_by='created', dataset='train', order='desc', limit=50, cursor=None):
+
+        column = sort_column(sort_by, dataset)
+        op = '<' if order == 'desc' else '>'
+        direction = 'DESC' if order == 'desc' else 'ASC'
+
+        where, params = [], []
+        if statuses:
+            where.append('status IN ({})'.format(', '.join('?' * len(statuses))))
+            params.extend(statuses)
+
+        if cursor is not None:
+            value, last_id = decode_cursor(cursor)
+            if value is None:
+                where.append('({0} IS NULL AND id {1} ?)'.format(column, op))
+                params.append(last_id)
+            else:
+                where.append('({0} IS NULL OR {0} {1} ? OR ({0} = ? AND id {1} ?))'.format(column, op))
+                params.extend([value, value, last_id])
+
+        rows = self.connect().execute(
+            '''SELECT id, run, result, {0} AS sort_value FROM experiments
+               {1}
+               ORDER BY {0} IS NULL, {0} {2}, id {2}
+               LIMIT ?'''.format(
+                column,
+                'WHERE ' + ' AND '.join(where) if where else '',
+                direction
+            ),
+            params + [limit + 1]
+        ).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]['sort_value'], rows[-1]['id'])
+
+        return [self.to_status(row) for row in rows], next_cursor
+
+
+    # Experiments created, updated or deleted after a change sequence
+    def changes(self, since, limit=50):
+        conn = self.connect()
+        rows = conn.execute(
+            '''SELECT id, seq, 0 AS deleted FROM experiments WHERE seq > ?
+               UNION ALL
+               SELECT id, seq, 1 AS deleted FROM tombstones WHERE seq > ?
+               ORDER BY seq
+               LIMIT ?''',
+            (since, since, limit + 1)
+        ).fetchall()
+
+        more = len(rows) > limit
+        rows = rows[:limit]
+
+        updated = [row['id'] for row in rows if not row['deleted']]
+        deleted = [row['id'] for row in rows if row['deleted']]
+
+        items = []
+        if updated:
+            items = [self.to_status(row) for row in conn.execute(
+                'SELECT id, run, result FROM experiments WHERE id IN ({}) ORDER BY seq'.format(
+                    ', '.join('?' * len(updated))
+                ),
+                updated
+            ).fetchall()]
+
+        # High-water mark is the last change returned
+        seq = rows[-1]['seq'] if rows else since
+        return items, deleted, seq, more
+
+
+    # Number of experiments in each status
+    def count_by_status(self):
+        rows = self.connect().execute(
+            'SELECT status, COUNT(*) AS count FROM experiments GROUP BY status'
+        ).fetchall()
+        return {row['status']: row['count'] for row in rows}
+
+
+    # Append an experiment to the persistent FIFO job queue, jobs of one cohort may be trained together
+    def enqueue(self, exp_id, enqueued=None, resume=False, cohort=None):
+        with self.transaction() as conn:
+            conn.execute(
+                'INSERT OR IGNORE INTO jobs (exp_id, enqueued, resume, cohort) VALUES (?, ?, ?, ?)',
+                (exp_id, enqueued, int(resume), cohort)
+            )
+
+
+    # Pop the oldest queued experiment and up to cohort_size - 1 later jobs of its cohort,
+    # returns ([exp_id, ...], resume)
+    def dequeue(self, cohort_size=1):
+        with self.transaction() as conn:
+            row = conn.execute('SELECT id, exp_id, resume, cohort FROM jobs ORDER BY id LIMIT 1').fetchone()
+            if row is None:
+                return None
+
+            rows = [row]
+            if row['cohort'] is not None and cohort_size > 1:
+                rows += conn.execute(
+                    'SELECT id, exp_id FROM jobs WHERE cohort = ? AND id > ? ORDER BY id LIMIT ?',
+                    (row['cohort'], row['id'], cohort_size - 1)
+                ).fetchall()
+
+            conn.executemany('DELETE FROM jobs WHERE id = ?', [(job['id'],) for job in rows])
+            return [job['exp_id'] for job in rows], bool(row['resume'])
+
+
+    def remove_job(self, exp_id):
+        with self.transaction() as conn:
+            conn.execute('DELETE FROM jobs WHERE exp_id = ?', (exp_id,))
+
+
+    # 1-based position in queue, None when not queued
+    def queue_position(self, exp_id):
+        row = self.connect().execute(
+            '''SELECT COUNT(*) AS position FROM jobs
+               WHERE id <= (SELECT id FROM jobs WHERE exp_id = ?)''',
+            (exp_id,)
+        ).fetchone()
+        return row['position'] or None
+
+
+    def queue_depth(self):
+        return self.connect().execute('SELECT COUNT(*) AS depth FROM jobs').fetchone()['depth']
+
+
+    def queued(self, limit=50):
+        rows = self.connect().execute(
+            'SELECT exp_id FROM jobs ORDER BY id LIMIT ?', (limit,)
+        ).fetchall()
+        return [row['exp_id'] for row in rows]
+
+
+    # Move the oldest queued experiment to a remote worker, returns (exp_id, resume)
+    def lease(self, worker, leased=None, now=None):
+        with self.transaction() as conn:
+            row = conn.execute('SELECT id, exp_id, resume FROM jobs ORDER BY id LIMIT 1').fetchone()
+            if row is None:
+                return None
+            conn.execute('DELETE FROM jobs WHERE id = ?', (row['id'],))
+            conn.execute(
+                '''INSERT OR REPLACE INTO leases (exp_id, worker, resume, leased, heartbeat)
+                   VALUES (?, ?, ?, ?, ?)''',
+                (row['exp_id'], worker, row['resume'], leased, now)
+            )
+            return row['exp_id'], bool(row['resume'])
+
+
+    # Extend a lease, False when the worker does not hold it anymore
+    def renew(self, exp_id, worker, now):
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                'UPDATE leases SET heartbeat = ? WHERE exp_id = ? AND worker = ?', (now, exp_id, worker)
+            )
+            return cursor.rowcount > 0
+
+
+    def release(self, exp_id, worker=None):
+        with self.transaction() as conn:
+            if worker is None:
+                cursor = conn.execute('DELETE FROM leases WHERE exp_id = ?', (exp_id,))
+            else:
+                cursor = conn.execute('DELETE FROM leases WHERE exp_id = ? AND worker = ?', (exp_id, worker))
+            return cursor.rowcount > 0
+
+
+    def lease_holder(self, exp_id):
+        row = self.connect().execute('SELECT worker FROM leases WHERE exp_id = ?', (exp_id,)).fetchone()
+        return row['worker'] if row else None
+
+
+    # Leases whose last heartbeat is older than the deadline
+    def expired_leases(self, deadline):
+        rows = self.connect().execute(
+            'SELECT exp_id, worker FROM leases WHERE heartbeat < ? ORDER BY heartbeat', (deadline,)
+        ).fetchall()
+        return [(row['exp_id'], row['worker']) for row in rows]
+
+
+    def leases(self):
+        rows = self.connect().execute('SELECT exp_id, worker FROM leases ORDER BY leased').fetchall()
+        return {row['exp_id']: row['worker'] for row in rows}
+
+
+    # Sweep with its trials, params are the sampled values of each trial
+    def insert_sweep(self, sweep_id, spec, trials, created=None):
+        with self.transaction() as conn:
+            conn.execute(
+                'INSERT INTO sweeps (id, created, spec) VALUES (?, ?, ?)',
+                (sweep_id, created, json.dumps(spec))
+            )
+            conn.executemany(
+                'INSERT OR IGNORE INTO sweep_trials (sweep_id, exp_id, trial, params) VALUES (?, ?, ?, ?)',
+                [(sweep_id, exp_id, trial, json.dumps(params)) for trial, (exp_id, params) in enumerate(trials)]
+            )
+
+
+    def get_sweep(self, sweep_id):
+        row = self.connect().execute(
+            'SELECT id, created, spec FROM sweeps WHERE id = ?', (sweep_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        return {
+            'id': row['id'],
+            'created': row['created'],
+            'spec': json.loads(row['spec'])
+        }
+
+
+    def sweeps(self, limit=50):
+        rows = self.connect().execute(
+            'SELECT id, created FROM sweeps ORDER BY created DESC, id DESC LIMIT ?', (limit,)
+        ).fetchall()
+        return [{'id': row['id'], 'created': row['created']} for row in rows]
+
+
+    # Number of trials of a sweep in each status
+    def sweep_counts(self, sweep_id):
+        rows = self.connect().execute(
+            '''SELECT e.status AS status, COUNT(*) AS count
+               FROM sweep_trials t JOIN experiments e ON e.id = t.exp_id
+               WHERE t.sweep_id = ?
+               GROUP BY e.status''',
+            (sweep_id,)
+        ).fetchall()
+        return {row['status']: row['count'] for row in rows}
+
+
+    # Trials of a sweep sorted by a metric, finished trials first
+    def sweep_trials(self, sweep_id, sort_by='accuracy', dataset='valid', order='desc', limit=50):
+        column = sort_column(sort_by, dataset)
+        direction = 'DESC' if order == 'desc' else 'ASC'
+
+        rows = self.connect().execute(
+            '''SELECT e.id AS id, e.run AS run, e.result AS result, t.trial AS trial, t.params AS params
+               FROM sweep_trials t JOIN experiments e ON e.id = t.exp_id
+               WHERE t.sweep_id = ?
+               ORDER BY e.{0} IS NULL, e.{0} {1}, t.trial
+               LIMIT ?'''.format(column, direction),
+            (sweep_id, limit)
+        ).fetchall()
+
+        trials = []
+        for row in rows:
+            trial = self.to_status(row)
+            trial['trial'] = row['trial']
+            trial['params'] = json.loads(row['params'])
+            trials.append(trial)
+        return trials
+
+
+    # Sweeps an experiment is a trial of, with their specs
+    def sweeps_of(self, exp_id):
+        rows = self.connect().execute(
+            '''SELECT s.id AS id, s.spec AS spec
+               FROM sweep_trials t JOIN sweeps s ON s.id = t.sweep_id
+               WHERE t.exp_id = ?
+               ORDER BY s.created''',
+            (exp_id,)
+        ).fetchall()
+        return [(row['id'], json.loads(row['spec'])) for row in rows]
+
+
+    # Record a trial's value at a rung, returns every value recorded at that rung
+    def record_rung(self, sweep_id, rung, exp_id, value):
+        with self.transaction() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO rungs (sweep_id, rung, exp_id, value) VALUES (?, ?, ?, ?)',
+                (sweep_id, rung, exp_id, value)
+            )
+            rows = conn.execute(
+                'SELECT value FROM rungs WHERE sweep_id = ? AND rung = ?', (sweep_id, rung)
+            ).fetchall()
+        return [row['value'] for row in rows]
+
+
+    def get_meta(self, key, default=None):
+        row = self.connect().execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row['value']) if row else default
+
+
+    def set_meta(self, key, value):
+        with self.transaction() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, json.dumps(value))
+            )
+
+
+    # One-shot import of legacy YAML experiment directories
+    def migrate(self, exp_root):
+        if self.get_meta('migrated', False):
+            return 0
+
+        exp_ids = os.listdir(exp_root) if os.path.exists(exp_root) else []
+        logger.info('[Store] Migrating {} experiments from {}'.format(len(exp_ids), exp_root))
+
+        count = 0
+        with self.transaction() as conn:
+            for exp_id in exp_ids:
+                status_path = os.path.join(exp_root, exp_id, 'status.yaml')
+                config_path = os.path.join(exp_root, exp_id, 'configs.yaml')
+                if not os.path.exists(status_path) or not os.path.exists(config_path):
+                    logger.warning('[Store] Skip incomplete experiment {}'.format(exp_id))
+                    continue
+
+                with open(status_path, 'r') as f:
+                    status = yaml.full_load(f)
+                with open(config_path, 'r') as f:
+                    configs = yaml.full_load(f)
+
+                self.insert_row(conn, exp_id, configs, status['run'], status.get('result'))
+                count += 1
+
+            conn.execute(
+                'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', ('migrated', json.dumps(True))
+            )
+
+        logger.success('[Store] Migrated {} experiments'.format(count))
+        return count
+
+
+if __name__ == '__main__':
+    store = MetadataStore('save/ems.db')
+    store.migrate('save/exps')
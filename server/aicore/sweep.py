@@ -0,0 +1,99 @@
+import copy
+import math
+import random
+import itertools
+
+
+SWEEP_METHODS = ['grid', 'random']
+DISTRIBUTIONS = ['choice', 'uniform', 'log_uniform', 'int_uniform']
+
+
+# Set a dotted path such as 'train.lr' or 'model.layers.1.out_shape' in nested configs
+def set_path(configs, path, value):
+    keys = path.split('.')
+    node = configs
+
+    for key in keys[:-1]:
+        node = node[int(key)] if isinstance(node, list) else node.setdefault(key, {})
+        if not isinstance(node, (dict, list)):
+            raise ValueError('Path "{}" goes through {}, which is not a mapping or a list'.format(path, key))
+
+    if isinstance(node, list):
+        node[int(keys[-1])] = value
+    else:
+        node[keys[-1]] = value
+
+
+# Configs of one trial, a parameter name may tie paths together: 'model.layers.1.out_shape,model.layers.3.in_shape'
+def apply_params(base, params):
+    configs = copy.deepcopy(base)
+    for name, value in params.items():
+        for path in name.split(','):
+            set_path(configs, path.strip(), value)
+    return configs
+
+
+def grid_values(name, spec):
+    if isinstance(spec, list):
+        values = spec
+    elif isinstance(spec, dict) and 'values' in spec:
+        values = spec['values']
+    else:
+        raise ValueError('Grid search needs a list of values for "{}"'.format(name))
+
+    if not values:
+        raise ValueError('No values for "{}"'.format(name))
+    return values
+
+
+def sample(name, spec, rng):
+    if isinstance(spec, list):
+        return rng.choice(spec)
+
+    distribution = spec.get('distribution', 'choice')
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError('Distribution of "{}" must be one of {}'.format(name, DISTRIBUTIONS))
+
+    if distribution == 'choice':
+        return rng.choice(grid_values(name, spec))
+
+    low, high = spec['min'], spec['max']
+    if low > high:
+        raise ValueError('Min of "{}" is greater than max'.format(name))
+
+    if distribution == 'uniform':
+        return rng.uniform(low, high)
+    elif distribution == 'log_uniform':
+        if low <= 0:
+            raise ValueError('Log-uniform "{}" needs a positive min'.format(name))
+        return math.exp(rng.uniform(math.log(low), math.log(high)))
+    else:
+        return rng.randint(int(low), int(high))
+
+
+# Parameters of every trial of a grid or random search
+def expand_space(space, method='grid', n_trials=None, seed=None, max_trials=500):
+    if method not in SWEEP_METHODS:
+        raise ValueError('Method must be one of {}'.format(SWEEP_METHODS))
+    if not space:
+        raise ValueError('Search space is empty')
+
+    names = list(space)
+    for name in names:
+        spec = space[name]
+        if not isinstance(spec, list) and not (isinstance(spec, dict) and ('values' in spec or 'distribution' in spec)):
+            raise ValueError('"{}" must be a list of values or a distribution'.format(name))
+
+    if method == 'grid':
+        values = [grid_values(name, space[name]) for name in names]
+        n_combinations = math.prod(len(value) for value in values)
+        if n_combinations > max_trials:
+            raise ValueError('Grid has {} trials, at most {} are allowed'.format(n_combinations, max_trials))
+
+        return [dict(zip(names, combination)) for combination in itertools.product(*values)]
+
+    if not n_trials or n_trials < 1 or n_trials > max_trials:
+        raise ValueError('Random search needs 1 to {} trials'.format(max_trials))
+
+    rng = random.Random(seed)
+    return [{name: sample(name, space[name], rng) for name in names} for _ in range(n_trials)]
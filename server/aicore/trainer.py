@@ -1,6 +1,7 @@
 import os
+import time
 from loguru import logger
-from sklearn.metrics import precision_score, recall_score
+from concurrent.futures import ThreadPoolExecutor
 
 import torch
 import torch.nn as nn
@@ -9,6 +10,19 @@ import torch.optim as optim
 import torch.nn.functional as F
 from torchvision import datasets, transforms
 
+from .metrics import ConfusionMatrix, MetricsRecorder
+from .early_stop import stop_requested
+from .compiler import COMPILE_MODES, compile_for_training, compile_for_eval
+from .quantize import quantize_linear, save_quantized, time_forward
+from .checkpoint import CheckpointWriter, BEST_CHECKPOINT, LAST_CHECKPOINT, QUANTIZED_CHECKPOINT, rng_state, set_rng_state, load_last, load_state
+from .shape import INPUT_SHAPE, N_CLASSES
+from .dataset import get_registry, transforms_key, MemmapDataset, BatchTransform, TensorBatchLoader, \
+    MNIST_MEAN, MNIST_STD
+
+
+# Default batch size of evaluation loaders
+EVAL_BATCH_SIZE = 1024
+
 
 class Trainer:
     def __init__(self, exp):
@@ -22,15 +36,21 @@ class Trainer:
        self.status = self.exp.status
        
        # Build transforms
+       self.data_format = self.data_configs.get('format', 'memmap')
+       self.data_loader = self.data_configs.get('loader', 'torch')
+       if self.data_loader not in ['torch', 'tensor']:
+           raise Exception('Data loader "{}" is under development.'.format(self.data_loader))
+       self.compile_mode = self.exp.configs['model'].get('compile', 'eager')
+       if self.compile_mode not in COMPILE_MODES:
+           raise Exception('Compile mode "{}" is unsupported.'.format(self.compile_mode))
        self.transforms = self.prepare_transforms()
+       self.batch_transform = self.prepare_batch_transform()
        
-       # Prepare dataset
-       self.train_dataset = self.prepare_dataset(train=True)
-       self.valid_dataset = self.prepare_dataset(train=False)
-       
-       # Prepare dataloader
-       self.train_loader = self.prepare_dataloader(self.train_dataset, shuffle=True)
-       self.valid_loader = self.prepare_dataloader(self.valid_dataset, shuffle=False)
+       # Dataset and dataloader are built on first use (see prepare_data)
+       self.train_dataset = None
+       self.valid_dataset = None
+       self.train_loader = None
+       self.valid_loader = None
        
        # Prepare loss
        self.loss = self.prepare_loss()
@@ -40,53 +60,204 @@ class Trainer:
        
        # Running params
        self.min_loss = None
+       self.stopped_at = None
+       self.recorder = None
+       self.train_forward = self.model # Compiled model when model.compile is set
+       self.eval_forward = self.model
+       self.checkpoint = CheckpointWriter(os.path.join(self.save_dir, BEST_CHECKPOINT))
+       self.last_checkpoint = CheckpointWriter(os.path.join(self.save_dir, LAST_CHECKPOINT), retain=False)
     
     
-    # Training function
-    def train(self):
-
-        self.init()
+    # Build data pipelines, deferred so validating an experiment never touches the dataset
+    def prepare_data(self):
         
-        self.min_loss = torch.Tensor([999.0])
-        total_step = len(self.train_loader)
+        if self.train_loader is not None:
+            return
         
-        for epoch in range(self.train_configs['num_epochs']):
-            
-            self.status.update(epoch + 1, self.min_loss.item())
+        # Prepare dataset
+        self.train_dataset = self.prepare_dataset(train=True)
+        self.valid_dataset = self.prepare_dataset(train=False)
+        
+        # Prepare dataloader
+        self.train_loader = self.prepare_dataloader(self.train_dataset, shuffle=True)
+        self.valid_loader = self.prepare_dataloader(self.valid_dataset, shuffle=False)
+    
+    
+    # Give shared datasets back to the registry
+    def release_data(self):
+        
+        for dataset in [self.train_dataset, self.valid_dataset]:
+            if dataset is not None:
+                get_registry().release(dataset)
+        
+        self.train_dataset = None
+        self.valid_dataset = None
+        self.train_loader = None
+        self.valid_loader = None
+    
+    
+    # Training function, resume continues from the last full-state checkpoint if there is one
+    def train(self, resume=False):
+        
+        try:
+            self.begin(resume)
+            self.prepare_compile()
             
-            total_loss = 0.0
-            for i, (images, labels) in enumerate(self.train_loader):
-                
-                # Forward pass
-                outputs = self.model(images)
-                labels_onehot = F.one_hot(labels, num_classes=10).float()
+            for epoch in range(self.start_epoch, self.train_configs['num_epochs']):
                 
-                loss = self.loss(outputs, labels_onehot)
-                total_loss += loss * images.shape[0]
-                
-                # Save checkpoint, update min loss
-                if (i+1) % self.train_configs['log_every'] == 0:
+                self.begin_epoch(epoch)
+                for i, (images, labels) in enumerate(self.train_loader):
+                    images = self.batch_transform(images)
+                    
+                    # Forward pass
+                    outputs = self.train_forward(images)
+                    loss = self.compute_loss(outputs, labels)
                     
-                    logger.info('[{}] Epoch [{}/{}], Step [{}/{}], Loss: {:.4f}'.format(
-                        self.exp_id, epoch + 1, 
-                        self.train_configs['num_epochs'], 
-                        i+1, total_step, loss.item()
-                    ))
+                    # Backward and optimize
+                    self.optim.zero_grad()
+                    loss.backward()
+                    self.optim.step()
                     
-                # Backward and optimize
-                self.optim.zero_grad()
-                loss.backward()
-                self.optim.step()
+                    # Plain float, the autograd graph is freed after every step
+                    if self.end_step(epoch, i, loss.item(), images.shape[0]):
+                        break
+                
+                if self.end_epoch(epoch):
+                    break
+        
+        finally:
+            if self.recorder is not None:
+                self.recorder.close()
+    
+    
+    # Restore or initialize the model and open the metrics file, before the first epoch
+    def begin(self, resume=False):
+        
+        self.prepare_data()
+        
+        self.min_loss = 999.0
+        self.start_epoch, self.global_step = 0, 0
+        self.stopped_at = None # Completed epochs when stopped early
+        
+        state = load_last(self.save_dir) if resume else None
+        if state is not None:
+            self.start_epoch, self.global_step, elapsed = self.restore_last(state)
+            logger.info('[{}] Resume after epoch {}, step {}'.format(self.exp_id, self.start_epoch, self.global_step))
+            self.status.resume(self.start_epoch, elapsed=elapsed)
+        
+        else:
+            # Fresh run, a stale state must not be resumed later
+            if os.path.exists(os.path.join(self.save_dir, LAST_CHECKPOINT)):
+                os.remove(os.path.join(self.save_dir, LAST_CHECKPOINT))
+            self.init()
+        
+        self.recorder = MetricsRecorder(self.save_dir, start_step=self.global_step)
+    
+    
+    # Compile the model for training, compile time and speedup go to the status
+    def prepare_compile(self):
+        
+        if self.compile_mode == 'eager':
+            return
+        
+        images, labels = self.sample_batch(self.train_configs['batch_size'])
+        self.train_forward, info = compile_for_training(self.model, self.compile_mode, images, labels, self.compute_loss)
+        self.status.compiled(info)
+    
+    
+    # Random batch shaped like the model input
+    def sample_batch(self, batch_size):
+        images = torch.rand(batch_size, *INPUT_SHAPE)
+        labels = torch.randint(0, N_CLASSES, (batch_size,))
+        return images, labels
+    
+    
+    def begin_epoch(self, epoch):
+        
+        self.status.update(epoch + 1, self.min_loss)
+        self.total_loss = 0.0
+        self.step_start = time.perf_counter()
+    
+    
+    def compute_loss(self, outputs, labels):
+        labels_onehot = F.one_hot(labels, num_classes=10).float()
+        return self.loss(outputs, labels_onehot)
+    
+    
+    # Record a finished step, returns True when a stop was requested meanwhile
+    def end_step(self, epoch, i, loss_value, batch_size):
+        
+        self.total_loss += loss_value * batch_size
+        
+        step_end = time.perf_counter()
+        self.global_step += 1
+        self.recorder.record(
+            step=self.global_step, 
+            epoch=epoch + 1, 
+            loss=loss_value, 
+            lr=self.optim.param_groups[0]['lr'], 
+            samples_per_sec=batch_size / max(step_end - self.step_start, 1e-9)
+        )
+        self.step_start = step_end
+        
+        # Log progress
+        if (i+1) % self.train_configs['log_every'] == 0:
             
-            # Save checkpoints 
-            avg_loss = total_loss / len(self.train_loader.dataset)
-            if avg_loss < self.min_loss:
-                logger.info('Epoch [{}/{}], Loss update: {:.4f} -> {:.4f}'.format(
-                    epoch + 1, self.train_configs['num_epochs'], 
-                    self.min_loss.item(), avg_loss
-                ))
-                self.min_loss = avg_loss
-                self.save_checkpoint()   
+            logger.info('[{}] Epoch [{}/{}], Step [{}/{}], Loss: {:.4f}'.format(
+                self.exp_id, epoch + 1, 
+                self.train_configs['num_epochs'], 
+                i+1, len(self.train_loader), loss_value
+            ))
+            self.status.publish('loss', {
+                'epoch': epoch + 1,
+                'step': i + 1,
+                'total_step': len(self.train_loader),
+                'loss': loss_value
+            })
+            
+            # Stop decided while this epoch was running, the partial epoch is dropped
+            if stop_requested(self.save_dir):
+                self.stopped_at = epoch
+                return True
+        
+        return False
+    
+    
+    # Checkpoint and report a finished epoch, returns True when training stops early
+    def end_epoch(self, epoch):
+        
+        if self.stopped_at is not None:
+            logger.info('[{}] Stopped early during epoch {}'.format(self.exp_id, epoch + 1))
+            return True
+        
+        checkpoint_every = self.train_configs.get('checkpoint_every', 1)
+        
+        # Save checkpoints 
+        avg_loss = self.total_loss / len(self.train_loader.dataset)
+        if avg_loss < self.min_loss:
+            logger.info('Epoch [{}/{}], Loss update: {:.4f} -> {:.4f}'.format(
+                epoch + 1, self.train_configs['num_epochs'], 
+                self.min_loss, avg_loss
+            ))
+            self.min_loss = avg_loss
+            self.save_checkpoint()
+        
+        # Full state for resuming
+        if (epoch + 1) % checkpoint_every == 0 or epoch + 1 == self.train_configs['num_epochs']:
+            self.save_last(epoch + 1, self.global_step)
+        
+        self.recorder.flush()
+        
+        # Early stopping compares trials on this loss
+        self.status.report(epoch + 1, self.train_configs['num_epochs'], avg_loss)
+        if stop_requested(self.save_dir) and epoch + 1 < self.train_configs['num_epochs']:
+            self.stopped_at = epoch + 1
+            logger.info('[{}] Stopped early after epoch {}'.format(self.exp_id, epoch + 1))
+            if (epoch + 1) % checkpoint_every != 0:
+                self.save_last(epoch + 1, self.global_step)
+            return True
+        
+        return False
     
     
     # Test training function
@@ -104,8 +275,7 @@ class Trainer:
 
         # Forward
         outputs = self.model(images)
-        labels_onehot = F.one_hot(labels, num_classes=10).float()
-        loss = self.loss(outputs, labels_onehot)
+        loss = self.compute_loss(outputs, labels)
         
         # Backward and optimize
         self.optim.zero_grad()
@@ -123,70 +293,156 @@ class Trainer:
         self.model.apply(init_weights)
     
     
+    # Evaluate the best checkpoint on both splits, loading it only once
+    def evaluate(self):
+        
+        self.prepare_data()
+        
+        # Load best checkpoint
+        self.load_checkpoint()
+        self.model.eval()
+        
+        # Frozen weights are compiled into the evaluation model
+        if self.compile_mode != 'eager':
+            images, _ = self.sample_batch(self.train_configs.get('eval_batch_size', EVAL_BATCH_SIZE))
+            self.eval_forward, info = compile_for_eval(self.model, self.compile_mode, images)
+            self.status.compiled(info, eval=True)
+        
+        splits = {'train': self.train_dataset, 'valid': self.valid_dataset}
+        
+        # Both splits share the read-only model, one thread each
+        if self.train_configs.get('eval_parallel', False):
+            with ThreadPoolExecutor(max_workers=len(splits)) as pool:
+                futures = {
+                    split: pool.submit(self.eval_split, split, dataset)
+                    for split, dataset in splits.items()
+                }
+                results = {split: future.result() for split, future in futures.items()}
+        
+        else:
+            results = {split: self.eval_split(split, dataset) for split, dataset in splits.items()}
+        
+        return results['train'], results['valid']
+    
+    
+    # Int8 copy of the best model next to best.pth, evaluated on both splits like the fp32 model
+    def quantize(self):
+        
+        self.prepare_data()
+        self.load_checkpoint()
+        self.model.eval()
+        
+        quantized = quantize_linear(self.model.model)
+        path = os.path.join(self.save_dir, QUANTIZED_CHECKPOINT)
+        save_quantized(quantized, path)
+        logger.info('[{}] Int8 model saved at {}'.format(self.exp_id, path))
+        
+        self.eval_forward = quantized
+        try:
+            results = {
+                split: self.eval_split(split, dataset) 
+                for split, dataset in [('train', self.train_dataset), ('valid', self.valid_dataset)]
+            }
+        finally:
+            self.eval_forward = self.model
+        
+        # Latency of one evaluation batch, fp32 against int8
+        images, _ = self.sample_batch(self.train_configs.get('eval_batch_size', EVAL_BATCH_SIZE))
+        results['size'] = os.path.getsize(path)
+        results['fp32_size'] = os.path.getsize(os.path.join(self.save_dir, BEST_CHECKPOINT))
+        results['batch_time'] = time_forward(quantized, images)
+        results['fp32_batch_time'] = time_forward(self.model, images)
+        
+        return results
+    
+    
     # Evaluating function                 
     def eval(self, train=False):
         
-        result = {}
+        self.prepare_data()
         
         # Load best checkpoint
         self.load_checkpoint()
         self.model.eval()
+        self.eval_forward = self.model
         
-        # Start evaluation
-        with torch.no_grad():
-            correct = 0
-            total = 0
-            true_labels = []
-            predicted_labels = []
+        if train:
+            return self.eval_split('train', self.train_dataset)
+        return self.eval_split('valid', self.valid_dataset)
+    
+    
+    # Metrics of one split, in order with large batches and no autograd
+    def eval_split(self, split, dataset):
+        
+        loader = self.prepare_dataloader(
+            dataset, 
+            shuffle=False, 
+            batch_size=self.train_configs.get('eval_batch_size', EVAL_BATCH_SIZE)
+        )
+        
+        # Start evaluation, metrics are accumulated per batch
+        with torch.inference_mode():
+            metrics = ConfusionMatrix(n_classes=10)
 
-            for images, labels in self.train_loader if train else self.valid_loader:
-                outputs = self.model(images)
-                _, predicted = torch.max(outputs.data, 1)
-                total += labels.size(0)
-                correct += (predicted == labels).sum().item()
-                
-                true_labels.extend(labels.tolist())
-                predicted_labels.extend(predicted.tolist())
+            for images, labels in loader:
+                images = self.batch_transform(images)
+                outputs = self.eval_forward(images)
+                _, predicted = torch.max(outputs, 1)
+                metrics.update(labels, predicted)
 
-            # Accuracy
-            accuracy = correct / total
-            result['accuracy'] = accuracy
-            
-            # Precision
-            precision_micro = precision_score(true_labels, predicted_labels, average='micro', zero_division=0.0)
-            precision_macro = precision_score(true_labels, predicted_labels, average='macro', zero_division=0.0)
-            result['precision'] = {
-                'micro': precision_micro.item(),
-                'macro': precision_macro.item()
-            }
-            
-            #  Recall
-            recall_micro = recall_score(true_labels, predicted_labels, average='micro', zero_division=0.0)
-            recall_macro = recall_score(true_labels, predicted_labels, average='macro', zero_division=0.0)
-            result['recall'] = {
-                'micro': recall_micro.item(),
-                'macro': recall_macro.item()
-            }
-            
-            logger.info('=== RESULT ON {} SET ==='.format('TRAIN' if train else 'VALID'))
-            logger.info('Accuracy: {:.2f}%'.format(accuracy * 100))
-            logger.info('Precision: (Micro) {:.2f}% - (Macro) {:.2f}%'.format(
-                precision_micro * 100,
-                precision_macro * 100
-            ))
-            logger.info('Recall: (Micro) {:.2f}% - (Macro) {:.2f}%'.format(
-                recall_micro * 100,
-                recall_macro * 100
-            ))
+        result = metrics.compute()
+        
+        logger.info('=== RESULT ON {} SET ==='.format(split.upper()))
+        logger.info('Accuracy: {:.2f}%'.format(result['accuracy'] * 100))
+        logger.info('Precision: (Micro) {:.2f}% - (Macro) {:.2f}%'.format(
+            result['precision']['micro'] * 100,
+            result['precision']['macro'] * 100
+        ))
+        logger.info('Recall: (Micro) {:.2f}% - (Macro) {:.2f}%'.format(
+            result['recall']['micro'] * 100,
+            result['recall']['macro'] * 100
+        ))
+        logger.info('F1: (Micro) {:.2f}% - (Macro) {:.2f}%'.format(
+            result['f1']['micro'] * 100,
+            result['f1']['macro'] * 100
+        ))
 
-            return result
+        return result
+    
     
     # Save and load checkpoint function
     def save_checkpoint(self):
-        torch.save(self.model.state_dict(), os.path.join(self.save_dir, 'best.pth'))
+        self.checkpoint.save(self.model.state_dict())
     
+    # Best state retained in memory, disk only when this trainer did not train
     def load_checkpoint(self):
-        self.model.load_state_dict(torch.load(os.path.join(self.save_dir, 'best.pth')))
+        if self.checkpoint.best_state is not None:
+            self.model.load_state_dict(self.checkpoint.best_state)
+        else:
+            self.model.load_state_dict(load_state(os.path.join(self.save_dir, BEST_CHECKPOINT)))
+    
+    # Everything needed to continue training after the given epoch
+    def save_last(self, epoch, step):
+        self.last_checkpoint.save({
+            'model': self.model.state_dict(),
+            'optim': self.optim.state_dict(),
+            'best': self.checkpoint.best_state,
+            'epoch': epoch,
+            'step': step,
+            'min_loss': self.min_loss,
+            'elapsed': self.status.training_time(),
+            'rng': rng_state()
+        })
+    
+    # Restore a full-state checkpoint, returns (completed epochs, global step, seconds trained)
+    def restore_last(self, state):
+        self.model.load_state_dict(state['model'])
+        self.optim.load_state_dict(state['optim'])
+        self.checkpoint.best_state = state['best']
+        self.min_loss = state['min_loss']
+        set_rng_state(state['rng'])
+        
+        return state['epoch'], state['step'], state.get('elapsed', 0.0) # Checkpoints of older versions have no time
     
     
     # Prepare transform stack
@@ -196,32 +452,85 @@ class Trainer:
         for transform in self.data_configs['transforms']:
             if transform['name'] == 'to_tensor':
                 transform_list.append(transforms.ToTensor())
+            elif transform['name'] == 'normalize':
+                transform_list.append(transforms.Normalize(
+                    (transform['mean'] if 'mean' in transform else MNIST_MEAN,),
+                    (transform['std'] if 'std' in transform else MNIST_STD,)
+                ))
             else:
                 logger.error('Transform "{}" is under development.'.format(transform['name']))
-                # raise Exception('Transform "{}" is under development.'.format(transform['name']))
-                pass
+                raise Exception('Transform "{}" is under development.'.format(transform['name']))
                 
         return transforms.Compose(transform_list)
     
     
-    # Prepare dataset (download if necessary)
+    # Prepare transform stack applied to whole uint8 batches of the memmap format
+    def prepare_batch_transform(self):
+        
+        if self.data_format == 'memmap':
+            return BatchTransform(self.data_configs['transforms'])
+        
+        elif self.data_format == 'torchvision':
+            return lambda images: images # Transformed per sample
+        
+        else:
+            logger.error('Data format "{}" is under development.'.format(self.data_format))
+            raise Exception('Data format "{}" is under development.'.format(self.data_format))
+    
+    
+    # Prepare dataset (download if necessary), loaded once per process and shared
     def prepare_dataset(self, train=True, download=True):
+        
+        # Preprocessed uint8 arrays, independent of the transform stack
+        if self.data_format == 'memmap':
+            key = ('mnist', self.data_configs['dir'], 'train' if train else 'test', 'memmap')
+            return get_registry().acquire(key, lambda: MemmapDataset(
+                root=self.data_configs['dir'], 
+                train=train, 
+                download=download
+            ))
+        
+        key = (
+            'mnist', 
+            self.data_configs['dir'], 
+            'train' if train else 'test', 
+            transforms_key(self.data_configs['transforms'])
+        )
+        
         # Load the MNIST dataset
-        return datasets.MNIST(
+        return get_registry().acquire(key, lambda: datasets.MNIST(
             root=self.data_configs['dir'], 
             train=train, 
             transform=self.transforms, 
             download=download
-        )
+        ))
     
     
     # Prepare dataloader  
-    def prepare_dataloader(self, dataset, shuffle=True):
-        return data.DataLoader(
-            dataset=dataset, 
-            batch_size=self.train_configs['batch_size'], 
-            shuffle=shuffle
-        )
+    def prepare_dataloader(self, dataset, shuffle=True, batch_size=None):
+        
+        if batch_size is None:
+            batch_size = self.train_configs['batch_size']
+        
+        # Per-sample loading with collate
+        if self.data_loader == 'torch':
+            return data.DataLoader(
+                dataset=dataset, 
+                batch_size=batch_size, 
+                shuffle=shuffle
+            )
+        
+        # Whole split in memory, batches by index slicing
+        elif self.data_loader == 'tensor':
+            return TensorBatchLoader(
+                dataset=dataset, 
+                batch_size=batch_size, 
+                shuffle=shuffle
+            )
+        
+        else:
+            logger.error('Data loader "{}" is under development.'.format(self.data_loader))
+            raise Exception('Data loader "{}" is under development.'.format(self.data_loader))
         
         
     # Prepare loss
@@ -238,8 +547,7 @@ class Trainer:
         
         else:
             logger.error('Loss "{}" is under development.'.format(self.train_configs['loss']))
-            # raise Exception('Loss "{}" is under development.'.format(self.train_configs['loss']))
-            return None
+            raise Exception('Loss "{}" is under development.'.format(self.train_configs['loss']))
     
     
     # Prepare optimizer
@@ -271,5 +579,4 @@ class Trainer:
                 
         else:
             logger.error('Optimizer "{}" is under development.'.format(self.train_configs['optim']))
-            # raise Exception('Optimizer "{}" is under development.'.format(self.train_configs['optim']))
-            return None
\ No newline at end of file
+            raise Exception('Optimizer "{}" is under development.'.format(self.train_configs['optim']))
\ No newline at end of file
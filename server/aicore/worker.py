@@ -0,0 +1,324 @@
+import os
+import json
+import time
+import yaml
+import socket
+import argparse
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from loguru import logger
+
+from .experiment import Experiment
+from .executor import ChannelStore, ChannelEvents, apply_budget, apply_seed
+from .checkpoint import BEST_CHECKPOINT, LAST_CHECKPOINT, QUANTIZED_CHECKPOINT
+from .metrics import METRICS_FILE
+from .early_stop import request_stop, clear_stop
+
+
+# Files of an experiment directory kept in sync between workers and the server
+SYNC_FILES = [BEST_CHECKPOINT, LAST_CHECKPOINT, QUANTIZED_CHECKPOINT, METRICS_FILE, 'model.log']
+
+# Header carrying the shared worker token
+TOKEN_HEADER = 'X-Worker-Token'
+
+
+# Thin JSON/HTTP client of the /worker routes
+class ServerClient:
+    def __init__(self, server, token, timeout=30):
+        self.base = server if server.startswith('http') else 'http://{}'.format(server)
+        self.token = token
+        self.timeout = timeout
+
+
+    def url(self, path, **params):
+        url = '{}/worker{}'.format(self.base, path)
+        if params:
+            url += '?' + urllib.parse.urlencode(params)
+        return url
+
+
+    # POST JSON, returns (status code, response data)
+    def post(self, path, data):
+        request = urllib.request.Request(
+            self.url(path),
+            data=json.dumps(data).encode('utf-8'),
+            headers={'Content-Type': 'application/json', TOKEN_HEADER: self.token},
+            method='POST'
+        )
+        return self.send(request)
+
+
+    def upload(self, path, file_path, **params):
+        with open(file_path, 'rb') as f:
+            content = f.read()
+
+        request = urllib.request.Request(
+            self.url(path, **params),
+            data=content,
+            headers={'Content-Type': 'application/octet-stream', TOKEN_HEADER: self.token},
+            method='PUT'
+        )
+        return self.send(request)
+
+
+    # Download to file_path, False when the server has no such file
+    def download(self, path, file_path, **params):
+        request = urllib.request.Request(self.url(path, **params), headers={TOKEN_HEADER: self.token})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                content = response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return False
+            raise
+
+        tmp_path = '{}.{}.tmp'.format(file_path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, file_path)
+        return True
+
+
+    def send(self, request):
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, json.loads(response.read())['data']
+        except urllib.error.HTTPError as e:
+            return e.code, None
+
+
+# Messages of a running experiment waiting to be posted, same format as the process channel
+class RemoteChannel:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.messages = []
+
+    def put(self, message):
+        with self.lock:
+            self.messages.append(message)
+
+    def drain(self):
+        with self.lock:
+            messages, self.messages = self.messages, []
+        return messages
+
+    # Messages that could not be delivered go back in front
+    def restore(self, messages):
+        with self.lock:
+            self.messages = messages + self.messages
+
+
+# Forward messages, heartbeats and changed files of one leased experiment
+class JobSync:
+    def __init__(self, client, worker, exp_id, exp_dir, channel, heartbeat=5.0, flush_every=1.0):
+        self.client = client
+        self.worker = worker
+        self.exp_id = exp_id
+        self.exp_dir = exp_dir
+        self.channel = channel
+        self.heartbeat = heartbeat
+        self.flush_every = flush_every
+
+        self.lost = False # Lease taken away by the server, results are discarded
+        self.stopped = threading.Event()
+        self.uploaded = {} # file name -> mtime of the last upload
+        self.thread = threading.Thread(target=self.loop, daemon=True)
+
+
+    def start(self):
+        self.thread.start()
+        return self
+
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+
+    def loop(self):
+        last_beat = 0.0
+        while not self.stopped.wait(self.flush_every):
+            try:
+                self.flush()
+                if time.time() - last_beat >= self.heartbeat:
+                    self.beat()
+                    self.sync_files()
+                    last_beat = time.time()
+
+            except OSError as e:
+                logger.warning('[Worker] Server unreachable: {}'.format(e))
+
+
+    # Post pending store writes and events in order
+    def flush(self):
+        messages = self.channel.drain()
+        if not messages or self.lost:
+            return
+
+        try:
+            code, data = self.client.post('/{}/messages'.format(self.exp_id), {
+                'worker': self.worker,
+                'messages': messages
+            })
+        except OSError:
+            self.channel.restore(messages)
+            raise
+
+        if code == 409:
+            self.lose()
+        self.check_stop(data)
+
+
+    def beat(self):
+        if self.lost:
+            return
+
+        code, data = self.client.post('/{}/heartbeat'.format(self.exp_id), {'worker': self.worker})
+        if code == 409:
+            self.lose()
+        self.check_stop(data)
+
+
+    # Early stopping decided on the server, the local trainer sees the same stop token
+    def check_stop(self, data):
+        if data and data.get('stop'):
+            request_stop(self.exp_dir)
+
+
+    # Upload checkpoints and metrics written since the last upload
+    def sync_files(self, force=False):
+        if self.lost:
+            return
+
+        for name in SYNC_FILES:
+            path = os.path.join(self.exp_dir, name)
+            if not os.path.exists(path):
+                continue
+
+            mtime = os.path.getmtime(path)
+            if not force and self.uploaded.get(name) == mtime:
+                continue
+
+            code, _ = self.client.upload('/{}/files/{}'.format(self.exp_id, name), path, worker=self.worker)
+            if code == 409:
+                self.lose()
+                return
+            self.uploaded[name] = mtime
+
+
+    def lose(self):
+        if not self.lost:
+            logger.warning('[Worker] Lease of {} was lost, results will be discarded'.format(self.exp_id))
+        self.lost = True
+
+
+# Agent leasing queued experiments from a server and training them locally
+class Worker:
+    def __init__(self, server, token, name=None, work_dir='worker', data_dir='data',
+                 poll=2.0, heartbeat=5.0, threads=None):
+        self.client = ServerClient(server, token)
+        self.name = name or '{}-{}'.format(socket.gethostname(), os.getpid())
+        self.work_dir = work_dir
+        self.data_dir = data_dir
+        self.poll = poll
+        self.heartbeat = heartbeat
+        self.budget = {'threads': threads, 'cores': None} if threads else None
+
+
+    # Lease and run jobs until interrupted, once=True returns after the first job
+    def serve(self, once=False):
+        logger.info('[Worker] {} serving {}'.format(self.name, self.client.base))
+
+        while True:
+            try:
+                code, job = self.client.post('/lease', {'worker': self.name})
+            except OSError as e:
+                logger.warning('[Worker] Server unreachable: {}'.format(e))
+                job = None
+
+            if job is None:
+                time.sleep(self.poll)
+                continue
+
+            self.run(job)
+            if once:
+                return
+
+
+    def run(self, job):
+        exp_id = job['id']
+        exp_dir = os.path.join(self.work_dir, exp_id)
+        os.makedirs(exp_dir, exist_ok=True)
+        clear_stop(exp_dir)
+        logger.info('[Worker] {} experiment {}'.format('Resume' if job['resume'] else 'Run', exp_id))
+
+        # Configs of the server, data is read from this machine
+        configs = job['configs']
+        configs['data']['dir'] = self.data_dir
+        with open(os.path.join(exp_dir, 'configs.yaml'), 'w') as f:
+            yaml.dump(configs, f)
+
+        # Checkpoints uploaded by the previous holder of the job
+        if job['resume']:
+            for name in [BEST_CHECKPOINT, LAST_CHECKPOINT, METRICS_FILE]:
+                self.client.download('/{}/files/{}'.format(exp_id, name), os.path.join(exp_dir, name), worker=self.name)
+
+        channel = RemoteChannel()
+        sync = JobSync(self.client, self.name, exp_id, exp_dir, channel, heartbeat=self.heartbeat).start()
+
+        error = None
+        try:
+            apply_seed(job.get('seed'))
+            budget = apply_budget(self.budget) if self.budget else None
+            exp = Experiment(exp_dir, store=ChannelStore(channel), events=ChannelEvents(channel))
+            exp.start(resume=job['resume'], budget=budget)
+
+        except Exception as e:
+            logger.exception('[Worker] Experiment {} failed'.format(exp_id))
+            error = repr(e)
+
+        finally:
+            sync.stop()
+
+        # Final state, retried until the server answers
+        while True:
+            try:
+                sync.flush()
+                sync.sync_files(force=True)
+                if not sync.lost:
+                    self.client.post('/{}/finish'.format(exp_id), {'worker': self.name, 'error': error})
+                break
+            except OSError as e:
+                logger.warning('[Worker] Server unreachable: {}'.format(e))
+                time.sleep(self.poll)
+
+        logger.info('[Worker] Experiment {} {}'.format(exp_id, 'discarded' if sync.lost else 'reported'))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Train experiments queued on a remote server')
+    parser.add_argument('--server', type=str, required=True, help='host:port of the API server')
+    parser.add_argument('--token', type=str, default=os.environ.get('WORKER_TOKEN'),
+                        help='worker.token of the server configs, $WORKER_TOKEN by default')
+    parser.add_argument('--name', type=str, default=None, help='worker name, hostname-pid by default')
+    parser.add_argument('--work_dir', type=str, default='worker', help='local experiment directories')
+    parser.add_argument('--data_dir', type=str, default='data', help='local dataset directory')
+    parser.add_argument('--poll', type=float, default=2.0, help='seconds between lease attempts')
+    parser.add_argument('--heartbeat', type=float, default=5.0, help='seconds between heartbeats')
+    parser.add_argument('--threads', type=int, default=None, help='torch threads per experiment')
+    args = parser.parse_args()
+    if not args.token:
+        parser.error('a worker token is required, pass --token or set WORKER_TOKEN')
+
+    Worker(
+        server=args.server,
+        token=args.token,
+        name=args.name,
+        work_dir=os.path.join(args.work_dir, args.name) if args.name else args.work_dir,
+        data_dir=args.data_dir,
+        poll=args.poll,
+        heartbeat=args.heartbeat,
+        threads=args.threads
+    ).serve()
@@ -41,6 +41,33 @@ def main():
     aicore.seed(configs['exp']['seed'])
     pathlib.Path(configs['exp']['dir']).mkdir(parents=True, exist_ok=True)
     
+    # Prepare metadata store
+    logger.info('Opening metadata store at {}'.format(configs['exp']['db']))
+    store = aicore.configure_store(configs['exp']['db'])
+    store.migrate(configs['exp']['dir'])
+    
+    # Share loaded datasets between experiments
+    aicore.configure_registry(configs['data']['cache_size'])
+    
+    # Start training slots
+    executor = aicore.make_executor(configs['exp']['dir'], configs['executor'], seed=configs['exp']['seed'])
+    scheduler = aicore.configure_scheduler(
+        configs['exp']['dir'], 
+        configs['scheduler']['slots'], 
+        executor=executor,
+        threads=configs['scheduler']['threads'],
+        pin_cores=configs['scheduler']['pin_cores'],
+        lease_timeout=configs['worker']['lease_timeout'],
+        cohort_size=configs['scheduler']['cohort_size']
+    )
+    
+    # Stop the worst sweep trials at rung epochs
+    aicore.configure_early_stop(configs['exp']['dir'], store)
+    
+    # Experiments interrupted by a restart continue from their last checkpoint
+    scheduler.recover()
+    scheduler.start()
+    
     ### === Flask Server === ###
     # Run server
     logger.info('Server is listening at {}!'.format(configs['app']['port']))
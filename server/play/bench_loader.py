@@ -0,0 +1,65 @@
+import sys
+import time
+import argparse
+
+import torch
+import torch.utils.data as data
+from torchvision import datasets, transforms
+
+sys.path.append('.')
+from aicore.dataset import MemmapDataset, TensorBatchLoader, BatchTransform, MNIST_MEAN, MNIST_STD
+
+# Usage (from server/): python play/bench_loader.py --root data --epochs 2
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--root', type=str, default='data')
+parser.add_argument('--batch_size', type=int, default=64)
+parser.add_argument('--epochs', type=int, default=2)
+args = parser.parse_args()
+
+transform_configs = [{'name': 'to_tensor'}, {'name': 'normalize'}]
+batch_transform = BatchTransform(transform_configs)
+
+
+# Samples/sec of one full pass, batches converted to float input as in Trainer.train
+def bench(name, loader, transform):
+    n_samples = 0
+    start = time.perf_counter()
+
+    for _ in range(args.epochs):
+        for images, labels in loader:
+            images = transform(images)
+            n_samples += labels.shape[0]
+
+    elapsed = time.perf_counter() - start
+    print('{:<28} {:>12,.0f} samples/sec'.format(name, n_samples / elapsed))
+    return n_samples / elapsed
+
+
+# Per-sample torchvision transforms + DataLoader
+torchvision_dataset = datasets.MNIST(
+    root=args.root, train=True, download=True,
+    transform=transforms.Compose([transforms.ToTensor(), transforms.Normalize(MNIST_MEAN, MNIST_STD)])
+)
+base = bench(
+    'torchvision + DataLoader',
+    data.DataLoader(torchvision_dataset, batch_size=args.batch_size, shuffle=True),
+    lambda x: x
+)
+
+# uint8 memmap + DataLoader, normalized per batch
+memmap_dataset = MemmapDataset(args.root, train=True)
+bench(
+    'memmap + DataLoader',
+    data.DataLoader(memmap_dataset, batch_size=args.batch_size, shuffle=True),
+    batch_transform
+)
+
+# uint8 tensors + index slicing, normalized per batch
+tensor = bench(
+    'memmap + TensorBatchLoader',
+    TensorBatchLoader(memmap_dataset, batch_size=args.batch_size, shuffle=True),
+    batch_transform
+)
+
+print('Speedup over torchvision + DataLoader: {:.1f}x'.format(tensor / base))
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, make_response, \
     redirect, render_template
-from . import exp # Submodules
+from . import exp, sweep, worker # Submodules
 
 
 module = Blueprint('root', __name__)
@@ -16,9 +16,13 @@ def configure(_configs):
     
     # Config submodules
     exp.configure(configs)
+    sweep.configure(configs)
+    worker.configure(configs)
 
 # Register submodules
 module.register_blueprint(exp.module, url_prefix='/exp')
+module.register_blueprint(sweep.module, url_prefix='/sweep')
+module.register_blueprint(worker.module, url_prefix='/worker')
 
 
 # Preflight requests
@@ -1,15 +1,12 @@
 import os
-import yaml
 import shutil
-import pathlib
-import threading
+import queue
 from loguru import logger
-from flask import Blueprint, request
+from flask import Blueprint, Response, request, stream_with_context
 
 from .utils import *
 from aicore import *
-from utils.request import generate_response
-from utils.common import generate_random_string
+from utils.request import generate_response, generate_event
 
 module = Blueprint('exp', __name__)
 
@@ -33,92 +30,165 @@ def experiment_create():
             message='Data format must be JSON!'
         ), 400
     
-    exp_configs = request.get_json()
-    if 'data' not in exp_configs:
-        exp_configs['data'] = {}
-    exp_configs['data']['dir'] = configs['data']['dir']
-    if 'train' not in exp_configs:
-        exp_configs['train'] = {}
-    exp_configs['train']['log_every'] = configs['exp']['log_every']
     logger.info('[Experiment][Create] Recieve request')
+    exp_id, created, error = create_experiment(request.get_json(), configs)
+    
+    if error is not None:
+        return generate_response(
+            data=None,
+            success=False,
+            message=error
+        ), 400
     
     # Verify duplication
-    for exist_id in os.listdir(configs['exp']['dir']):
-
-        with open(os.path.join(configs['exp']['dir'], exist_id, 'configs.yaml'), 'r') as f:
-            exist_configs = yaml.full_load(f)
-            
-            if exp_configs == exist_configs:
-                
-                logger.error('[Experiment][Create] Experiment exists: {}'.format(exist_id))
-                
-                return generate_response(
-                    data=None,
-                    success=False,
-                    message='Experiment exists: {}'.format(exist_id)
-                ), 400
-    
-    # Save experiment configs to local
-    exp_id = generate_random_string(configs['exp']['name_len'])
-    exp_dir = os.path.join(configs['exp']['dir'], exp_id)
-    pathlib.Path(exp_dir).mkdir(parents=True, exist_ok=True)
-    
-    yaml_configs = yaml.dump(exp_configs)
-    config_path = os.path.join(exp_dir, 'configs.yaml')
-    with open(config_path, 'w') as f:
-        f.write(yaml_configs)
-    logger.info('[Experiment][Create] Experiment config save at {}'.format(config_path))
-    
-    # Verify configuration
-    try:
-        exp = Experiment(exp_dir)
-        logger.success('[Experiment][Create] Experiment {} is valid'.format(exp_id))
-        exp.status.create()
-        
+    if not created:
         return generate_response(
-            data={
-                'id': exp_id
-            },
-            success=True,
-            message='Create experiment success!'
-        ), 200
+            data=None,
+            success=False,
+            message='Experiment exists: {}'.format(exp_id)
+        ), 400
     
-    except Exception as e: 
-        logger.exception('[Experiment][Create] Experiment {} is invalid'.format(exp_id))
-        shutil.rmtree(exp_dir) # Delete that experiment
-        
+    return generate_response(
+        data={
+            'id': exp_id
+        },
+        success=True,
+        message='Create experiment success!'
+    ), 200
+
+
+# Shapes and parameter counts of a model config, without building it
+@module.route('/validate', methods=['POST'])
+def experiment_validate():
+
+    if not request.is_json:
         return generate_response(
             data=None,
             success=False,
-            message='Config format is invalid: {}'.format(repr(e))
+            message='Data format must be JSON!'
+        ), 400
+
+    body = request.get_json()
+    if not isinstance(body, dict) or not isinstance(body.get('model', {}), dict):
+        return generate_response(
+            data=None,
+            success=False,
+            message='Body must be an object with a "model" object'
         ), 400
-        
 
-# List all available experiment
+    report = validate_layers(body.get('model', {}).get('layers'))
+    return generate_response(
+        data=report,
+        success=report['valid'],
+        message='Valid model structure' if report['valid'] else shape_error_message(report)
+    ), 200
+
+
+# List one page of experiments, filtered and sorted on server side
 @module.route('/list', methods=['GET'])
 def experiment_list():
     
     logger.info('[Experiment][List] Recieve request')
-    if os.path.exists(configs['exp']['dir']):
-        exp_ids = os.listdir(configs['exp']['dir'])
-    else:
-        pathlib.Path(configs['exp']['dir']).mkdir(parents=True, exist_ok=True)
-        exp_ids = []
     
-    data = {}
-    for exp_id in exp_ids:
-        status_path = os.path.join(configs['exp']['dir'], exp_id, 'status.yaml')
+    # Nothing changed since the client's copy
+    seq = get_store().current_seq()
+    headers = {'ETag': 'W/"{}"'.format(seq)}
+    if request.if_none_match.contains_weak(str(seq)):
+        logger.info('[Experiment][List] Not modified')
+        return '', 304, headers
+    
+    # Incremental mode: only changes after a sequence number
+    if 'since' in request.args:
+        return experiment_changes(headers)
+    
+    # Extract query parameters
+    try:
+        statuses = request.args.get('status')
+        statuses = expand_statuses(statuses.split(',')) if statuses else None
+        
+        limit = int(request.args.get('limit', configs['exp']['page_size']))
+        if limit < 1:
+            raise ValueError('Limit must be positive')
+        limit = min(limit, configs['exp']['max_page_size'])
+        
+        order = request.args.get('order', 'desc')
+        if order not in ['asc', 'desc']:
+            raise ValueError('Unsupported order "{}"'.format(order))
         
-        with open(status_path, 'r') as f:
-            status = yaml.full_load(f)
-        data[exp_id] = status
-    logger.success('[Experiment][List] List: {}'.format(exp_ids))
+        items, next_cursor = get_store().query(
+            statuses=statuses,
+            sort_by=request.args.get('sort_by', 'created'),
+            dataset=request.args.get('dataset', 'train'),
+            order=order,
+            limit=limit,
+            cursor=request.args.get('cursor')
+        )
+        
+    except ValueError as e:
+        logger.error('[Experiment][List] Invalid parameters: {}'.format(e))
+        return generate_response(
+            data=None,
+            success=False,
+            message='Invalid parameters: {}'.format(e)
+        ), 400
+    
+    # Count experiments per status group
+    counts = get_store().count_by_status()
+    group_counts = {
+        group: sum(counts.get(status, 0) for status in group_statuses)
+        for group, group_statuses in STATUS_GROUPS.items()
+    }
+    group_counts['total'] = sum(counts.values())
+    
+    data = {
+        'items': items,
+        'next': next_cursor,
+        'counts': group_counts,
+        'seq': seq
+    }
+    logger.success('[Experiment][List] List: {}'.format([item['id'] for item in items]))
     
     return generate_response(
         data=data,
         success=True,
         message='List experiment success!'
-    ), 200
+    ), 200, headers
+
+
+# Experiments created, updated or deleted after the given sequence
+def experiment_changes(headers):
+    
+    try:
+        since = int(request.args['since'])
+        limit = int(request.args.get('limit', configs['exp']['max_page_size']))
+        if since < 0 or limit < 1:
+            raise ValueError('Since and limit must be positive')
+        limit = min(limit, configs['exp']['max_page_size'])
+        
+    except ValueError as e:
+        logger.error('[Experiment][List] Invalid parameters: {}'.format(e))
+        return generate_response(
+            data=None,
+            success=False,
+            message='Invalid parameters: {}'.format(e)
+        ), 400
+    
+    items, deleted, seq, more = get_store().changes(since, limit=limit)
+    data = {
+        'items': items,
+        'deleted': deleted,
+        'seq': seq,
+        'more': more
+    }
+    logger.success('[Experiment][List] Changes since {}: {} updated, {} deleted'.format(
+        since, len(items), len(deleted)
+    ))
+    
+    return generate_response(
+        data=data,
+        success=True,
+        message='List changes success!'
+    ), 200, headers
     
 
 # Delete an experiment
@@ -137,7 +207,7 @@ def experiment_delete():
     
     exp_id = request.get_json()['id']
     
-    if not exp_exists(exp_id, configs['exp']['dir']):
+    if not exp_exists(exp_id):
         
         logger.info('[Experiment][Delete] Id not exists')
         return generate_response(
@@ -147,11 +217,8 @@ def experiment_delete():
         ), 400
         
     else:
-        exp_dir = os.path.join(configs['exp']['dir'])
-        status = StatusManager(exp_dir)
-        
         # Check current status
-        if status() not in ['create', 'done']:
+        if get_store().get_status(exp_id) not in ['create', 'done', 'failed', 'stopped']:
             logger.error('[Experiment][Delete] Experiment {} is currently running'.format(exp_id))
             return generate_response(
                 data=None,
@@ -160,6 +227,7 @@ def experiment_delete():
             ), 400
         
         shutil.rmtree(os.path.join(configs['exp']['dir'], exp_id))
+        get_store().delete(exp_id)
         logger.success('[Experiment][Delete] Experiment {} deleted'.format(exp_id))
         
         return generate_response(
@@ -186,7 +254,7 @@ def experiment_start():
     
     exp_id = request.get_json()['id']
     
-    if not exp_exists(exp_id, configs['exp']['dir']):
+    if not exp_exists(exp_id):
         
         logger.info('[Experiment][Start] Id not exists')
         return generate_response(
@@ -201,7 +269,7 @@ def experiment_start():
         exp = Experiment(exp_dir)
         
         # Check current status
-        if exp.status() not in ['create', 'done']:
+        if exp.status() not in ['create', 'done', 'failed', 'stopped']:
             logger.error('[Experiment][Start] Experiment {} is currently running'.format(exp_id))
             return generate_response(
                 data=None,
@@ -222,19 +290,77 @@ def experiment_start():
                 message='Fail to start: {}'.format(repr(e))
             ), 400
             
-        # Start experiment in background
-        def start_thread():
-            exp.start()
-        threading.Thread(target=start_thread).start()
+        # Queue experiment for a training slot
+        position = get_scheduler().submit(exp_id)
         
-        logger.success('[Experiment][Start] Experiment {} started'.format(exp_id))
+        logger.success('[Experiment][Start] Experiment {} queued at position {}'.format(exp_id, position))
         return generate_response(
-            data=None,
+            data={
+                'id': exp_id,
+                'position': position,
+                'depth': get_scheduler().depth()
+            },
             success=True,
-            message='Experiment {} started!'.format(exp_id)
+            message='Experiment {} queued at position {}!'.format(exp_id, position)
         ), 200      
 
 
+# Continue a failed experiment from its last full-state checkpoint
+@module.route('/resume', methods=['POST'])
+def experiment_resume():
+    
+    logger.info('[Experiment][Resume] Recieve request')
+    # Extract configs from request
+    if not request.is_json:
+        return generate_response(
+            data=None,
+            success=False,
+            message='Data format must be JSON!'
+        ), 400
+    
+    exp_id = request.get_json()['id']
+    
+    if not exp_exists(exp_id):
+        
+        logger.info('[Experiment][Resume] Id not exists')
+        return generate_response(
+            data=None,
+            success=False,
+            message='Experiment ID not found!'
+        ), 400
+    
+    # Check current status
+    if get_store().get_status(exp_id) not in ['failed']:
+        logger.error('[Experiment][Resume] Experiment {} has not failed'.format(exp_id))
+        return generate_response(
+            data=None,
+            success=False,
+            message='Only failed experiments can be resumed'
+        ), 400
+    
+    if not has_checkpoint(os.path.join(configs['exp']['dir'], exp_id)):
+        logger.error('[Experiment][Resume] Experiment {} has no checkpoint'.format(exp_id))
+        return generate_response(
+            data=None,
+            success=False,
+            message='Experiment {} has no checkpoint to resume from'.format(exp_id)
+        ), 400
+    
+    # Queue experiment for a training slot
+    position = get_scheduler().submit(exp_id, resume=True)
+    
+    logger.success('[Experiment][Resume] Experiment {} queued at position {}'.format(exp_id, position))
+    return generate_response(
+        data={
+            'id': exp_id,
+            'position': position,
+            'depth': get_scheduler().depth()
+        },
+        success=True,
+        message='Experiment {} queued at position {}!'.format(exp_id, position)
+    ), 200
+
+
 @module.route('/info', methods=['POST'])
 def experiment_info():
     
@@ -249,7 +375,7 @@ def experiment_info():
     
     exp_id = request.get_json()['id']
     
-    if not exp_exists(exp_id, configs['exp']['dir']):
+    if not exp_exists(exp_id):
         
         logger.info('[Experiment][Info] Id not exists')
         return generate_response(
@@ -265,18 +391,16 @@ def experiment_info():
         with open(os.path.join(exp_dir, 'model.log'), 'r') as f:
             model_log = f.read()
             
-        # Read model config
-        with open(os.path.join(exp_dir, 'configs.yaml'), 'r') as f:
-            exp_config = yaml.full_load(f)
-
-        # Read status 
-        with open(os.path.join(exp_dir, 'status.yaml'), 'r') as f:
-            exp_status = yaml.full_load(f)
+        # Read model config and status
+        exp_config = get_store().get_configs(exp_id)
+        exp_status = get_store().get(exp_id)
         
         data = {
             'model': model_log,
             'config': exp_config,
-            'status': exp_status
+            'status': exp_status,
+            'queue': get_scheduler().position(exp_id),
+            'resumable': has_checkpoint(exp_dir)
         }
     
         logger.success('[Experiment][Info] Get experiment {} info success'.format(exp_id))
@@ -284,4 +408,166 @@ def experiment_info():
             data=data,
             success=True,
             message='Get info success'
-        )
\ No newline at end of file
+        )
+
+
+# Queue depth, queued experiments and running slots
+@module.route('/queue', methods=['GET'])
+def experiment_queue():
+    
+    logger.info('[Experiment][Queue] Recieve request')
+    data = get_scheduler().snapshot(limit=configs['exp']['max_page_size'])
+    
+    logger.success('[Experiment][Queue] Depth: {}'.format(data['depth']))
+    return generate_response(
+        data=data,
+        success=True,
+        message='Get queue success'
+    ), 200
+
+
+# Stream status transitions, epoch updates and losses as server-sent events
+@module.route('/<exp_id>/events', methods=['GET'])
+def experiment_events(exp_id):
+    
+    logger.info('[Experiment][Events] Recieve request')
+    if not exp_exists(exp_id):
+        
+        logger.info('[Experiment][Events] Id not exists')
+        return generate_response(
+            data=None,
+            success=False,
+            message='Experiment ID not found!'
+        ), 400
+    
+    # Subscribe before reading the snapshot so no event is missed in between
+    subscription = bus.subscribe(exp_id)
+    
+    def stream():
+        try:
+            yield generate_event('snapshot', get_store().get(exp_id))
+            
+            while True:
+                try:
+                    event, data = subscription.get(timeout=configs['exp']['keepalive'])
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                    
+                yield generate_event(event, data)
+                
+        finally:
+            bus.unsubscribe(exp_id, subscription)
+            logger.info('[Experiment][Events] Listener of {} disconnected'.format(exp_id))
+    
+    logger.success('[Experiment][Events] Streaming events of {}'.format(exp_id))
+    return Response(
+        stream_with_context(stream()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+
+# Fields, number of points and method of a metrics request
+def metrics_params():
+    fields = request.args.get('fields', 'loss').split(',')
+    for field in fields:
+        if field not in METRIC_FIELDS:
+            raise ValueError('Field must be one of {}'.format(METRIC_FIELDS))
+    
+    points = int(request.args.get('points', configs['exp']['metrics_points']))
+    if points < 2:
+        raise ValueError('Points must be at least 2')
+    points = min(points, configs['exp']['max_metrics_points'])
+    
+    method = request.args.get('method', 'lttb')
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError('Method must be one of {}'.format(DOWNSAMPLE_METHODS))
+    
+    return fields, points, method
+
+
+# Training curves of an experiment, downsampled server-side
+@module.route('/<exp_id>/metrics', methods=['GET'])
+def experiment_metrics(exp_id):
+    
+    logger.info('[Experiment][Metrics] Recieve request')
+    if not exp_exists(exp_id):
+        
+        logger.info('[Experiment][Metrics] Id not exists')
+        return generate_response(
+            data=None,
+            success=False,
+            message='Experiment ID not found!'
+        ), 400
+    
+    try:
+        fields, points, method = metrics_params()
+        
+    except ValueError as e:
+        logger.error('[Experiment][Metrics] Invalid parameters: {}'.format(e))
+        return generate_response(
+            data=None,
+            success=False,
+            message='Invalid parameters: {}'.format(e)
+        ), 400
+    
+    data = metrics_series(os.path.join(configs['exp']['dir'], exp_id), fields, points, method=method)
+    data['id'] = exp_id
+    
+    logger.success('[Experiment][Metrics] {} of {} steps'.format(fields, data['total']))
+    return generate_response(
+        data=data,
+        success=True,
+        message='Get metrics success'
+    ), 200
+
+
+# Training curves of several experiments for comparison
+@module.route('/metrics', methods=['GET'])
+def experiment_metrics_compare():
+    
+    logger.info('[Experiment][Metrics] Recieve compare request')
+    try:
+        exp_ids = [exp_id for exp_id in request.args.get('ids', '').split(',') if exp_id]
+        if not exp_ids:
+            raise ValueError('At least one id is required')
+        if len(exp_ids) > configs['exp']['max_compare']:
+            raise ValueError('At most {} ids can be compared'.format(configs['exp']['max_compare']))
+        
+        fields, points, method = metrics_params()
+        
+    except ValueError as e:
+        logger.error('[Experiment][Metrics] Invalid parameters: {}'.format(e))
+        return generate_response(
+            data=None,
+            success=False,
+            message='Invalid parameters: {}'.format(e)
+        ), 400
+    
+    missing = [exp_id for exp_id in exp_ids if not exp_exists(exp_id)]
+    if missing:
+        logger.info('[Experiment][Metrics] Ids not exist: {}'.format(missing))
+        return generate_response(
+            data=None,
+            success=False,
+            message='Experiment ID not found: {}'.format(', '.join(missing))
+        ), 400
+    
+    items = []
+    for exp_id in exp_ids:
+        item = metrics_series(os.path.join(configs['exp']['dir'], exp_id), fields, points, method=method)
+        item['id'] = exp_id
+        items.append(item)
+    
+    logger.success('[Experiment][Metrics] Compare {}'.format(exp_ids))
+    return generate_response(
+        data={
+            'items': items
+        },
+        success=True,
+        message='Get metrics success'
+    ), 200
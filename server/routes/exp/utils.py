@@ -1,7 +1,64 @@
 import os
+import yaml
+import shutil
+import pathlib
+from loguru import logger
 
-def exp_exists(exp_id, exp_dir):
-    if os.path.exists(exp_dir):
-        return exp_id in os.listdir(exp_dir)
-    else:
-        return False
\ No newline at end of file
+from aicore import get_store, Experiment, validate_layers, shape_error_message
+from utils.common import generate_random_string
+
+def exp_exists(exp_id):
+    return get_store().exists(exp_id)
+
+
+# Normalize, deduplicate, validate and register experiment configs
+# Returns (exp_id, created, error): an existing id with created=False for duplicates, None and the error if invalid
+def create_experiment(exp_configs, configs):
+    
+    if not isinstance(exp_configs, dict) or any(
+        not isinstance(exp_configs.get(key, {}), dict) for key in ['model', 'data', 'train']
+    ):
+        logger.error('[Experiment][Create] Configs are not an object')
+        return None, False, 'Configs must be an object with "model", "data" and "train" objects'
+    
+    if 'data' not in exp_configs:
+        exp_configs['data'] = {}
+    exp_configs['data']['dir'] = configs['data']['dir']
+    if 'train' not in exp_configs:
+        exp_configs['train'] = {}
+    exp_configs['train']['log_every'] = configs['exp']['log_every']
+    
+    # Reject broken models before anything is written
+    shapes = validate_layers(exp_configs.get('model', {}).get('layers'))
+    if not shapes['valid']:
+        logger.error('[Experiment][Create] Invalid model structure: {}'.format(shape_error_message(shapes)))
+        return None, False, 'Invalid model structure. {}'.format(shape_error_message(shapes))
+    
+    # Verify duplication
+    exist_id = get_store().find_by_configs(exp_configs)
+    if exist_id is not None:
+        logger.error('[Experiment][Create] Experiment exists: {}'.format(exist_id))
+        return exist_id, False, None
+    
+    # Save experiment configs to local
+    exp_id = generate_random_string(configs['exp']['name_len'])
+    exp_dir = os.path.join(configs['exp']['dir'], exp_id)
+    pathlib.Path(exp_dir).mkdir(parents=True, exist_ok=True)
+    
+    yaml_configs = yaml.dump(exp_configs)
+    config_path = os.path.join(exp_dir, 'configs.yaml')
+    with open(config_path, 'w') as f:
+        f.write(yaml_configs)
+    logger.info('[Experiment][Create] Experiment config save at {}'.format(config_path))
+    
+    # Verify configuration
+    try:
+        exp = Experiment(exp_dir)
+        logger.success('[Experiment][Create] Experiment {} is valid'.format(exp_id))
+        exp.status.create()
+        return exp_id, True, None
+    
+    except Exception as e: 
+        logger.exception('[Experiment][Create] Experiment {} is invalid'.format(exp_id))
+        shutil.rmtree(exp_dir) # Delete that experiment
+        return None, False, 'Config format is invalid: {}'.format(repr(e))
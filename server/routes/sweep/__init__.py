@@ -0,0 +1,223 @@
+from loguru import logger
+from flask import Blueprint, request
+
+from aicore import *
+from routes.exp.utils import create_experiment
+from utils.request import generate_response
+from utils.common import generate_random_string, get_current_timestring
+
+module = Blueprint('sweep', __name__)
+
+# Configs
+configs = None
+
+def configure(_configs):
+    global configs
+    configs = _configs
+
+
+# Ranking of a sweep's trials, from the request or the sweep's own metric
+def ranking(spec):
+    metric = spec.get('metric', {})
+    sort_by = request.args.get('sort_by', metric.get('sort_by', 'accuracy'))
+    dataset = request.args.get('dataset', metric.get('dataset', 'valid'))
+    order = request.args.get('order', metric.get('order', 'desc'))
+
+    return check_ranking(sort_by, dataset, order)
+
+
+# Raises ValueError when the criterion, dataset or order is unsupported
+def check_ranking(sort_by, dataset, order):
+    sort_column(sort_by, dataset)
+    if order not in ['asc', 'desc']:
+        raise ValueError('Order must be asc or desc')
+    return sort_by, dataset, order
+
+
+# Expand a search space into experiments and queue them
+@module.route('/create', methods=['POST'])
+def sweep_create():
+
+    logger.info('[Sweep][Create] Recieve request')
+    if not request.is_json:
+        return generate_response(
+            data=None,
+            success=False,
+            message='Data format must be JSON!'
+        ), 400
+
+    body = request.get_json()
+    spec = {
+        'base': body.get('base', {}),
+        'method': body.get('method', 'grid'),
+        'space': body.get('space', {}),
+        'n_trials': body.get('n_trials'),
+        'seed': body.get('seed'),
+        'metric': body.get('metric', {'sort_by': 'accuracy', 'dataset': 'valid', 'order': 'desc'}),
+        'early_stop': body.get('early_stop')
+    }
+
+    try:
+        for key in ['base', 'space', 'metric']:
+            if not isinstance(spec[key], dict):
+                raise ValueError('"{}" must be an object'.format(key))
+
+        trial_params = expand_space(
+            spec['space'],
+            method=spec['method'],
+            n_trials=spec['n_trials'],
+            seed=spec['seed'],
+            max_trials=configs['sweep']['max_trials']
+        )
+        trial_configs = [apply_params(spec['base'], params) for params in trial_params]
+        check_ranking(
+            spec['metric'].get('sort_by', 'accuracy'),
+            spec['metric'].get('dataset', 'valid'),
+            spec['metric'].get('order', 'desc')
+        )
+        spec['early_stop'] = early_stop_policy(spec['early_stop'])
+
+    except (ValueError, KeyError, IndexError, TypeError) as e:
+        logger.error('[Sweep][Create] Invalid search space: {}'.format(e))
+        return generate_response(
+            data=None,
+            success=False,
+            message='Invalid search space: {}'.format(repr(e))
+        ), 400
+
+    # Every trial goes through the same dedup and validation as /exp/create
+    trials, errors = [], []
+    for index, (params, exp_configs) in enumerate(zip(trial_params, trial_configs)):
+        exp_id, created, error = create_experiment(exp_configs, configs)
+        if error is not None:
+            errors.append({'trial': index, 'params': params, 'error': error})
+        else:
+            trials.append((exp_id, params))
+
+    if not trials:
+        return generate_response(
+            data={
+                'errors': errors
+            },
+            success=False,
+            message='No valid trial in sweep'
+        ), 400
+
+    sweep_id = generate_random_string(configs['exp']['name_len'])
+    get_store().insert_sweep(sweep_id, spec, trials, created=get_current_timestring())
+
+    # Queue trials not run yet, finished duplicates keep their result
+    queued = 0
+    if body.get('start', True):
+        for exp_id in dict(trials):
+            if get_store().get_status(exp_id) in ['create', 'failed']:
+                get_scheduler().submit(exp_id)
+                queued += 1
+
+    logger.success('[Sweep][Create] Sweep {}: {} trials, {} queued, {} invalid'.format(
+        sweep_id, len(trials), queued, len(errors)
+    ))
+    return generate_response(
+        data={
+            'id': sweep_id,
+            'trials': len(trials),
+            'queued': queued,
+            'errors': errors
+        },
+        success=True,
+        message='Create sweep success!'
+    ), 200
+
+
+@module.route('/list', methods=['GET'])
+def sweep_list():
+
+    logger.info('[Sweep][List] Recieve request')
+    return generate_response(
+        data={
+            'items': get_store().sweeps(limit=configs['exp']['max_page_size'])
+        },
+        success=True,
+        message='List sweep success!'
+    ), 200
+
+
+# Sweep spec, trial counts per status group and best trial
+@module.route('/<sweep_id>', methods=['GET'])
+def sweep_info(sweep_id):
+
+    logger.info('[Sweep][Info] Recieve request')
+    sweep = get_store().get_sweep(sweep_id)
+    if sweep is None:
+        return generate_response(
+            data=None,
+            success=False,
+            message='Sweep ID not found!'
+        ), 400
+
+    try:
+        sort_by, dataset, order = ranking(sweep['spec'])
+    except ValueError as e:
+        return generate_response(
+            data=None,
+            success=False,
+            message='Invalid parameters: {}'.format(e)
+        ), 400
+
+    counts = get_store().sweep_counts(sweep_id)
+    group_counts = {
+        group: sum(counts.get(status, 0) for status in group_statuses)
+        for group, group_statuses in STATUS_GROUPS.items()
+    }
+    group_counts['total'] = sum(counts.values())
+
+    best = get_store().sweep_trials(sweep_id, sort_by=sort_by, dataset=dataset, order=order, limit=1)
+    sweep['counts'] = group_counts
+    sweep['best'] = best[0] if best and 'result' in best[0] else None
+
+    logger.success('[Sweep][Info] Sweep {}: {}'.format(sweep_id, group_counts))
+    return generate_response(
+        data=sweep,
+        success=True,
+        message='Get sweep success'
+    ), 200
+
+
+# Trials ranked by a metric
+@module.route('/<sweep_id>/leaderboard', methods=['GET'])
+def sweep_leaderboard(sweep_id):
+
+    logger.info('[Sweep][Leaderboard] Recieve request')
+    sweep = get_store().get_sweep(sweep_id)
+    if sweep is None:
+        return generate_response(
+            data=None,
+            success=False,
+            message='Sweep ID not found!'
+        ), 400
+
+    try:
+        sort_by, dataset, order = ranking(sweep['spec'])
+        limit = min(int(request.args.get('limit', configs['exp']['page_size'])), configs['exp']['max_page_size'])
+        if limit < 1:
+            raise ValueError('Limit must be positive')
+
+    except ValueError as e:
+        return generate_response(
+            data=None,
+            success=False,
+            message='Invalid parameters: {}'.format(e)
+        ), 400
+
+    items = get_store().sweep_trials(sweep_id, sort_by=sort_by, dataset=dataset, order=order, limit=limit)
+    return generate_response(
+        data={
+            'id': sweep_id,
+            'sort_by': sort_by,
+            'dataset': dataset,
+            'order': order,
+            'items': items
+        },
+        success=True,
+        message='Get leaderboard success'
+    ), 200
@@ -0,0 +1,249 @@
+import os
+import hmac
+from loguru import logger
+from flask import Blueprint, request, send_file
+
+from aicore import *
+from aicore.worker import SYNC_FILES, TOKEN_HEADER
+from utils.request import generate_response
+
+module = Blueprint('worker', __name__)
+
+# Configs
+configs = None
+
+def configure(_configs):
+    global configs
+    configs = _configs
+
+
+# Every worker route needs the shared token of configs worker.token, refused while none is set
+@module.before_request
+def check_token():
+    token = configs['worker'].get('token')
+    sent = request.headers.get(TOKEN_HEADER, '')
+    if token and hmac.compare_digest(sent.encode('utf-8'), str(token).encode('utf-8')):
+        return None
+
+    logger.warning('[Worker] Rejected request to {} from {}'.format(request.path, request.remote_addr))
+    return generate_response(
+        data=None,
+        success=False,
+        message='Invalid worker token'
+    ), 401
+
+
+# JSON object body with a worker name and the given keys, None when malformed
+def worker_body(**types):
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or not isinstance(body.get('worker'), str):
+        return None
+    for key, kind in types.items():
+        if not isinstance(body.get(key), kind):
+            return None
+    return body
+
+
+def malformed_body():
+    logger.error('[Worker] Malformed request to {}'.format(request.path))
+    return generate_response(
+        data=None,
+        success=False,
+        message='Body must be a JSON object with a worker name'
+    ), 400
+
+
+# Messages may only patch the run and result of the leased experiment, raises ValueError otherwise
+def check_message(message, exp_id):
+    if not isinstance(message, list) or not message:
+        raise ValueError('Message must be a list')
+
+    if message[0] == 'store':
+        _, method, args, kwargs = message
+        if method not in REMOTE_RELAY_METHODS:
+            raise ValueError('Store method "{}" cannot be relayed'.format(method))
+        if args != [exp_id]:
+            raise ValueError('Message targets experiment {}'.format(args))
+        if not isinstance(kwargs, dict) or any(
+            key not in ['run', 'result'] or not isinstance(value, (dict, type(None))) for key, value in kwargs.items()
+        ):
+            raise ValueError('Store update may only patch run and result')
+
+    elif message[0] == 'event':
+        _, target, event, data = message
+        if target != exp_id:
+            raise ValueError('Message targets experiment {}'.format(target))
+
+
+# Reject requests of workers not holding the experiment's lease
+def lease_conflict(exp_id, worker):
+    if get_store().lease_holder(exp_id) == worker:
+        return None
+
+    logger.warning('[Worker] {} does not hold the lease of {}'.format(worker, exp_id))
+    return generate_response(
+        data=None,
+        success=False,
+        message='Worker {} does not hold experiment {}'.format(worker, exp_id)
+    ), 409
+
+
+# Hand the oldest queued experiment to a worker
+@module.route('/lease', methods=['POST'])
+def worker_lease():
+
+    body = worker_body()
+    if body is None:
+        return malformed_body()
+
+    worker = body['worker']
+    job = get_scheduler().lease(worker)
+
+    if job is None:
+        return generate_response(
+            data=None,
+            success=True,
+            message='Queue is empty'
+        ), 200
+
+    exp_id, resume = job
+    logger.success('[Worker][Lease] Experiment {} leased to {}'.format(exp_id, worker))
+    return generate_response(
+        data={
+            'id': exp_id,
+            'resume': resume,
+            'seed': configs['exp']['seed'],
+            'configs': get_store().get_configs(exp_id)
+        },
+        success=True,
+        message='Experiment {} leased'.format(exp_id)
+    ), 200
+
+
+@module.route('/<exp_id>/heartbeat', methods=['POST'])
+def worker_heartbeat(exp_id):
+
+    body = worker_body()
+    if body is None:
+        return malformed_body()
+
+    worker = body['worker']
+    if not get_scheduler().heartbeat(exp_id, worker):
+        return lease_conflict(exp_id, worker)
+
+    return generate_response(
+        data={
+            'id': exp_id,
+            'stop': stop_requested(os.path.join(configs['exp']['dir'], exp_id))
+        },
+        success=True,
+        message='Lease renewed'
+    ), 200
+
+
+# Status writes and events of a remote experiment, in the worker channel format
+@module.route('/<exp_id>/messages', methods=['POST'])
+def worker_messages(exp_id):
+
+    body = worker_body(messages=list)
+    if body is None:
+        return malformed_body()
+
+    conflict = lease_conflict(exp_id, body['worker'])
+    if conflict is not None:
+        return conflict
+
+    try:
+        for message in body['messages']:
+
+            check_message(message, exp_id)
+            relay(message, get_store(), bus, methods=REMOTE_RELAY_METHODS)
+
+    except (ValueError, IndexError, TypeError) as e:
+        logger.error('[Worker][Messages] Invalid message: {}'.format(e))
+        return generate_response(
+            data=None,
+            success=False,
+            message='Invalid message: {}'.format(e)
+        ), 400
+
+    return generate_response(
+        data={
+            'count': len(body['messages']),
+            'stop': stop_requested(os.path.join(configs['exp']['dir'], exp_id))
+        },
+        success=True,
+        message='Messages applied'
+    ), 200
+
+
+# Checkpoints, metrics and model log uploaded by the worker
+@module.route('/<exp_id>/files/<name>', methods=['PUT'])
+def worker_upload(exp_id, name):
+
+    if name not in SYNC_FILES:
+        return generate_response(
+            data=None,
+            success=False,
+            message='File {} cannot be uploaded'.format(name)
+        ), 400
+
+    conflict = lease_conflict(exp_id, request.args.get('worker'))
+    if conflict is not None:
+        return conflict
+
+    # Replace atomically, readers never see a partial file
+    path = os.path.join(configs['exp']['dir'], exp_id, name)
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'wb') as f:
+        f.write(request.get_data())
+    os.replace(tmp_path, path)
+
+    return generate_response(
+        data={
+            'name': name,
+            'size': os.path.getsize(path)
+        },
+        success=True,
+        message='File {} uploaded'.format(name)
+    ), 200
+
+
+# Files a worker resumes from
+@module.route('/<exp_id>/files/<name>', methods=['GET'])
+def worker_download(exp_id, name):
+
+    conflict = lease_conflict(exp_id, request.args.get('worker'))
+    if conflict is not None:
+        return conflict
+
+    path = os.path.join(configs['exp']['dir'], exp_id, name)
+    if name not in SYNC_FILES or not os.path.exists(path):
+        return generate_response(
+            data=None,
+            success=False,
+            message='File {} not found'.format(name)
+        ), 404
+
+    return send_file(os.path.abspath(path), mimetype='application/octet-stream')
+
+
+# Remote experiment ended, with the error if it failed
+@module.route('/<exp_id>/finish', methods=['POST'])
+def worker_finish(exp_id):
+
+    body = worker_body()
+    if body is None:
+        return malformed_body()
+
+    if not get_scheduler().finish(exp_id, body['worker'], error=body.get('error')):
+        return lease_conflict(exp_id, body['worker'])
+
+    logger.success('[Worker][Finish] Experiment {} finished on {}'.format(exp_id, body['worker']))
+    return generate_response(
+        data={
+            'id': exp_id
+        },
+        success=True,
+        message='Experiment {} finished'.format(exp_id)
+    ), 200
@@ -0,0 +1,68 @@
+import os
+import json
+
+import copy
+
+import yaml
+import pytest
+import numpy as np
+
+from aicore.store import MetadataStore
+from aicore.manage import StatusManager
+
+
+CONFIGS = {
+    'model': {'layers': [
+        {'name': 'flatten'},
+        {'name': 'linear', 'in_shape': 784, 'out_shape': 16},
+        {'name': 'relu'},
+        {'name': 'linear', 'in_shape': 16, 'out_shape': 10}
+    ]},
+    'train': {'lr': 0.01, 'batch_size': 32, 'num_epochs': 2, 'loss': 'cross_entropy', 'optim': 'adam', 'log_every': 100},
+    'data': {'transforms': [{'name': 'to_tensor'}]}
+}
+
+
+# Small random dataset in the memmap format, no download needed
+@pytest.fixture
+def data_dir(tmp_path, n_samples=128):
+    data_dir = str(tmp_path / 'data')
+    memmap_dir = os.path.join(data_dir, 'memmap')
+    os.makedirs(memmap_dir)
+    rng = np.random.default_rng(0)
+
+    for split in ['train', 'test']:
+        rng.integers(0, 256, size=(n_samples, 1, 28, 28), dtype=np.uint8).tofile(os.path.join(memmap_dir, '{}-images.u8'.format(split)))
+        rng.integers(0, 10, size=n_samples, dtype=np.uint8).tofile(os.path.join(memmap_dir, '{}-labels.u8'.format(split)))
+        with open(os.path.join(memmap_dir, '{}.json'.format(split)), 'w') as f:
+            json.dump({'shape': [n_samples, 1, 28, 28]}, f)
+
+    return data_dir
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MetadataStore(str(tmp_path / 'metadata.db'))
+
+
+@pytest.fixture
+def exp_root(tmp_path):
+    return str(tmp_path / 'exps')
+
+
+# Creates an experiment directory and its row, train overrides the default train configs
+@pytest.fixture
+def create_exp(store, exp_root, data_dir):
+    def create(exp_id, **train):
+        configs = copy.deepcopy(CONFIGS)
+        configs['train'].update(train)
+        configs['data']['dir'] = data_dir
+
+        exp_dir = os.path.join(exp_root, exp_id)
+        os.makedirs(exp_dir)
+        with open(os.path.join(exp_dir, 'configs.yaml'), 'w') as f:
+            yaml.dump(configs, f)
+        StatusManager(exp_dir, store=store).create()
+        return exp_dir
+
+    return create
@@ -0,0 +1,48 @@
+import os
+import pickle
+import inspect
+
+import pytest
+import torch
+
+from aicore.checkpoint import load_state, safe_pickle, rng_state
+
+
+class Payload:
+    def __reduce__(self):
+        return (os.system, ('echo loaded',))
+
+
+def test_load_state_keeps_training_state(tmp_path):
+    model = torch.nn.Linear(3, 2)
+    optim = torch.optim.Adam(model.parameters())
+    model(torch.randn(4, 3)).sum().backward()
+    optim.step()
+
+    path = str(tmp_path / 'last.pth')
+    torch.save({'model': model.state_dict(), 'optim': optim.state_dict(), 'epoch': 1, 'rng': rng_state()}, path)
+
+    state = load_state(path)
+    assert torch.equal(state['model']['weight'], model.state_dict()['weight'])
+    assert state['optim']['param_groups'][0]['betas'] == (0.9, 0.999)
+    assert state['epoch'] == 1
+
+
+def test_load_state_refuses_code(tmp_path):
+    path = str(tmp_path / 'best.pth')
+    torch.save({'weight': Payload()}, path)
+
+    with pytest.raises(pickle.UnpicklingError):
+        load_state(path)
+
+
+# Fallback of torch versions without weights_only
+def test_safe_pickle_refuses_code(tmp_path):
+    kwargs = {'weights_only': False} if 'weights_only' in inspect.signature(torch.load).parameters else {}
+    path = str(tmp_path / 'best.pth')
+    torch.save({'weight': torch.zeros(2)}, path)
+    assert torch.equal(torch.load(path, pickle_module=safe_pickle, **kwargs)['weight'], torch.zeros(2))
+
+    torch.save({'weight': Payload()}, path)
+    with pytest.raises(pickle.UnpicklingError):
+        torch.load(path, pickle_module=safe_pickle, **kwargs)
@@ -0,0 +1,41 @@
+import copy
+
+from aicore.cohort import Cohort, cohort_key
+from aicore.events import EventBus
+from aicore.metrics import read_metrics
+
+
+CONFIGS = {
+    'model': {'layers': [{'name': 'flatten'}, {'name': 'linear', 'in_shape': 784, 'out_shape': 10}]},
+    'train': {'lr': 0.01, 'batch_size': 64, 'num_epochs': 2},
+    'data': {'transforms': [{'name': 'to_tensor'}]}
+}
+
+
+def with_changes(model=None, train=None):
+    configs = copy.deepcopy(CONFIGS)
+    configs['model'].update(model or {})
+    configs['train'].update(train or {})
+    return configs
+
+
+def test_same_data_and_batch_size_share_a_key():
+    assert cohort_key(CONFIGS) == cohort_key(with_changes(train={'lr': 0.1}))
+    assert cohort_key(CONFIGS) == cohort_key(with_changes(model={'compile': 'eager'}))
+    assert cohort_key(CONFIGS) != cohort_key(with_changes(train={'batch_size': 32}))
+
+
+# The stacked cohort forward would silently drop the compiled model
+def test_compiled_models_train_alone():
+    assert cohort_key(with_changes(model={'compile': 'script'})) is None
+    assert cohort_key(with_changes(model={'compile': 'compile'})) is None
+
+
+# A member without epochs never trains, the others train as usual
+def test_member_without_epochs_does_not_train(store, create_exp):
+    exp_dirs = [create_exp('empty', num_epochs=0), create_exp('full', num_epochs=1)]
+    Cohort(exp_dirs, store=store, events=EventBus()).start()
+
+    assert len(read_metrics(exp_dirs[0])) == 0
+    assert len(read_metrics(exp_dirs[1])) == 4
+    assert store.get('full')['run']['status'] == 'done'
@@ -0,0 +1,44 @@
+import os
+
+from aicore.store import MetadataStore
+from aicore.early_stop import EarlyStopController, stop_requested
+
+
+def report(epoch, loss, num_epochs=10):
+    return {'epoch': epoch, 'loss': loss, 'num_epochs': num_epochs}
+
+
+# One trial in two sweeps with different rungs, the second sweep stops it
+def test_trial_of_two_sweeps(tmp_path):
+    store = MetadataStore(str(tmp_path / 'metadata.db'))
+    os.makedirs(tmp_path / 'trial')
+
+    # Rungs at epochs 1, 2, 4, 8 and at epochs 3, 9
+    store.insert_sweep('fine', {'early_stop': {'min_epoch': 1, 'eta': 2}}, [('trial', {})])
+    store.insert_sweep('coarse', {'early_stop': {'min_epoch': 3, 'eta': 3}}, [('other_1', {}), ('other_2', {}), ('trial', {})])
+    store.record_rung('coarse', 3, 'other_1', 0.1)
+    store.record_rung('coarse', 3, 'other_2', 0.2)
+
+    controller = EarlyStopController(str(tmp_path), store)
+    controller.on_event('trial', 'report', report(2, 0.5))
+    assert not stop_requested(str(tmp_path / 'trial'))
+
+    controller.on_event('trial', 'report', report(3, 0.5))
+    assert stop_requested(str(tmp_path / 'trial'))
+    assert store.record_rung('coarse', 3, 'trial', 0.5) == [0.1, 0.2, 0.5]
+
+
+# A rung shared by both sweeps is recorded in each of them
+def test_shared_rung_recorded_in_every_sweep(tmp_path):
+    store = MetadataStore(str(tmp_path / 'metadata.db'))
+    os.makedirs(tmp_path / 'trial')
+
+    store.insert_sweep('first', {'early_stop': {'min_epoch': 2, 'eta': 2}}, [('trial', {})])
+    store.insert_sweep('second', {'early_stop': {'min_epoch': 1, 'eta': 2}}, [('other_1', {}), ('other_2', {}), ('trial', {})])
+    store.record_rung('second', 2, 'other_1', 0.1)
+
+    controller = EarlyStopController(str(tmp_path), store)
+    controller.on_event('trial', 'report', report(2, 0.5))
+
+    assert stop_requested(str(tmp_path / 'trial'))
+    assert sorted(store.record_rung('first', 2, 'other', 0.9)) == [0.5, 0.9]
@@ -0,0 +1,13 @@
+from aicore.executor import ProcessExecutor
+
+
+# Same seed, same weights and batches: worker processes train identical runs
+def test_process_runs_are_seeded(store, exp_root, create_exp):
+    executor = ProcessExecutor(exp_root, seed=7, store=store)
+    for exp_id in ['first', 'second']:
+        create_exp(exp_id)
+        executor.run(exp_id)
+
+    first, second = store.get('first'), store.get('second')
+    assert first['run']['status'] == second['run']['status'] == 'done'
+    assert first['run']['best_lost'] == second['run']['best_lost']
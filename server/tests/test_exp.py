@@ -0,0 +1,132 @@
+import os
+
+import yaml
+import pytest
+from flask import Flask
+
+import routes
+from aicore.manage import configure_store
+from aicore.metrics import MetricsRecorder
+
+
+# Routes read the store shared by the whole server
+@pytest.fixture
+def store(tmp_path):
+    return configure_store(str(tmp_path / 'metadata.db'))
+
+
+@pytest.fixture
+def client(store, exp_root):
+    with open('configs/configs_all.yaml', 'r') as f:
+        configs = yaml.load(f, yaml.FullLoader)
+    configs['exp']['dir'] = exp_root
+
+    app = Flask(__name__)
+    routes.configure(configs)
+    app.register_blueprint(routes.module, url_prefix='/')
+    return app.test_client()
+
+
+def insert(store, exp_id, created):
+    store.insert(exp_id, {'id': exp_id}, {'status': 'create', 'create': created})
+
+
+def test_list_revalidates_with_etag(client, store):
+    insert(store, 'a', '2024-01-01')
+
+    response = client.get('/exp/list')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    response = client.get('/exp/list', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    insert(store, 'b', '2024-01-02')
+    response = client.get('/exp/list', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert [item['id'] for item in response.json['data']['items']] == ['b', 'a']
+    assert response.headers['ETag'] != etag
+
+
+def test_list_pages_with_cursor(client, store):
+    for exp_id, created in [('a', '2024-01-01'), ('b', '2024-01-02'), ('c', '2024-01-03')]:
+        insert(store, exp_id, created)
+
+    first = client.get('/exp/list?limit=2').json['data']
+    second = client.get('/exp/list', query_string={'limit': 2, 'cursor': first['next']}).json['data']
+
+    assert [item['id'] for item in first['items'] + second['items']] == ['c', 'b', 'a']
+    assert second['next'] is None
+    assert first['counts']['created'] == first['counts']['total'] == 3
+
+
+def test_list_since_returns_deletions(client, store):
+    for exp_id, created in [('a', '2024-01-01'), ('b', '2024-01-02')]:
+        insert(store, exp_id, created)
+    seq = client.get('/exp/list').json['data']['seq']
+    store.delete('a')
+
+    data = client.get('/exp/list?since={}'.format(seq)).json['data']
+    assert data['items'] == []
+    assert data['deleted'] == ['a']
+    assert data['seq'] > seq
+
+
+@pytest.mark.parametrize('query', ['limit=0', 'order=up', 'sort_by=speed', 'cursor=nope', 'since=-1'])
+def test_list_rejects_invalid_parameters(client, query):
+    assert client.get('/exp/list?' + query).status_code == 400
+
+
+@pytest.fixture
+def recorded(store, exp_root):
+    exp_dir = os.path.join(exp_root, 'recorded')
+    os.makedirs(exp_dir)
+    insert(store, 'recorded', '2024-01-01')
+
+    recorder = MetricsRecorder(exp_dir)
+    for step in range(1, 301):
+        recorder.record(step, 1, 1.0 / step, 0.01, 100.0)
+    recorder.close()
+    return 'recorded'
+
+
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+def test_metrics_are_downsampled(client, recorded, method):
+    data = client.get('/exp/recorded/metrics', query_string={'fields': 'loss,lr', 'points': 25, 'method': method}).json['data']
+
+    assert data['total'] == 300
+    for field in ['loss', 'lr']:
+        steps = data['series'][field]['step']
+        assert len(steps) <= 25
+        assert steps[0] == 1 and steps[-1] == 300
+
+
+@pytest.mark.parametrize('query', ['points=1', 'fields=accuracy', 'method=mean'])
+def test_metrics_reject_invalid_parameters(client, recorded, query):
+    assert client.get('/exp/recorded/metrics?' + query).status_code == 400
+
+
+LAYERS = [{'name': 'flatten'}, {'name': 'linear', 'in_shape': 784, 'out_shape': 10}]
+
+
+def test_validate_reports_shapes(client):
+    response = client.post('/exp/validate', json={'model': {'layers': LAYERS}})
+    assert response.status_code == 200
+    assert response.json['data']['output_shape'] == [10]
+
+    response = client.post('/exp/validate', json={'model': {'layers': LAYERS[1:]}})
+    assert response.status_code == 200
+    assert not response.json['success']
+
+
+@pytest.mark.parametrize('body', [[LAYERS], 'model', 3, {'model': LAYERS}])
+def test_validate_rejects_malformed_bodies(client, body):
+    assert client.post('/exp/validate', json=body).status_code == 400
+
+
+@pytest.mark.parametrize('body', [[LAYERS], 'model', {'model': LAYERS}, {'model': {'layers': LAYERS}, 'train': [1]}])
+def test_create_rejects_malformed_bodies(client, body):
+    response = client.post('/exp/create', json=body)
+    assert response.status_code == 400
+    assert not response.json['success']
@@ -0,0 +1,33 @@
+import os
+
+import yaml
+import torch
+
+from aicore.events import EventBus
+from aicore.experiment import Experiment
+from aicore.checkpoint import LAST_CHECKPOINT, load_last
+
+
+# A resumed run reports the training time of every run, not only the last one
+def test_resumed_duration_adds_up_runs(store, create_exp):
+    exp_dir = create_exp('resumed', num_epochs=1)
+    Experiment(exp_dir, store=store, events=EventBus()).start()
+    first = store.get('resumed')['run']
+    assert load_last(exp_dir)['elapsed'] <= first['dur']
+
+    # Earlier runs trained 1000s in total, one more epoch is configured
+    state = load_last(exp_dir)
+    state['elapsed'] = 1000.0
+    torch.save(state, os.path.join(exp_dir, LAST_CHECKPOINT))
+    with open(os.path.join(exp_dir, 'configs.yaml'), 'r') as f:
+        configs = yaml.full_load(f)
+    configs['train']['num_epochs'] = 2
+    with open(os.path.join(exp_dir, 'configs.yaml'), 'w') as f:
+        yaml.dump(configs, f)
+
+    Experiment(exp_dir, store=store, events=EventBus()).start(resume=True)
+    run = store.get('resumed')['run']
+    assert run['status'] == 'done'
+    assert run['resumed_from'] == 1
+    assert 1000.0 < run['dur'] < 1060.0
+    assert load_last(exp_dir)['elapsed'] > 1000.0
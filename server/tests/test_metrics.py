@@ -0,0 +1,117 @@
+import pytest
+import torch
+import numpy as np
+
+from aicore.metrics import ConfusionMatrix, MetricsRecorder, downsample, metrics_series
+
+
+# 5 classes: class 3 is only predicted, class 4 never appears
+LABELS = [0, 0, 0, 1, 1, 2, 2, 2, 2]
+PREDICTED = [0, 0, 1, 1, 2, 2, 2, 0, 3]
+
+
+def matrix(labels=LABELS, predicted=PREDICTED, n_classes=5):
+    confusion = ConfusionMatrix(n_classes)
+    confusion.update(torch.tensor(labels), torch.tensor(predicted))
+    return confusion
+
+
+def test_counts():
+    assert matrix().matrix.tolist() == [
+        [2, 1, 0, 0, 0],
+        [0, 1, 1, 0, 0],
+        [1, 0, 2, 1, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0]
+    ]
+    assert matrix().total() == 9
+
+
+def test_metrics_against_hand_computed_values():
+    result = matrix().compute()
+
+    assert result['accuracy'] == pytest.approx(5 / 9)
+    for metric in ['precision', 'recall', 'f1']:
+        assert result[metric]['micro'] == pytest.approx(5 / 9)
+
+    # Class 3 has no support but was predicted, so it counts in the macro averages as 0; class 4 does not count
+    assert result['precision']['macro'] == pytest.approx((2 / 3 + 1 / 2 + 2 / 3 + 0) / 4)
+    assert result['recall']['macro'] == pytest.approx((2 / 3 + 1 / 2 + 1 / 2 + 0) / 4)
+    assert result['f1']['macro'] == pytest.approx((2 / 3 + 1 / 2 + 4 / 7 + 0) / 4)
+
+    per_class = result['per_class']
+    assert [c['support'] for c in per_class] == [3, 2, 4, 0, 0]
+    assert [c['precision'] for c in per_class] == pytest.approx([2 / 3, 1 / 2, 2 / 3, 0, 0])
+    assert [c['recall'] for c in per_class] == pytest.approx([2 / 3, 1 / 2, 1 / 2, 0, 0])
+    assert [c['f1'] for c in per_class] == pytest.approx([2 / 3, 1 / 2, 4 / 7, 0, 0])
+
+
+# Batches accumulated one by one or merged give the same matrix
+def test_batches_and_merge():
+    confusion = ConfusionMatrix(5)
+    confusion.update(torch.tensor(LABELS[:4]), torch.tensor(PREDICTED[:4]))
+    other = ConfusionMatrix(5)
+    other.update(torch.tensor(LABELS[4:]), torch.tensor(PREDICTED[4:]))
+
+    assert torch.equal(confusion.merge(other).matrix, matrix().matrix)
+
+
+def test_empty_matrix():
+    result = ConfusionMatrix(3).compute()
+
+    assert result['accuracy'] == 0.0
+    assert result['precision']['macro'] == result['recall']['macro'] == result['f1']['macro'] == 0.0
+    assert [c['support'] for c in result['per_class']] == [0, 0, 0]
+
+
+# Noisy curve with a spike and a dip away from the ends
+def curve(n_samples=1000):
+    x = np.arange(1, n_samples + 1)
+    y = np.sin(x / 50.0) + np.random.default_rng(0).normal(0, 0.1, n_samples)
+    y[317] = 10.0
+    y[641] = -10.0
+    return x, y
+
+
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+@pytest.mark.parametrize('n_points', [2, 3, 10, 101, 500])
+def test_downsample_keeps_ends_within_budget(method, n_points):
+    x, y = curve()
+    index = downsample(x, y, n_points, method=method)
+
+    assert len(index) <= n_points
+    assert index[0] == 0 and index[-1] == len(x) - 1
+    assert np.all(np.diff(index) > 0)
+
+
+@pytest.mark.parametrize('n_points', [4, 10, 101])
+def test_minmax_keeps_extremes(n_points):
+    x, y = curve()
+    index = downsample(x, y, n_points, method='minmax')
+
+    assert 317 in index and 641 in index
+    assert y[index].max() == y.max() and y[index].min() == y.min()
+
+
+def test_short_series_are_kept_whole():
+    x, y = np.arange(50), np.random.default_rng(0).normal(0, 1, 50)
+    for method in ['lttb', 'minmax']:
+        assert downsample(x, y, 50, method=method).tolist() == list(range(50))
+
+
+def test_metrics_series(tmp_path):
+    recorder = MetricsRecorder(str(tmp_path))
+    for step in range(1, 1001):
+        recorder.record(step, 1, float('nan') if step == 500 else 1.0 / step, 0.01, 100.0)
+    recorder.close()
+
+    result = metrics_series(str(tmp_path), ['loss', 'lr'], 100)
+    assert result['total'] == 1000
+    for field in ['loss', 'lr']:
+        series = result['series'][field]
+        assert len(series['step']) == len(series['value']) <= 100
+        assert series['step'][0] == 1 and series['step'][-1] == 1000
+
+    # Diverged steps become null, not NaN in the JSON
+    result = metrics_series(str(tmp_path), ['loss'], 1000)
+    assert result['series']['loss']['value'][499] is None
@@ -0,0 +1,114 @@
+import time
+
+from aicore.store import MetadataStore
+from aicore.scheduler import Scheduler
+
+
+# Executor recording what the slots ran
+class RecordingExecutor:
+    def __init__(self):
+        self.runs = []
+
+    def run(self, exp_id, resume=False, budget=None):
+        self.runs.append((exp_id, resume))
+
+    def run_cohort(self, exp_ids, budget=None):
+        self.runs.append((tuple(exp_ids), False))
+
+
+def insert(store, exp_id, status='create'):
+    store.insert(exp_id, {'id': exp_id}, {'status': status, 'create': '2024-01-01'})
+
+
+def wait_idle(scheduler, timeout=10):
+    deadline = time.time() + timeout
+    while scheduler.depth() or scheduler.snapshot()['running']:
+        assert time.time() < deadline, 'Scheduler did not drain its queue'
+        time.sleep(0.05)
+
+
+def test_submit_queues_in_order(store, exp_root):
+    scheduler = Scheduler(exp_root, 0, executor=RecordingExecutor(), store=store)
+    for exp_id in ['a', 'b', 'c']:
+        insert(store, exp_id)
+
+    assert [scheduler.submit(exp_id) for exp_id in ['a', 'b', 'c']] == [1, 2, 3]
+    assert store.queued() == ['a', 'b', 'c']
+    assert [store.get_status(exp_id) for exp_id in ['a', 'b', 'c']] == ['queued'] * 3
+
+    # Submitting twice keeps the first position
+    assert scheduler.submit('a') == 1
+    assert scheduler.depth() == 3
+
+
+# A restarted server keeps the queue and resumes experiments that were training
+def test_recover_after_restart(tmp_path, exp_root):
+    db_path = str(tmp_path / 'restart.db')
+    store = MetadataStore(db_path)
+    scheduler = Scheduler(exp_root, 0, executor=RecordingExecutor(), store=store)
+    for exp_id in ['a', 'b', 'c']:
+        insert(store, exp_id)
+        scheduler.submit(exp_id)
+    insert(store, 'orphan', status='train') # Was training when the server died
+    insert(store, 'finished', status='done')
+
+    # New process, same database
+    store = MetadataStore(db_path)
+    executor = RecordingExecutor()
+    scheduler = Scheduler(exp_root, 1, executor=executor, store=store)
+    scheduler.recover()
+    assert store.queued() == ['a', 'b', 'c', 'orphan']
+    assert store.get_status('orphan') == 'queued'
+
+    scheduler.start()
+    wait_idle(scheduler)
+    assert executor.runs == [('a', False), ('b', False), ('c', False), ('orphan', True)]
+    assert store.get_status('finished') == 'done'
+
+
+def test_expired_lease_is_requeued(store, exp_root):
+    scheduler = Scheduler(exp_root, 0, executor=RecordingExecutor(), store=store, lease_timeout=30)
+    insert(store, 'a')
+    scheduler.submit('a')
+
+    assert scheduler.lease('w1') == ('a', False)
+    assert scheduler.depth() == 0
+    assert scheduler.heartbeat('a', 'w1')
+
+    # Fresh heartbeat, nothing to reap
+    scheduler.reap()
+    assert store.lease_holder('a') == 'w1'
+
+    store.renew('a', 'w1', time.time() - 60)
+    scheduler.reap()
+    assert store.lease_holder('a') is None
+    assert store.queued() == ['a']
+    assert store.get_status('a') == 'queued'
+
+    # The lost worker cannot renew or finish, the next one resumes
+    assert not scheduler.heartbeat('a', 'w1')
+    assert not scheduler.finish('a', 'w1')
+    assert scheduler.lease('w2') == ('a', True)
+
+
+def test_recover_leaves_leased_jobs_to_their_workers(store, exp_root):
+    scheduler = Scheduler(exp_root, 0, executor=RecordingExecutor(), store=store)
+    insert(store, 'a')
+    scheduler.submit('a')
+    scheduler.lease('w1')
+    store.update('a', run={'status': 'train'})
+
+    scheduler.recover()
+    assert store.queued() == []
+    assert store.lease_holder('a') == 'w1'
+
+
+def test_failed_remote_job(store, exp_root):
+    scheduler = Scheduler(exp_root, 0, executor=RecordingExecutor(), store=store)
+    insert(store, 'a')
+    scheduler.submit('a')
+    scheduler.lease('w1')
+
+    assert scheduler.finish('a', 'w1', error='RuntimeError()')
+    assert store.get_status('a') == 'failed'
+    assert store.lease_holder('a') is None
@@ -0,0 +1,41 @@
+import pytest
+
+from aicore.shape import infer_shapes
+
+
+def layers(activation):
+    return [
+        {'name': 'flatten'},
+        {'name': 'linear', 'in_shape': 784, 'out_shape': 32},
+        activation,
+        {'name': 'linear', 'in_shape': 32, 'out_shape': 10}
+    ]
+
+
+@pytest.mark.parametrize('activation', [
+    {'name': 'leaky_relu'},
+    {'name': 'leaky_relu', 'slope': 0.2},
+    {'name': 'leaky_relu', 'slope': 0},
+    {'name': 'elu'},
+    {'name': 'elu', 'alpha': 2}
+])
+def test_valid_activation_parameters(activation):
+    report = infer_shapes(layers(activation))
+    assert report['valid']
+    assert report['output_shape'] == [10]
+
+
+@pytest.mark.parametrize('activation', [
+    {'name': 'leaky_relu', 'slope': '0.2'},
+    {'name': 'leaky_relu', 'slope': None},
+    {'name': 'leaky_relu', 'slope': True},
+    {'name': 'leaky_relu', 'slope': [0.2]},
+    {'name': 'elu', 'alpha': 'one'},
+    {'name': 'elu', 'alpha': {'value': 1}},
+    {'name': 'elu', 'alpha': float('nan')}
+])
+def test_invalid_activation_parameters(activation):
+    report = infer_shapes(layers(activation))
+    assert not report['valid']
+    assert report['error']['index'] == 2
+    assert report['error']['name'] == activation['name']
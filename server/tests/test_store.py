@@ -0,0 +1,101 @@
+from aicore.store import expand_statuses
+
+
+def result(accuracy):
+    return {'train': {'accuracy': accuracy}, 'valid': {'accuracy': accuracy}}
+
+
+def insert(store, exp_id, created, status='done', accuracy=None):
+    run = {'status': status, 'create': created}
+    store.insert(exp_id, {'id': exp_id}, run, result(accuracy) if accuracy is not None else None)
+
+
+# Every page of a query, following the cursor
+def pages(store, limit=1, **kwargs):
+    ids, cursor = [], None
+    while True:
+        items, cursor = store.query(limit=limit, cursor=cursor, **kwargs)
+        assert len(items) <= limit
+        ids.extend(item['id'] for item in items)
+        if cursor is None:
+            return ids
+
+
+def test_keyset_pages_cover_every_experiment_once(store):
+    for exp_id, created in [('a', '2024-01-01'), ('b', '2024-01-02'), ('c', '2024-01-03')]:
+        insert(store, exp_id, created)
+
+    assert pages(store, sort_by='created', order='desc') == ['c', 'b', 'a']
+    assert pages(store, sort_by='created', order='asc') == ['a', 'b', 'c']
+    assert pages(store, limit=2, sort_by='created', order='desc') == ['c', 'b', 'a']
+
+
+# Ties on the sort value are broken by id, so no page repeats or skips one
+def test_ties_are_ordered_by_id(store):
+    for exp_id in ['b', 'a', 'c']:
+        insert(store, exp_id, '2024-01-01', accuracy=0.5)
+
+    assert pages(store, sort_by='accuracy', order='desc') == ['c', 'b', 'a']
+    assert pages(store, sort_by='accuracy', order='asc') == ['a', 'b', 'c']
+
+
+def test_missing_values_sort_last_in_both_orders(store):
+    insert(store, 'low', '2024-01-01', accuracy=0.1)
+    insert(store, 'none_1', '2024-01-02', status='create')
+    insert(store, 'high', '2024-01-03', accuracy=0.9)
+    insert(store, 'none_2', '2024-01-04', status='create')
+
+    assert pages(store, sort_by='accuracy', dataset='valid', order='desc') == ['high', 'low', 'none_2', 'none_1']
+    assert pages(store, sort_by='accuracy', dataset='valid', order='asc') == ['low', 'high', 'none_1', 'none_2']
+
+
+def test_status_groups_filter_pages(store):
+    insert(store, 'done', '2024-01-01')
+    insert(store, 'queued', '2024-01-02', status='queued')
+    insert(store, 'train', '2024-01-03', status='train')
+
+    assert pages(store, statuses=expand_statuses(['running'])) == ['train', 'queued']
+    assert pages(store, statuses=expand_statuses(['done', 'failed'])) == ['done']
+
+
+def test_changes_report_updates_and_deletions(store):
+    for exp_id, created in [('a', '2024-01-01'), ('b', '2024-01-02'), ('c', '2024-01-03')]:
+        insert(store, exp_id, created)
+
+    items, deleted, seq, more = store.changes(0)
+    assert [item['id'] for item in items] == ['a', 'b', 'c']
+    assert deleted == [] and not more
+    assert seq == store.current_seq()
+
+    store.delete('b')
+    store.update('c', run={'status': 'train'})
+
+    items, deleted, since, more = store.changes(seq)
+    assert deleted == ['b']
+    assert [item['id'] for item in items] == ['c']
+    assert items[0]['run']['status'] == 'train'
+
+    # Nothing new after the returned high-water mark
+    assert store.changes(since) == ([], [], since, False)
+
+
+def test_changes_are_paged_by_sequence(store):
+    for exp_id, created in [('a', '2024-01-01'), ('b', '2024-01-02'), ('c', '2024-01-03')]:
+        insert(store, exp_id, created)
+    store.delete('a')
+
+    items, deleted, seq, more = store.changes(0, limit=2)
+    assert [item['id'] for item in items] == ['b', 'c'] and more
+
+    items, deleted, seq, more = store.changes(seq, limit=2)
+    assert items == [] and deleted == ['a'] and not more
+
+
+# Recreating a deleted id removes its tombstone
+def test_insert_clears_tombstone(store):
+    insert(store, 'a', '2024-01-01')
+    store.delete('a')
+    insert(store, 'a', '2024-01-02')
+
+    items, deleted, seq, more = store.changes(0)
+    assert [item['id'] for item in items] == ['a'] and deleted == []
@@ -0,0 +1,47 @@
+import yaml
+import pytest
+from flask import Flask
+
+import routes
+from aicore.sweep import apply_params
+
+
+@pytest.fixture
+def client():
+    with open('configs/configs_all.yaml', 'r') as f:
+        configs = yaml.load(f, yaml.FullLoader)
+
+    app = Flask(__name__)
+    routes.configure(configs)
+    app.register_blueprint(routes.module, url_prefix='/')
+    return app.test_client()
+
+
+SPACE = {'train.lr': [0.01, 0.1]}
+
+
+@pytest.mark.parametrize('body', [
+    {'space': SPACE, 'metric': 'loss'},
+    {'space': SPACE, 'metric': ['loss']},
+    {'space': SPACE, 'early_stop': 'asha'},
+    {'space': SPACE, 'early_stop': ['asha']},
+    {'space': 'train.lr'},
+    {'space': {'train.lr': 0.01}, 'method': 'random', 'n_trials': 2},
+    {'space': {'train.lr': {'min': 0.01}}, 'method': 'random', 'n_trials': 2},
+    {'space': {'train.lr.value': [0.01]}, 'base': {'train': {'lr': 0.1}}},
+    {'space': SPACE, 'metric': {'order': 'up'}},
+    {'space': SPACE, 'metric': {'sort_by': 'speed'}},
+    {'space': SPACE, 'base': [1]}
+])
+def test_create_rejects_malformed_spec(client, body):
+    response = client.post('/sweep/create', json=body)
+    assert response.status_code == 400
+    assert not response.json['success']
+
+
+def test_apply_params_refuses_paths_through_values():
+    with pytest.raises(ValueError):
+        apply_params({'train': {'lr': 0.1}}, {'train.lr.value': 0.01})
+
+    configs = apply_params({'model': {'layers': [{}, {'out_shape': 8}]}}, {'train.lr': 0.01, 'model.layers.1.out_shape': 16})
+    assert configs == {'model': {'layers': [{}, {'out_shape': 16}]}, 'train': {'lr': 0.01}}
@@ -0,0 +1,88 @@
+import yaml
+import pytest
+from flask import Flask
+
+import routes
+from aicore.manage import configure_store
+from aicore.scheduler import configure_scheduler, get_scheduler
+
+
+TOKEN = 'secret'
+
+
+# Routes read the store shared by the whole server
+@pytest.fixture
+def store(tmp_path):
+    return configure_store(str(tmp_path / 'metadata.db'))
+
+
+@pytest.fixture
+def client(store, exp_root):
+    with open('configs/configs_all.yaml', 'r') as f:
+        configs = yaml.load(f, yaml.FullLoader)
+    configs['exp']['dir'] = exp_root
+    configs['worker']['token'] = TOKEN
+
+    configure_scheduler(exp_root, 0)
+    app = Flask(__name__)
+    routes.configure(configs)
+    app.register_blueprint(routes.module, url_prefix='/')
+    return app.test_client()
+
+
+def post(client, path, body):
+    return client.post(path, json=body, headers={'X-Worker-Token': TOKEN})
+
+
+# Experiment leased to worker w1, next to another experiment
+@pytest.fixture
+def leased(client, create_exp):
+    create_exp('leased')
+    create_exp('other')
+    get_scheduler().submit('leased')
+    assert post(client, '/worker/lease', {'worker': 'w1'}).json['data']['id'] == 'leased'
+    return 'leased'
+
+
+def test_token_is_required(client):
+    assert client.post('/worker/lease', json={'worker': 'w1'}).status_code == 401
+    assert client.post('/worker/lease', json={'worker': 'w1'}, headers={'X-Worker-Token': 'guess'}).status_code == 401
+
+
+@pytest.mark.parametrize('path, body', [
+    ('/worker/lease', ['w1']),
+    ('/worker/lease', {}),
+    ('/worker/lease', {'worker': 1}),
+    ('/worker/leased/heartbeat', {'name': 'w1'}),
+    ('/worker/leased/messages', {'worker': 'w1'}),
+    ('/worker/leased/messages', {'worker': 'w1', 'messages': 'update'}),
+    ('/worker/leased/finish', 'w1')
+])
+def test_malformed_bodies(client, path, body):
+    assert post(client, path, body).status_code == 400
+
+
+@pytest.mark.parametrize('message', [
+    ['store', 'put', ['leased', {'configs': {}}], {}],
+    ['store', 'insert', ['leased', {}, {}], {}],
+    ['store', 'update', ['other'], {'run': {'status': 'done'}}],
+    ['store', 'update', ['leased'], {'configs': {}}],
+    ['store', 'update', ['leased'], {'run': 'done'}],
+    ['event', 'other', 'status', {}],
+    {'store': 'update'}
+])
+def test_messages_only_update_the_leased_experiment(client, store, leased, message):
+    configs = store.get_configs('other')
+    response = post(client, '/worker/leased/messages', {'worker': 'w1', 'messages': [message]})
+
+    assert response.status_code == 400
+    assert store.get_configs('other') == configs
+    assert store.get_status('other') == 'create'
+
+
+def test_update_of_the_leased_experiment(client, store, leased):
+    message = ['store', 'update', ['leased'], {'run': {'status': 'train', 'curr_epoch': 1}}]
+    response = post(client, '/worker/leased/messages', {'worker': 'w1', 'messages': [message]})
+
+    assert response.status_code == 200
+    assert store.get('leased')['run']['curr_epoch'] == 1
@@ -1,3 +1,5 @@
+import json
+
 from .common import get_current_timestring
 
 
@@ -12,4 +14,9 @@ def generate_response(data, message=None, success=True):
         'success': success,
         'message': message,
         'data': data
-    }
\ No newline at end of file
+    }
+
+
+# Server-sent event frame
+def generate_event(event, data):
+    return 'event: {}\ndata: {}\n\n'.format(event, json.dumps(data))